@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import math
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_benchmark import make_data
+from src.distance import euclidean_distance
+from src.assignment import assign_packages_to_agents
+from src.capacity import assign_packages_with_capacity
+from src.simulation import simulate_deliveries
+
+
+# Sum of agent -> warehouse distances over all packages (the flow objective)
+def assignment_cost(assignments, data):
+    warehouse_map = {wh["id"]: wh["location"] for wh in data["warehouses"]}
+    agent_map = {agent["id"]: agent["location"] for agent in data["agents"]}
+
+    return sum(
+        euclidean_distance(agent_map[agent_id], warehouse_map[p["warehouse_id"]])
+        for agent_id, packages in assignments.items()
+        for p in packages
+    )
+
+
+# Run one solver and collect timing / quality numbers
+def run(name, solver, data):
+    started = time.perf_counter()
+    assignments = solver(data)
+    seconds = time.perf_counter() - started
+
+    stats = simulate_deliveries(assignments, data)
+    loads = [len(p) for p in assignments.values()]
+
+    print(f"   {name:<9}: {seconds:8.2f}s  "
+          f"assign_cost={assignment_cost(assignments, data):14.1f}  "
+          f"sim_distance={sum(s['total_distance'] for s in stats.values()):14.1f}  "
+          f"max_load={max(loads):6d}  idle_agents={loads.count(0)}")
+
+
+# `slack` scales the even split for the capacity run; the default run uses the
+# even split itself (what main.py uses without --capacity), where every agent
+# has to be filled
+def main(n_packages, n_warehouses, n_agents, slack):
+    data = make_data(n_packages, n_warehouses, n_agents)
+    capacity = math.ceil(slack * n_packages / n_agents)
+
+    print(f"Packages: {n_packages}  Warehouses: {n_warehouses}  "
+          f"Agents: {n_agents}  Capacity: {capacity}  "
+          f"Default: {math.ceil(n_packages / n_agents)}")
+
+    run("greedy", assign_packages_to_agents, data)
+    run("capacity", lambda d: assign_packages_with_capacity(d, capacity), data)
+    run("default", assign_packages_with_capacity, data)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        int(args[0]) if len(args) > 0 else 100_000,
+        int(args[1]) if len(args) > 1 else 1_000,
+        int(args[2]) if len(args) > 2 else 5_000,
+        float(args[3]) if len(args) > 3 else 2.0
+    )
@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+import random
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.scenario import Scenario
+
+
+# Build a random scenario in the dict schema
+def make_data(n_packages, n_warehouses=100, n_agents=50, seed=42):
+    rng = random.Random(seed)
+    return {
+        "warehouses": [
+            {"id": f"W{i}", "location": [rng.randint(0, 1000), rng.randint(0, 1000)]}
+            for i in range(n_warehouses)
+        ],
+        "agents": [
+            {"id": f"A{i}", "location": [rng.randint(0, 1000), rng.randint(0, 1000)]}
+            for i in range(n_agents)
+        ],
+        "packages": [
+            {
+                "id": f"P{i}",
+                "warehouse_id": f"W{rng.randrange(n_warehouses)}",
+                "destination": [rng.uniform(0, 1000), rng.uniform(0, 1000)]
+            }
+            for i in range(n_packages)
+        ],
+    }
+
+
+# Bytes allocated while building `factory()`, kept alive until measured
+def measure(factory):
+    tracemalloc.start()
+    obj = factory()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, obj
+
+
+def main(n_packages=200_000):
+    dict_bytes, data = measure(lambda: make_data(n_packages))
+    # Convert from a fresh copy so the Scenario pays for its own ID strings
+    text = json.dumps(data)
+    compact_bytes, scenario = measure(lambda: Scenario.from_dict(json.loads(text)))
+
+    # Both representations must describe the same scenario
+    assert scenario.to_dict() == data
+
+    print(f"Packages: {n_packages}")
+    print(f"   dict schema : {dict_bytes / n_packages:8.1f} bytes / package")
+    print(f"   Scenario    : {compact_bytes / n_packages:8.1f} bytes / package")
+    print(f"   Reduction   : {dict_bytes / compact_bytes:8.1f}x")
+
+    # Whole numbers given as floats (5.0) must keep their type without a
+    # per-coordinate cost
+    for package in data["packages"]:
+        package["destination"] = [float(round(v)) for v in package["destination"]]
+    text = json.dumps(data)
+    whole_bytes, scenario = measure(lambda: Scenario.from_dict(json.loads(text)))
+    assert scenario.to_dict() == json.loads(text)
+    print(f"   Scenario, whole floats: {whole_bytes / n_packages:8.1f} bytes / package")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
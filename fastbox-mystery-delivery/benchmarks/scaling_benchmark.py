@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.generator import DISTRIBUTIONS, write_scenario
+from src.data_loader import load_data
+from src.assignment import assign_packages_to_agents
+from src.simulation import simulate_deliveries
+from src.report import generate_report
+
+DEFAULT_SIZES = "1e3,1e4,1e5,1e6"
+
+
+# Run one stage; returns (result, wall seconds, CPU seconds, peak traced bytes)
+def measure_stage(func, trace_memory=True):
+    if trace_memory:
+        tracemalloc.start()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+
+    result = func()
+
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, wall, cpu, peak
+
+
+# Generate, load, assign, simulate and report one scenario size
+def run_size(n_packages, args, workdir):
+    path = os.path.join(workdir, f"scenario_{n_packages}.json")
+    stages = {}
+
+    def record(name, func):
+        result, wall, cpu, peak = measure_stage(func, not args.no_memory)
+        stages[name] = {
+            "seconds": round(wall, 4),
+            "cpu_seconds": round(cpu, 4),
+            "peak_bytes": peak,
+            "packages_per_second": round(n_packages / wall, 1) if wall else None
+        }
+        print(f"   {name:<9}: {wall:9.3f}s"
+              + (f"  peak={peak / 2**20:9.1f} MiB" if peak is not None else ""))
+        return result
+
+    print(f"Packages: {n_packages}")
+    record("generate", lambda: write_scenario(
+        path, n_packages,
+        n_warehouses=args.warehouses,
+        n_agents=args.agents,
+        distribution=args.distribution,
+        seed=args.seed
+    ))
+    data = record("load", lambda: load_data(path))
+    assignments = record("assign", lambda: assign_packages_to_agents(data))
+    stats = record("simulate", lambda: simulate_deliveries(assignments, data))
+    record("report", lambda: generate_report(
+        stats,
+        json_path=os.path.join(workdir, "report.json"),
+        csv_path=os.path.join(workdir, "top_agent.csv")
+    ))
+
+    os.remove(path)
+    return {"packages": n_packages, "stages": stages}
+
+
+# Commit of the working tree, so results can be compared across versions
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastBox scaling benchmark")
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help=f"comma-separated package counts (default: {DEFAULT_SIZES}; up to 1e7)"
+    )
+    parser.add_argument("--warehouses", type=int, default=100)
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="skip tracemalloc (faster, but no peak memory numbers)"
+    )
+    parser.add_argument("--output", default="output/scaling_benchmark.json")
+    args = parser.parse_args()
+
+    sizes = [int(float(s)) for s in args.sizes.split(",")]
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_packages in sizes:
+            results.append(run_size(n_packages, args, workdir))
+
+    summary = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "warehouses": args.warehouses,
+            "agents": args.agents,
+            "distribution": args.distribution,
+            "seed": args.seed,
+            "memory_traced": not args.no_memory,
+        },
+        "results": results,
+    }
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(summary, f, indent=4)
+    print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,598 @@
-from src.data_loader import load_data
+import json
+import random
+import argparse
+from src.data_loader import load_data, stream_data
 from src.distance import euclidean_distance
-from src.assignment import assign_packages_to_agents
-from src.simulation import simulate_deliveries
-from src.report import generate_report
+from src.engines import (
+    ASSIGNMENT_ENGINES,
+    SIMULATION_ENGINES,
+    get_assignment_engine,
+    get_simulation_engine,
+)
+from src.assignment import assign_scenario
+from src.simulation import iter_agent_stats, simulate_stream, simulate_scenario
+from src.scenario import Scenario
+from src.binary_scenario import is_binary_scenario, load_binary
+from src.monte_carlo import simulate_monte_carlo
+from src.routing import DEFAULT_TIME_BUDGET, optimize_routes
+from src.trips import DEFAULT_TRIP_CAPACITY, simulate_trips
+from src.placement import DEFAULT_GRID, optimize_placement
+from src.sequential import DISPATCH_ORDERS, compare_dispatch
+from src.deadlines import REPAIR_ROUNDS, schedule_deliveries
+from src.road_network import RoadDistance, RoadNetwork
+from src.multi_day import simulate_days
+from src.sharding import simulate_sharded
+from src.instrumentation import Instrumentation
+from src.result_cache import (
+    DEFAULT_CACHE_BYTES,
+    DEFAULT_CACHE_DIR,
+    ResultCache,
+    cache_key,
+    decode_agents,
+    decode_assignments,
+    encode_agents,
+    encode_assignments,
+    file_digest,
+)
+from src.report import (
+    TOP_K,
+    generate_monte_carlo_report,
+    generate_multi_day_report,
+    generate_report,
+    generate_report_stream,
+    optional_columns,
+)
+
+
+# Command line options
+def parse_args():
+    parser = argparse.ArgumentParser(description="FastBox delivery simulation")
+    parser.add_argument(
+        "--engine",
+        choices=sorted(ASSIGNMENT_ENGINES),
+        default="greedy",
+        help="assignment engine (default: greedy)"
+    )
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        default=None,
+        help="max packages per agent for --engine capacity (default: even split)"
+    )
+    parser.add_argument(
+        "--dispatch-order",
+        choices=DISPATCH_ORDERS,
+        default="arrival",
+        help="package order for --engine sequential (default: arrival)"
+    )
+    parser.add_argument(
+        "--sim-engine",
+        choices=sorted(SIMULATION_ENGINES),
+        default="loop",
+        help="simulation engine (default: loop)"
+    )
+    parser.add_argument(
+        "--input",
+        default="base_case.json",
+        help="scenario file, JSON or NDJSON, or a binary .fbx directory "
+             "(default: base_case.json)"
+    )
+    parser.add_argument(
+        "--road-network",
+        default=None,
+        help="road graph file; use shortest road distances instead of straight lines"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="stream packages from the input and assign + simulate in one pass"
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="use the compact array-backed scenario model"
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="split the scenario into N spatial tiles simulated in parallel "
+             "(compact model)"
+    )
+    parser.add_argument(
+        "--shard-workers",
+        type=int,
+        default=None,
+        help="worker processes for --shards (default: one per CPU)"
+    )
+    parser.add_argument(
+        "--optimize-routes",
+        action="store_true",
+        help="reorder each agent's packages (nearest neighbour + 2-opt / Or-opt)"
+    )
+    parser.add_argument(
+        "--route-budget",
+        type=float,
+        default=DEFAULT_TIME_BUDGET,
+        help=f"seconds of route improvement per agent (default: {DEFAULT_TIME_BUDGET})"
+    )
+    parser.add_argument(
+        "--route-workers",
+        type=int,
+        default=1,
+        help="processes used to optimize routes (default: 1, 0 = one per CPU)"
+    )
+    parser.add_argument(
+        "--trips",
+        action="store_true",
+        help="deliver in trips: one warehouse pickup, then a multi-stop tour"
+    )
+    parser.add_argument(
+        "--trip-capacity",
+        type=int,
+        default=DEFAULT_TRIP_CAPACITY,
+        help=f"packages carried per trip with --trips (default: {DEFAULT_TRIP_CAPACITY})"
+    )
+    parser.add_argument(
+        "--deadlines",
+        action="store_true",
+        help="schedule each agent earliest-deadline-first (package deadline / window) "
+             "and hand late packages to other agents"
+    )
+    parser.add_argument(
+        "--repair-rounds",
+        type=int,
+        default=REPAIR_ROUNDS,
+        help=f"repair passes over late packages with --deadlines, 0 to skip "
+             f"(default: {REPAIR_ROUNDS})"
+    )
+    parser.add_argument(
+        "--place-agents",
+        type=int,
+        default=0,
+        metavar="K",
+        help="find where K new agents cut the most distance and add them "
+             "(output/placement.json)"
+    )
+    parser.add_argument(
+        "--placement-grid",
+        type=int,
+        default=DEFAULT_GRID,
+        help=f"candidate grid size per side for --place-agents (default: {DEFAULT_GRID})"
+    )
+    parser.add_argument(
+        "--stream-report",
+        action="store_true",
+        help="write the report incrementally with top-k best / worst agents"
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=TOP_K,
+        help=f"agents kept in the streamed best / worst rankings (default: {TOP_K})"
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="gzip the streamed report (report.json.gz / top_agent.csv.gz)"
+    )
+    parser.add_argument(
+        "--compact-report",
+        action="store_true",
+        help="write the streamed JSON without whitespace"
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="record per-stage timings (output/trace.json, output/metrics.prom)"
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="also trace peak memory per stage (slower)"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="trace, and dump a cProfile of the slowest stage to output/"
+    )
+    parser.add_argument(
+        "--replications",
+        type=int,
+        default=0,
+        help="also run N Monte Carlo replications of the random delay"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="random seed for the delays and the Monte Carlo replications"
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        default=None,
+        metavar="DIR",
+        help=f"reuse assignment + stats of identical runs (default dir: {DEFAULT_CACHE_DIR}); "
+             "needs --seed"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_BYTES // 2**20,
+        help=f"cache budget in MiB, least recently used entries are evicted "
+             f"(default: {DEFAULT_CACHE_BYTES // 2**20})"
+    )
+    parser.add_argument(
+        "--days",
+        nargs="+",
+        default=None,
+        metavar="FILE",
+        help="multi-day mode: the input is day 1, these package files follow; "
+             "agent positions and undelivered packages carry over"
+    )
+    parser.add_argument(
+        "--day-capacity",
+        type=int,
+        default=None,
+        help="packages each agent can deliver per day in --days mode (default: unlimited)"
+    )
+    args = parser.parse_args()
+
+    # Binary scenarios are memory-mapped into the compact model
+    if is_binary_scenario(args.input):
+        if args.stream:
+            parser.error("--stream reads JSON / NDJSON inputs; binary scenarios are memory-mapped")
+        args.compact = True
+
+    # Sharded runs work on the compact model
+    if args.shards:
+        if args.stream:
+            parser.error("--shards cannot be combined with --stream")
+        args.compact = True
+
+    if args.road_network and (
+        args.engine not in ("greedy", "sequential") or args.sim_engine != "loop"
+        or args.stream or args.compact
+    ):
+        parser.error("--road-network needs --engine greedy / sequential and --sim-engine loop")
+    # Route improvement prices destination -> destination legs too, each of
+    # which would be a full shortest-path search on the road network
+    if args.road_network and args.optimize_routes:
+        parser.error("--optimize-routes cannot be combined with --road-network")
+    # Streaming / compact runs keep no per-agent routes to improve
+    if args.optimize_routes and (args.stream or args.compact):
+        parser.error("--optimize-routes cannot be combined with --stream / --compact")
+    # Trip tours price destination -> destination legs, which a road network
+    # would answer with one full shortest-path search per destination
+    if args.trips and (
+        args.sim_engine != "loop" or args.stream or args.compact or args.optimize_routes
+        or args.road_network
+    ):
+        parser.error("--trips needs --sim-engine loop, without --stream / --compact / "
+                     "--optimize-routes / --road-network")
+    if args.deadlines and (
+        args.sim_engine != "loop" or args.stream or args.compact
+        or args.optimize_routes or args.trips or args.days
+    ):
+        parser.error("--deadlines needs --sim-engine loop, without --stream / --compact / "
+                     "--optimize-routes / --trips / --days")
+    if args.trip_capacity < 1:
+        parser.error("--trip-capacity must be at least 1")
+    if args.place_agents and (
+        args.engine not in ("greedy", "numpy") or args.stream or args.compact
+        or args.days or args.road_network
+    ):
+        parser.error("--place-agents needs --engine greedy / numpy on a single-day "
+                     "straight-line run")
+    if args.days and (
+        args.engine != "greedy" or args.sim_engine != "loop"
+        or args.stream or args.compact
+    ):
+        parser.error("--days needs --engine greedy and --sim-engine loop")
+    return args
+
+
+# Write output/report.json + output/top_agent.csv, streamed with --stream-report.
+# `stats` is a stats dict, or (agent_id, stats) pairs when streaming.
+def write_report(args, stats):
+    if not args.stream_report:
+        generate_report(
+            stats,
+            json_path="output/report.json",
+            csv_path="output/top_agent.csv"
+        )
+        return
+
+    # Optional columns are known when the stats are a dict (routes, trips and
+    # deadlines); agents streamed straight from the simulation have none
+    suffix = ".gz" if args.gzip else ""
+    columns = optional_columns(stats) if isinstance(stats, dict) else ()
+    generate_report_stream(
+        stats.items() if isinstance(stats, dict) else stats,
+        json_path="output/report.json" + suffix,
+        csv_path="output/top_agent.csv" + suffix,
+        top_k=args.top_k,
+        compress=args.gzip,
+        compact=args.compact_report,
+        columns=columns
+    )
+
+
+# Write the trace files (and the slowest stage's profile) when tracing
+def write_trace(instrumentation):
+    if not instrumentation.enabled:
+        return
+
+    instrumentation.write_json("output/trace.json")
+    instrumentation.write_prometheus("output/metrics.prom")
+    if instrumentation.profile:
+        stage = instrumentation.slowest_stage
+        instrumentation.dump_profile(f"output/profile_{stage}.prof")
+        print(f"Profile of slowest stage ({stage}) → output/profile_{stage}.prof")
 
 
 def main():
+    args = parse_args()
+    instrumentation = Instrumentation(
+        enabled=args.trace or args.trace_memory,
+        memory=args.trace_memory,
+        profile=args.profile
+    )
+
     # --------------------------------
     # Load base_case.json data or data.json
 
-    data = load_data("base_case.json")
+    scenario = None
+    with instrumentation.stage("load") as stage:
+        if args.compact and is_binary_scenario(args.input):
+            scenario = load_binary(args.input)
+            stage.items = len(scenario)
+        elif args.stream:
+            data = stream_data(args.input)
+        else:
+            data = load_data(args.input)
+            stage.items = len(data["packages"])
     # data = load_data("data/data.json")
 
     # --------------------------------
     # New agent joins mid-day 
-    data["agents"].append({
+    new_agent = {
         "id": "A4",
         "location": [20, 20]
-    })
+    }
+    if scenario is not None:
+        scenario.add_agent(new_agent)
+    else:
+        data["agents"].append(new_agent)
 
     # --------------------------------
     # Distance sanity check (optional)
     # print("Distance A1 -> W1:", euclidean_distance([5, 5], [0, 0]))
 
+    # --------------------------------
+    # Streaming / compact modes: no per-package dicts kept in memory
+    if args.stream or args.compact:
+        with instrumentation.stage("simulate") as stage:
+            if args.compact:
+                if scenario is None:
+                    scenario = Scenario.from_dict(data)
+                if args.shards:
+                    stats = simulate_sharded(
+                        scenario, args.shards, args.shard_workers,
+                        enable_delay=True,
+                        seed=args.seed,
+                        binary_path=args.input if is_binary_scenario(args.input) else None
+                    )
+                else:
+                    stats = simulate_scenario(
+                        scenario, assign_scenario(scenario), enable_delay=True
+                    )
+            else:
+                stats = simulate_stream(data, enable_delay=True)
+            stage.items = sum(s["packages_delivered"] for s in stats.values())
+
+        with instrumentation.stage("report", items=len(stats)):
+            write_report(args, stats)
+
+        write_trace(instrumentation)
+        print("✅ FastBox Simulation Completed Successfully")
+        return
+
+    # --------------------------------
+    # What-if agent placement (optional): the best spots join the roster
+    if args.place_agents:
+        with instrumentation.stage("placement", items=args.place_agents):
+            placement = optimize_placement(data, args.place_agents, args.placement_grid)
+        with open("output/placement.json", "w") as f:
+            json.dump(placement, f, indent=4)
+
+        for placed in placement["placements"]:
+            data["agents"].append({"id": placed["id"], "location": placed["location"]})
+            print(f"Placed {placed['id']} at {placed['location']}: "
+                  f"projected saving {placed['projected_saving']}")
+
+    # --------------------------------
+    # Road distances (optional): shortest-path tables built once per warehouse
+    options = {}
+    sim_options = {}
+    if args.road_network:
+        with instrumentation.stage("road_network", items=len(data["warehouses"])):
+            distance = RoadDistance(RoadNetwork.load(args.road_network))
+            distance.precompute([wh["location"] for wh in data["warehouses"]])
+        options["distance"] = sim_options["distance"] = distance
+
+    # --------------------------------
+    # Multi-day mode: chain the days, carrying positions and backlog forward
+    if args.days:
+        with instrumentation.stage("multi_day", items=len(args.days) + 1):
+            result = simulate_days(
+                data, [args.input] + args.days,
+                capacity=args.day_capacity,
+                enable_delay=True,
+                seed=args.seed,
+                **sim_options
+            )
+        with instrumentation.stage("report", items=len(result["days"])):
+            generate_multi_day_report(
+                result,
+                json_path="output/multi_day_report.json",
+                csv_path="output/multi_day.csv"
+            )
+
+        write_trace(instrumentation)
+        print(f"Backlog after {len(result['days'])} days: "
+              f"{result['backlog']['packages']} packages")
+        print("✅ FastBox Simulation Completed Successfully")
+        return
+
+    # --------------------------------
+    # Seeded delays make the run reproducible (and cacheable)
+    if args.seed is not None:
+        random.seed(args.seed)
+        if args.sim_engine == "columnar":
+            sim_options["seed"] = args.seed
+
+    # --------------------------------
+    # Result cache (optional): identical scenario + parameters skip assign / simulate
+    cache = key = cached = None
+    if args.cache:
+        if args.optimize_routes:
+            print("Cache skipped: --optimize-routes results depend on the time budget")
+        elif args.seed is None:
+            print("Cache skipped: delays are random without --seed")
+        else:
+            with instrumentation.stage("cache", items=len(data["packages"])):
+                cache = ResultCache(args.cache, args.cache_size * 2**20)
+                key = cache_key(
+                    data,
+                    engine=args.engine,
+                    capacity=args.capacity,
+                    dispatch_order=args.dispatch_order if args.engine == "sequential" else None,
+                    sim_engine=args.sim_engine,
+                    enable_delay=True,
+                    seed=args.seed,
+                    trip_capacity=args.trip_capacity if args.trips else None,
+                    repair_rounds=args.repair_rounds if args.deadlines else None,
+                    road_network=args.road_network and file_digest(args.road_network)
+                )
+                cached = cache.get(key)
+
     # --------------------------------
     # Assign packages to agents
-    assignments = assign_packages_to_agents(data)
+    if args.engine == "capacity" and args.capacity is not None:
+        options["capacity"] = args.capacity
+    if args.engine == "sequential":
+        options["order"] = args.dispatch_order
+    assign_packages = get_assignment_engine(args.engine, **options)
+    with instrumentation.stage("assign", items=len(data["packages"])):
+        if cached is not None:
+            assignments = decode_assignments(
+                cached["assignments"], data["packages"], data["agents"]
+            )
+        else:
+            assignments = assign_packages(data)
+
+    # --------------------------------
+    # Deadlines: earliest deadline first per agent, then late packages are
+    # re-homed. Scheduling comes before the debug print, so a run and its
+    # cache hit both print the final delivery schedules.
+    lateness = None
+    if args.deadlines:
+        if cached is not None:
+            stats = decode_agents(cached["stats"], data["agents"])
+            lateness = cached["lateness"]
+        else:
+            with instrumentation.stage("simulate", items=len(data["packages"])):
+                assignments, stats, lateness = schedule_deliveries(
+                    assignments, data,
+                    rounds=args.repair_rounds,
+                    enable_delay=True,
+                    **sim_options
+                )
+            if cache is not None:
+                cache.put(key, {
+                    "assignments": encode_assignments(
+                        assignments, data["packages"], data["agents"]
+                    ),
+                    "stats": encode_agents(stats, data["agents"]),
+                    "lateness": lateness,
+                })
+        with open("output/lateness.json", "w") as f:
+            json.dump(lateness, f, indent=4)
+        print(f"Late: {lateness['late']} of {lateness['packages_with_deadline']} "
+              f"(p95 lateness {lateness['p95_lateness']}, "
+              f"{lateness['moved_by_repair']} moved by repair)")
 
     # DEBUG assignment (KEEP THIS HERE)
     print("DEBUG assignments:")
     for agent, pkgs in assignments.items():
         print(agent, [p["id"] for p in pkgs])
 
+    # --------------------------------
+    # Optimize each agent's delivery order (optional)
+    savings = None
+    if args.optimize_routes:
+        with instrumentation.stage("optimize_routes", items=len(data["packages"])):
+            assignments, savings = optimize_routes(
+                assignments, data,
+                time_budget=args.route_budget,
+                workers=args.route_workers
+            )
+
     # --------------------------------
     # Simulate deliveries
-    stats = simulate_deliveries(assignments, data, enable_delay=True)
+    simulate_deliveries = get_simulation_engine(args.sim_engine)
+    if cached is not None:
+        stats = decode_agents(cached["stats"], data["agents"])
+        print("Cache hit: assignment and simulation reused")
+    elif args.deadlines:
+        # Stats come from schedule_deliveries above
+        pass
+    elif args.trips:
+        # Trips per warehouse pickup; stats gain trips / distance_saved
+        with instrumentation.stage("simulate", items=len(data["packages"])):
+            stats = simulate_trips(
+                assignments, data,
+                capacity=args.trip_capacity,
+                enable_delay=True,
+                **sim_options
+            )
+        if cache is not None:
+            cache.put(key, {
+                "assignments": encode_assignments(
+                    assignments, data["packages"], data["agents"]
+                ),
+                "stats": encode_agents(stats, data["agents"]),
+            })
+    elif args.stream_report and args.sim_engine == "loop" and savings is None and cache is None:
+        # Agents go to the report as soon as they are simulated
+        # (their simulation time is traced as part of the report stage)
+        stats = iter_agent_stats(assignments, data, enable_delay=True, **sim_options)
+    else:
+        with instrumentation.stage("simulate", items=len(data["packages"])):
+            stats = simulate_deliveries(assignments, data, enable_delay=True, **sim_options)
+        if cache is not None:
+            cache.put(key, {
+                "assignments": encode_assignments(
+                    assignments, data["packages"], data["agents"]
+                ),
+                "stats": encode_agents(stats, data["agents"]),
+            })
+
+    if savings is not None:
+        for agent, saved in savings.items():
+            stats[agent]["distance_saved"] = round(saved, 2)
+
+    # Sequential dispatch vs the static nearest-agent baseline (no delays)
+    if args.engine == "sequential":
+        with instrumentation.stage("compare_dispatch", items=len(data["packages"])):
+            comparison = compare_dispatch(assignments, data, options.get("distance"))
+        with open("output/dispatch_comparison.json", "w") as f:
+            json.dump(comparison, f, indent=4)
+        print(f"Sequential dispatch: {comparison['sequential_distance']} vs static "
+              f"{comparison['static_distance']} (saved {comparison['distance_saved']})")
 
     # DEBUG simulation output
     # for agent, info in stats.items():
@@ -42,11 +600,27 @@ def main():
 
     # --------------------------------
     # Generate report
-    generate_report(
-        stats,
-        json_path="output/report.json",
-        csv_path="output/top_agent.csv"
-    )
+    with instrumentation.stage("report", items=len(assignments)):
+        write_report(args, stats)
+
+    # --------------------------------
+    # Monte Carlo replications of the random delay (optional)
+    if args.replications:
+        with instrumentation.stage("monte_carlo", items=args.replications):
+            summary = simulate_monte_carlo(
+                assignments, data, replications=args.replications, seed=args.seed,
+                distance=options.get("distance")
+            )
+            generate_monte_carlo_report(
+                summary,
+                json_path="output/monte_carlo.json",
+                csv_path="output/monte_carlo.csv"
+            )
+
+    instrumentation.count("packages", len(data["packages"]))
+    instrumentation.count("agents", len(data["agents"]))
+    instrumentation.count("warehouses", len(data["warehouses"]))
+    write_trace(instrumentation)
 
     print("✅ FastBox Simulation Completed Successfully")
 
@@ -1,41 +1,76 @@
-from src.distance import euclidean_distance
+from array import array
+from src.distance import coordinate_system
+from src.spatial_index import LinearIndex, build_index
 
-# Assign packages to agents based on nearest warehouse
-def assign_packages_to_agents(data):
+# Yield (agent_id, package) for every package, in input order.
+# Works on any iterable of packages, including a streamed PackageStream.
+# `index` picks the nearest-neighbour index ("kdtree", "grid" or "linear").
+# A custom `distance` (e.g. RoadDistance) replaces the straight-line metric;
+# agents are then compared by a linear scan with that distance.
+def iter_assignments(data, index="kdtree", distance=None):
     warehouses = data["warehouses"]
     agents = data["agents"]
-    packages = data["packages"]
 
     # Create a map of warehouse IDs to their locations
     warehouse_map = {
         wh["id"]: wh["location"] for wh in warehouses
     }
 
+    # Build the agent index once; ties resolve to the earliest agent,
+    # exactly like the original strict `<` scan
+    agent_ids = [agent["id"] for agent in agents]
+    agent_points = [agent["location"] for agent in agents]
+    if distance is None:
+        agent_index = build_index(agent_points, index, coordinate_system(data))
+    else:
+        agent_index = LinearIndex(agent_points, distance)
+
+    # The nearest agent only depends on the warehouse, so look it up once per warehouse
+    nearest_by_warehouse = {}
+
+    for package in data["packages"]:
+        warehouse_id = package["warehouse_id"]
+        nearest_agent = nearest_by_warehouse.get(warehouse_id)
+
+        if nearest_agent is None:
+            nearest_agent = agent_ids[
+                agent_index.nearest(warehouse_map[warehouse_id])
+            ]
+            nearest_by_warehouse[warehouse_id] = nearest_agent
+
+        yield nearest_agent, package
+
+
+# Assign packages to agents based on nearest warehouse
+def assign_packages_to_agents(data, index="kdtree", distance=None):
     # Initialize assignments dictionary
     assignments = {
-        agent["id"]: [] for agent in agents
+        agent["id"]: [] for agent in data["agents"]
     }
 
     # Assign each package to the nearest agent based on warehouse location
-    for package in packages:
-        warehouse_location = warehouse_map[package["warehouse_id"]]
+    for agent_id, package in iter_assignments(data, index, distance):
+        assignments[agent_id].append(package)
+
+    # Return the assignments
+    return assignments
 
-        nearest_agent = None
-        min_distance = float("inf")
 
-        # Find the nearest agent to the warehouse
-        for agent in agents:
-            distance = euclidean_distance(
-                agent["location"],
-                warehouse_location
-            )
+# Assign a compact Scenario; returns the agent code of every package (array of ints)
+def assign_scenario(scenario, index="kdtree"):
+    agent_xy = scenario.agent_xy
+    warehouse_xy = scenario.warehouse_xy
 
-            # Update nearest agent if this one is closer
-            if distance < min_distance:
-                min_distance = distance
-                nearest_agent = agent["id"]
+    agent_index = build_index(
+        [(agent_xy[2 * i], agent_xy[2 * i + 1]) for i in range(len(scenario.agent_ids))],
+        index,
+        coordinate_system(scenario)
+    )
 
-        assignments[nearest_agent].append(package)
+    # Nearest agent per warehouse code, then one lookup per package
+    nearest = [
+        agent_index.nearest((warehouse_xy[2 * i], warehouse_xy[2 * i + 1]))
+        for i in range(len(scenario.warehouse_ids))
+    ]
 
-    # Return the assignments
-    return assignments
+    return array("i", [nearest[code] for code in scenario.package_warehouse])
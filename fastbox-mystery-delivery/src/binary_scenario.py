@@ -0,0 +1,300 @@
+import os
+import sys
+import ast
+import json
+import mmap
+import bisect
+import argparse
+from array import array
+from src.data_loader import NDJSON_EXTENSIONS, normalize_package, stream_data
+from src.scenario import _PACKAGE_KEYS, Scenario
+
+FORMAT_VERSION = 2
+
+# Suffix of binary scenario directories
+BINARY_SUFFIX = ".fbx"
+
+# Fixed .npy header size; the shape is only known once all packages are written
+_NPY_HEADER_SIZE = 128
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+# Packages buffered before each write while converting
+_WRITE_BATCH = 1 << 16
+
+# Package ID types that round-trip through the ID table
+_ID_TYPES = {"str": str, "int": int}
+
+_PACKAGE_FILES = {
+    "package_warehouse": ("package_warehouse.npy", "i", "<i4"),
+    "package_xy": ("package_xy.npy", "d", "<f8"),
+    "package_id_offsets": ("package_id_offsets.npy", "q", "<i8"),
+    "package_extras_index": ("package_extras_index.npy", "q", "<i8"),
+    "package_extras_offsets": ("package_extras_offsets.npy", "q", "<i8"),
+}
+
+
+def _npy_header(descr, shape):
+    header = repr({"descr": descr, "fortran_order": False, "shape": shape})
+    header = header.ljust(_NPY_HEADER_SIZE - len(_NPY_MAGIC) - 2 - 1) + "\n"
+    return _NPY_MAGIC + len(header).to_bytes(2, "little") + header.encode("latin1")
+
+
+# Append-only .npy writer (header rewritten with the final shape on close)
+class _NpyWriter:
+    def __init__(self, path, typecode, descr, width=1):
+        self.file = open(path, "wb")
+        self.file.write(bytes(_NPY_HEADER_SIZE))
+        self.buffer = array(typecode)
+        self.descr = descr
+        self.width = width
+        self.count = 0
+
+    def extend(self, values):
+        self.buffer.extend(values)
+        if len(self.buffer) >= _WRITE_BATCH:
+            self.flush()
+
+    def flush(self):
+        self.count += len(self.buffer)
+        self.buffer.tofile(self.file)
+        del self.buffer[:]
+
+    def close(self):
+        self.flush()
+        rows = self.count // self.width
+        shape = (rows, self.width) if self.width > 1 else (rows,)
+        self.file.seek(0)
+        self.file.write(_npy_header(self.descr, shape))
+        self.file.close()
+
+
+# Read-only view over an .npy file mapped into memory (no copy; pages are shared
+# between processes mapping the same file). Indexing yields plain Python numbers.
+def _map_npy(path, typecode):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == _NPY_HEADER_SIZE:
+            return memoryview(array(typecode))
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mapped[:len(_NPY_MAGIC)] != _NPY_MAGIC:
+        raise ValueError(f"{path} is not a FastBox .npy file")
+    header_len = int.from_bytes(mapped[8:10], "little")
+    header = ast.literal_eval(mapped[10:10 + header_len].decode("latin1"))
+    if not header["descr"].startswith("<"):
+        raise ValueError(f"{path}: unsupported dtype {header['descr']}")
+
+    return memoryview(mapped)[10 + header_len:].cast(typecode)
+
+
+# Package IDs stored as one UTF-8 blob plus offsets; decoded on access.
+# Behaves like the read-only list of IDs a Scenario normally holds.
+class PackageIdTable:
+    __slots__ = ("_blob", "_offsets", "_decode")
+
+    def __init__(self, blob, offsets, id_type):
+        self._blob = blob
+        self._offsets = offsets
+        self._decode = _ID_TYPES[id_type]
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        raw = self._blob[self._offsets[i]:self._offsets[i + 1]]
+        return self._decode(str(raw, "utf-8"))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+# Extra package fields stored as one blob of JSON objects plus offsets, for the
+# (sorted) package indices that have any; decoded on access. Behaves like the
+# {index: extras} dict a Scenario normally holds.
+class PackageExtrasTable:
+    __slots__ = ("_blob", "_index", "_offsets")
+
+    def __init__(self, blob, index, offsets):
+        self._blob = blob
+        self._index = index
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._index)
+
+    def _find(self, i):
+        j = bisect.bisect_left(self._index, i)
+        return j if j < len(self._index) and self._index[j] == i else None
+
+    def __contains__(self, i):
+        return self._find(i) is not None
+
+    def _decode(self, j):
+        return json.loads(str(self._blob[self._offsets[j]:self._offsets[j + 1]], "utf-8"))
+
+    def get(self, i, default=None):
+        j = self._find(i)
+        return default if j is None else self._decode(j)
+
+    def __getitem__(self, i):
+        extra = self.get(i)
+        if extra is None:
+            raise KeyError(i)
+        return extra
+
+    def items(self):
+        for j, i in enumerate(self._index):
+            yield i, self._decode(j)
+
+
+# Read-only mapping of a whole file (empty files give an empty buffer)
+def _map_file(path):
+    with open(path, "rb") as f:
+        blob = (
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if os.fstat(f.fileno()).st_size else b""
+        )
+    return memoryview(blob)
+
+
+# Path of the binary scenario for a JSON / NDJSON input (day.json -> day.fbx)
+def binary_path_for(path):
+    stem = path
+    for extension in (".json",) + NDJSON_EXTENSIONS:
+        if stem.endswith(extension):
+            stem = stem[:-len(extension)]
+            break
+    return stem + BINARY_SUFFIX
+
+
+def is_binary_scenario(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "meta.json"))
+
+
+# Convert a scenario (dict schema, streamed dict or JSON / NDJSON path) to the
+# binary layout: a directory holding .npy coordinate / code arrays, the package
+# ID and extra-field tables and a small meta.json with everything else. Packages are written as
+# they are read, so a streamed input never has to fit in memory.
+def save_binary(data, path):
+    if isinstance(data, str):
+        data = stream_data(data)
+    if sys.byteorder != "little":
+        raise ValueError("Binary scenarios are little-endian only")
+    os.makedirs(path, exist_ok=True)
+
+    # Warehouses and agents are small: reuse the compact model for them
+    header = Scenario.from_dict({
+        key: value for key, value in data.items() if key != "packages"
+    } | {"packages": []})
+    header_dict = header.to_dict()
+    warehouse_code = header.warehouse_code
+
+    writers = {
+        name: _NpyWriter(
+            os.path.join(path, file), typecode, descr,
+            2 if name == "package_xy" else 1
+        )
+        for name, (file, typecode, descr) in _PACKAGE_FILES.items()
+    }
+    codes = writers["package_warehouse"]
+    xy = writers["package_xy"]
+    offsets = writers["package_id_offsets"]
+    offsets.extend((0,))
+    extras_index = writers["package_extras_index"]
+    extras_offsets = writers["package_extras_offsets"]
+    extras_offsets.extend((0,))
+
+    offset = 0
+    extras_offset = 0
+    id_type = None
+    with open(os.path.join(path, "package_ids.bin"), "wb") as ids, \
+            open(os.path.join(path, "package_extras.bin"), "wb") as extras:
+        for i, package in enumerate(data["packages"]):
+            package = normalize_package(package)
+            package_id = package["id"]
+
+            # All package IDs share one type (the first package decides)
+            if id_type is None:
+                id_type = type(package_id).__name__
+                if id_type not in _ID_TYPES:
+                    raise ValueError(f"Unsupported package ID type: {id_type}")
+            elif type(package_id).__name__ != id_type:
+                raise ValueError(f"Package {package_id!r}: mixed package ID types")
+
+            encoded = str(package_id).encode("utf-8")
+            ids.write(encoded)
+            offset += len(encoded)
+            offsets.extend((offset,))
+            codes.extend((warehouse_code[package["warehouse_id"]],))
+            xy.extend(package["destination"])
+
+            extra = {k: v for k, v in package.items() if k not in _PACKAGE_KEYS}
+            if extra:
+                encoded = json.dumps(extra).encode("utf-8")
+                extras.write(encoded)
+                extras_offset += len(encoded)
+                extras_index.extend((i,))
+                extras_offsets.extend((extras_offset,))
+
+    for writer in writers.values():
+        writer.close()
+
+    meta = {
+        "version": FORMAT_VERSION,
+        "packages": codes.count,
+        "package_id_type": id_type or "str",
+        "warehouses": header_dict["warehouses"],
+        "agents": header_dict["agents"],
+        "extras": header.extras,
+    }
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    return path
+
+
+# Open a binary scenario as a Scenario whose package arrays are memory-mapped.
+# Opening costs a few small reads whatever the package count; warehouses and
+# agents are regular (writable) arrays, package data is read-only.
+def load_binary(path):
+    with open(os.path.join(path, "meta.json"), "r") as f:
+        meta = json.load(f)
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary scenario version: {meta.get('version')}")
+
+    scenario = Scenario.from_dict(
+        dict(meta["extras"], warehouses=meta["warehouses"],
+             agents=meta["agents"], packages=[])
+    )
+
+    arrays = {
+        name: _map_npy(os.path.join(path, file), typecode)
+        for name, (file, typecode, _) in _PACKAGE_FILES.items()
+    }
+    scenario.package_warehouse = arrays["package_warehouse"]
+    scenario.package_xy = arrays["package_xy"]
+    scenario.package_extras = PackageExtrasTable(
+        _map_file(os.path.join(path, "package_extras.bin")),
+        arrays["package_extras_index"], arrays["package_extras_offsets"]
+    )
+    scenario.package_ids = PackageIdTable(
+        _map_file(os.path.join(path, "package_ids.bin")),
+        arrays["package_id_offsets"], meta["package_id_type"]
+    )
+    return scenario
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a scenario to the binary format")
+    parser.add_argument("input", help="JSON or NDJSON scenario")
+    parser.add_argument("output", nargs="?", help=f"output directory (default: <input>{BINARY_SUFFIX})")
+    args = parser.parse_args()
+
+    output = args.output or binary_path_for(args.input)
+    save_binary(args.input, output)
+    print(f"✅ Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
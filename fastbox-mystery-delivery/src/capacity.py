@@ -0,0 +1,304 @@
+import heapq
+import math
+from src.distance import coordinate_system, scenario_distance
+from src.spatial_index import build_index
+
+# Nearest agents linked to each warehouse in the flow graph (doubled while
+# packages cannot be placed or further agents are cheaper)
+INITIAL_CANDIDATES = 16
+
+# Nearest warehouses linked to each agent (doubled for agents left with room
+# while packages cannot be placed)
+AGENT_CANDIDATES = 4
+
+
+# Min-cost flow on a small residual graph (successive shortest paths with
+# potentials and capacity scaling). Each node holds an excess (supply > 0,
+# demand < 0) that is routed along shortest paths, so arcs can be added to a
+# solved graph without starting over.
+class _FlowGraph:
+    def __init__(self, n):
+        self.adj = [[] for _ in range(n)]
+        self.to = []
+        self.cap = []
+        self.cost = []
+        self.potential = [0.0] * n
+        self.excess = [0] * n
+
+    def add_edge(self, u, v, cap, cost):
+        self.adj[u].append(len(self.to))
+        self.to.append(v)
+        self.cap.append(cap)
+        self.cost.append(cost)
+
+        self.adj[v].append(len(self.to))
+        self.to.append(u)
+        self.cap.append(0)
+        self.cost.append(-cost)
+        return len(self.to) - 2
+
+    # Route supply to demand at minimum cost in chunks of at least `delta`,
+    # over arcs with at least `delta` to spare. Returns the nodes reachable
+    # from supply that found no demand (empty once everything is routed).
+    def route(self, delta=1):
+        to, cap, cost, adj = self.to, self.cap, self.cost, self.adj
+        potential, excess = self.potential, self.excess
+
+        # Arcs the potentials do not price correctly (new arcs, or arcs too
+        # small for the last phase) are saturated; the excess moves with them
+        for e, residual in enumerate(cap):
+            if residual >= delta and cost[e] + potential[to[e ^ 1]] - potential[to[e]] < 0:
+                cap[e] = 0
+                cap[e ^ 1] += residual
+                excess[to[e ^ 1]] -= residual
+                excess[to[e]] += residual
+        active = {v for v, amount in enumerate(excess) if amount >= delta}
+        stranded = set()
+
+        while active:
+            # Dijkstra on reduced costs from one supply node. Demand nodes are
+            # reached through their arcs (heap entries ~arc), so one search can
+            # feed several of them. Only visited nodes are tracked.
+            source = next(iter(active))
+            dist = {source: 0.0}
+            parent = {}
+            settled = []
+            heap = [(0.0, source)]
+            limit = None
+
+            while heap:
+                d, u = heapq.heappop(heap)
+                if u < 0:
+                    e = ~u
+                    target = to[e]
+                    push = min(excess[source], -excess[target], cap[e])
+                    v = to[e ^ 1]
+                    while v in parent:
+                        push = min(push, cap[parent[v]])
+                        v = to[parent[v] ^ 1]
+                    # An earlier push in this search already used the path up
+                    if push < delta:
+                        break
+
+                    cap[e] -= push
+                    cap[e ^ 1] += push
+                    v = to[e ^ 1]
+                    while v in parent:
+                        cap[parent[v]] -= push
+                        cap[parent[v] ^ 1] += push
+                        v = to[parent[v] ^ 1]
+                    excess[source] -= push
+                    excess[target] += push
+                    limit = d
+
+                    # Longer paths stay shortest only while every arc used so
+                    # far into a demand is full
+                    if cap[e] >= delta or excess[source] < delta:
+                        break
+                    continue
+
+                if d > dist[u]:
+                    continue
+                settled.append(u)
+
+                pu = potential[u] + d
+                for e in adj[u]:
+                    if cap[e] < delta:
+                        continue
+                    v = to[e]
+                    nd = pu + cost[e] - potential[v]
+                    if nd < d:
+                        nd = d
+                    if excess[v] <= -delta:
+                        heapq.heappush(heap, (nd, ~e))
+                    elif nd < dist.get(v, math.inf):
+                        dist[v] = nd
+                        parent[v] = e
+                        heapq.heappush(heap, (nd, v))
+
+            # A failed search saw everything its supply can reach, including
+            # every other supply node stuck with it
+            if limit is None:
+                active.difference_update(settled)
+                stranded.update(settled)
+                continue
+            if excess[source] < delta:
+                active.discard(source)
+
+            # Shift nodes settled below the last path so reduced costs stay
+            # non-negative (the others implicitly move by the same distance)
+            for v in settled:
+                if dist[v] < limit:
+                    potential[v] += dist[v] - limit
+
+        return stranded
+
+
+# Capacity of every agent: agent "capacity" field, else `capacity`,
+# else an even split of the packages (ceil(packages / agents))
+def agent_capacities(agents, n_packages, capacity=None):
+    if capacity is None:
+        capacity = math.ceil(n_packages / len(agents)) if agents else 0
+
+    capacities = []
+    for agent in agents:
+        if isinstance(capacity, dict):
+            value = capacity.get(agent["id"], 0)
+        else:
+            value = capacity
+        capacities.append(int(agent.get("capacity", value)))
+    return capacities
+
+
+# Assign packages so no agent exceeds its capacity and the total
+# agent -> warehouse distance is minimal (min-cost flow).
+#
+# Packages of one warehouse are interchangeable, so the flow runs on a
+# warehouse x agent transportation graph. Each warehouse is linked to its
+# `candidates` nearest agents (None = every agent, exactly optimal) and each
+# agent to its nearest warehouses. While packages cannot be placed both lists
+# grow; once they fit, warehouses look further out for arcs that lower the
+# cost. New arcs join the solved graph instead of starting over.
+def assign_packages_with_capacity(data, capacity=None, candidates=INITIAL_CANDIDATES):
+    warehouses = data["warehouses"]
+    agents = data["agents"]
+    packages = data["packages"]
+
+    warehouse_map = {
+        wh["id"]: wh["location"] for wh in warehouses
+    }
+    agent_ids = [agent["id"] for agent in agents]
+    capacities = agent_capacities(agents, len(packages), capacity)
+
+    if sum(capacities) < len(packages):
+        raise ValueError(
+            f"Total agent capacity {sum(capacities)} is less than "
+            f"{len(packages)} packages"
+        )
+
+    # Nothing to route; also keeps an empty roster clear of the flow set-up
+    if not packages:
+        return {agent_id: [] for agent_id in agent_ids}
+
+    # Packages grouped by warehouse, in input order
+    by_warehouse = {}
+    for package in packages:
+        by_warehouse.setdefault(package["warehouse_id"], []).append(package)
+    warehouse_ids = list(by_warehouse)
+    locations = [warehouse_map[wid] for wid in warehouse_ids]
+    supply = [len(by_warehouse[wid]) for wid in warehouse_ids]
+
+    distance = scenario_distance(data)
+    system = coordinate_system(data)
+    agent_index = build_index([agent["location"] for agent in agents], "kdtree", system)
+
+    # Nodes: 0..W-1 warehouses, W..W+A-1 agents, W+A sink
+    n_wh = len(warehouse_ids)
+    sink = n_wh + len(agents)
+    graph = _FlowGraph(sink + 1)
+    graph.excess[:n_wh] = supply
+    graph.excess[sink] = -len(packages)
+    sink_arcs = [
+        graph.add_edge(n_wh + a, sink, agent_capacity, 0.0)
+        for a, agent_capacity in enumerate(capacities)
+    ]
+
+    # Every warehouse needs enough candidates to hold twice its packages...
+    mean_capacity = max(sum(capacities) / len(agents), 1)
+    k = [
+        len(agents) if candidates is None else min(
+            max(candidates, math.ceil(2 * n / mean_capacity)), len(agents)
+        )
+        for n in supply
+    ]
+    pairs = [
+        (w, a)
+        for w, location in enumerate(locations)
+        for a in agent_index.nearest_k(location, k[w])
+    ]
+
+    # ...and every agent a few warehouses, so outlying agents stay reachable
+    m = [min(AGENT_CANDIDATES, n_wh)] * len(agents)
+    warehouse_index = build_index(locations, "kdtree", system)
+    if candidates is not None:
+        pairs += [
+            (w, a)
+            for a, agent in enumerate(agents)
+            for w in warehouse_index.nearest_k(agent["location"], m[a])
+        ]
+
+    edges = []
+    linked = set()
+    while True:
+        for w, a in pairs:
+            if (w, a) in linked:
+                continue
+            linked.add((w, a))
+            cost = distance(agents[a]["location"], locations[w])
+            e = graph.add_edge(w, n_wh + a, min(supply[w], capacities[a]), cost)
+            edges.append((w, a, cost, e))
+
+        # Halve the chunk size down to single packages
+        delta = 1 << (max(max(capacities), 1).bit_length() - 1)
+        while delta > 1:
+            graph.route(delta)
+            delta //= 2
+        stranded = graph.route()
+
+        pairs = []
+        if stranded:
+            # Warehouses cut off from free room get twice the agents, and
+            # agents with room left twice the warehouses
+            for w in sorted(stranded):
+                if w < n_wh and k[w] < len(agents):
+                    k[w] = min(k[w] * 2, len(agents))
+                    pairs += [(w, a) for a in agent_index.nearest_k(locations[w], k[w])]
+            for a, e in enumerate(sink_arcs):
+                if graph.cap[e] and m[a] < n_wh:
+                    m[a] = min(m[a] * 2, n_wh)
+                    pairs += [
+                        (w, a)
+                        for w in warehouse_index.nearest_k(agents[a]["location"], m[a])
+                    ]
+        else:
+            # Everything placed: look twice as far from every warehouse and
+            # keep the agents whose arcs would lower the total distance
+            potential = graph.potential
+            for w, location in enumerate(locations):
+                if k[w] == len(agents):
+                    continue
+                better = [
+                    (w, a)
+                    for a in agent_index.nearest_k(location, min(k[w] * 2, len(agents)))
+                    if (w, a) not in linked
+                    and distance(agents[a]["location"], location)
+                    + potential[w] - potential[n_wh + a] < -1e-9
+                ]
+                if better:
+                    k[w] = min(k[w] * 2, len(agents))
+                    pairs += better
+        if not pairs:
+            break
+
+    # Split each warehouse's packages over its agents, nearest agent first
+    shares = {}
+    for w, a, cost, e in edges:
+        sent = graph.cap[e ^ 1]
+        if sent:
+            shares.setdefault(w, []).append((cost, a, sent))
+
+    owner = {}
+    for w, split in shares.items():
+        queue = by_warehouse[warehouse_ids[w]]
+        start = 0
+        for _, a, sent in sorted(split):
+            for package in queue[start:start + sent]:
+                owner[id(package)] = a
+            start += sent
+
+    # Same output shape as assign_packages_to_agents (input order per agent)
+    assignments = {agent_id: [] for agent_id in agent_ids}
+    for package in packages:
+        assignments[agent_ids[owner[id(package)]]].append(package)
+
+    return assignments
@@ -1,6 +1,199 @@
+import re
 import json
 
+# Characters read from disk at a time by the streaming loader
+CHUNK_SIZE = 1 << 20
+
+# File extensions treated as newline-delimited JSON
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+_NON_SPACE = re.compile(r"\S")
+
+
 # Load data from a JSON file
 def load_data(path):
     with open(path, 'r') as f:
-        return json.load(f)
\ No newline at end of file
+        return json.load(f)
+
+
+# Normalize warehouses / agents given as {id: location} into [{"id", "location"}]
+def normalize_locations(items):
+    if isinstance(items, dict):
+        return [{"id": k, "location": v} for k, v in items.items()]
+    return items
+
+
+# Normalize one package (legacy "warehouse" key -> "warehouse_id")
+def normalize_package(package):
+    if "warehouse" in package:
+        package["warehouse_id"] = package.pop("warehouse")
+    return package
+
+
+# Incremental reader for a single top-level JSON object.
+# Values are decoded one at a time, so only the current value is held in memory.
+class _JSONObjectReader:
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        # Drop consumed text before reading more
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+
+        chunk = self.f.read(max(CHUNK_SIZE, len(self.buf)))
+        if not chunk:
+            self.eof = True
+        self.buf += chunk
+
+    def _peek(self):
+        while True:
+            match = _NON_SPACE.search(self.buf, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buf[self.pos]
+            if self.eof:
+                raise ValueError("Unexpected end of JSON input")
+            self.pos = len(self.buf)
+            self._fill()
+
+    def expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos}")
+        self.pos += 1
+
+    def accept(self, char):
+        if self._peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+
+            # A number may continue past the end of the buffer
+            if end == len(self.buf) and not self.eof:
+                self._fill()
+                continue
+
+            self.pos = end
+            return value
+
+    # Yield each member key; the caller must consume the value before continuing
+    def members(self):
+        self.expect("{")
+        if self.accept("}"):
+            return
+
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+
+            if self.accept("}"):
+                return
+            self.expect(",")
+
+    # Yield array elements one at a time
+    def elements(self):
+        self.expect("[")
+        if self.accept("]"):
+            return
+
+        while True:
+            yield self.value()
+
+            if self.accept("]"):
+                return
+            self.expect(",")
+
+
+# Read everything except packages from a JSON scenario.
+# Stops at "packages" once warehouses and agents are known.
+def _read_json_header(path):
+    header = {}
+
+    with open(path, "r") as f:
+        reader = _JSONObjectReader(f)
+
+        for key in reader.members():
+            if key == "packages":
+                if "warehouses" in header and "agents" in header:
+                    break
+                for _ in reader.elements():
+                    pass
+            else:
+                header[key] = reader.value()
+
+    return header
+
+
+def _iter_json_packages(path):
+    with open(path, "r") as f:
+        reader = _JSONObjectReader(f)
+
+        for key in reader.members():
+            if key == "packages":
+                yield from reader.elements()
+                return
+            reader.value()
+
+
+# NDJSON layout: first line holds warehouses/agents, every other line is one package
+def _read_ndjson_header(path):
+    with open(path, "r") as f:
+        header = json.loads(f.readline())
+    header.pop("packages", None)
+    return header
+
+
+def _iter_ndjson_packages(path):
+    with open(path, "r") as f:
+        header = json.loads(f.readline())
+        yield from header.get("packages", ())
+
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# Re-iterable stream of normalized packages; each iteration re-reads the file
+class PackageStream:
+    def __init__(self, path):
+        self.path = path
+        self.ndjson = path.endswith(NDJSON_EXTENSIONS)
+
+    def __iter__(self):
+        packages = (
+            _iter_ndjson_packages(self.path) if self.ndjson
+            else _iter_json_packages(self.path)
+        )
+        for package in packages:
+            yield normalize_package(package)
+
+
+# Load a scenario with warehouses/agents read eagerly and packages streamed.
+# Accepts a JSON object or NDJSON (.ndjson / .jsonl) and normalizes both schemas.
+def stream_data(path):
+    if path.endswith(NDJSON_EXTENSIONS):
+        data = _read_ndjson_header(path)
+    else:
+        data = _read_json_header(path)
+
+    data["warehouses"] = normalize_locations(data.get("warehouses", []))
+    data["agents"] = normalize_locations(data.get("agents", []))
+    data["packages"] = PackageStream(path)
+    return data
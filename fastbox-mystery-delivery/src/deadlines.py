@@ -0,0 +1,293 @@
+import math
+import heapq
+import random
+from bisect import bisect_right
+from src.distance import coordinate_system, scenario_distance
+from src.events import DEFAULT_SPEED, agent_speeds
+from src.spatial_index import build_index
+from src.vectorized import DELAY_PROBABILITY, DELAY_RANGE
+
+# Nearest agents (by start location) offered each late package during repair
+REPAIR_CANDIDATES = 5
+
+# Repair passes over the late packages by default
+REPAIR_ROUNDS = 3
+
+
+# Delivery window of a package as (earliest, latest) on the simulation clock.
+# `window` is [earliest, latest] and `deadline` a latest time; with both, the
+# earlier latest time wins. Packages with neither are never late.
+def package_window(package):
+    window = package.get("window")
+    earliest, latest = (window[0], window[1]) if window else (-math.inf, math.inf)
+    if package.get("deadline") is not None:
+        latest = min(latest, package["deadline"])
+    return earliest, latest
+
+
+# Lateness summary over the packages that have a deadline: how many are late
+# and mean / p95 / max lateness (on-time packages count as 0)
+def lateness_summary(lateness):
+    lateness = sorted(lateness)
+    late = sum(1 for value in lateness if value > 0)
+    return {
+        "packages_with_deadline": len(lateness),
+        "late": late,
+        "on_time_share": round(1 - late / len(lateness), 4) if lateness else 1.0,
+        "mean_lateness": round(sum(lateness) / len(lateness), 2) if lateness else 0,
+        "p95_lateness": round(lateness[min(len(lateness) - 1, int(0.95 * len(lateness)))], 2)
+        if lateness else 0,
+        "max_lateness": round(lateness[-1], 2) if lateness else 0,
+    }
+
+
+# Earliest-deadline-first delivery schedules with a repair step.
+#
+# Each agent delivers its packages by ascending latest time (then earliest
+# time, then input order); packages without a deadline go last in input
+# order. Agents travel at their speed (see src/events.py) from `start_time`,
+# and wait when they reach a destination before its window opens. Scheduling
+# an agent is a sort plus one pass, O(n log n).
+#
+# repair() offers every late package to the agents nearest its warehouse
+# among those with no late packages. A package is inserted at its EDF position there only if it
+# arrives on time and the slack of the packages after it absorbs the extra
+# travel (checked in O(log n) against the agent's last schedule). Each
+# receiving agent's batch is then re-scheduled exactly and halved until it has
+# no late package, so a round never makes anything later: giving a package
+# away only shortens the donor's route.
+#
+#   scheduler = DeadlineScheduler(assignments, data)
+#   scheduler.repair()
+#   stats, lateness = scheduler.report()
+class DeadlineScheduler:
+    def __init__(self, assignments, data, speed=DEFAULT_SPEED, start_time=0.0, distance=None):
+        self.distance = distance or scenario_distance(data)
+        self.coordinates = coordinate_system(data)
+        self.warehouse_map = {
+            wh["id"]: wh["location"] for wh in data["warehouses"]
+        }
+        self.agent_map = {
+            agent["id"]: agent["location"] for agent in data["agents"]
+        }
+        self.speeds = agent_speeds(data["agents"], speed)
+        self.start_time = start_time
+        self.agent_ids = list(assignments)
+
+        # EDF sort key and window per package (by object identity)
+        rank = {id(package): i for i, package in enumerate(data["packages"])}
+        self._keys = {}
+        self._windows = {}
+        for packages in assignments.values():
+            for package in packages:
+                window = package_window(package)
+                self._windows[id(package)] = window
+                self._keys[id(package)] = (
+                    window[1], window[0], rank.get(id(package), len(rank))
+                )
+
+        self.schedules = {}
+        self._state = {}
+        for agent_id in self.agent_ids:
+            self.schedules[agent_id] = sorted(assignments[agent_id], key=self._key)
+            self._evaluate(agent_id)
+
+    def _key(self, package):
+        return self._keys[id(package)]
+
+    # Delivery times of an agent's schedule plus, per position, the smallest
+    # slack (latest - delivery time) from there to the end; late packages have
+    # no slack. With `rng`, random delays are drawn after each dropoff.
+    def _run(self, agent_id, rng=None):
+        speed = self.speeds[agent_id]
+        position = self.agent_map[agent_id]
+        now = self.start_time
+        travelled = 0.0
+        times = []
+
+        for package in self.schedules[agent_id]:
+            warehouse = self.warehouse_map[package["warehouse_id"]]
+            to_warehouse = self.distance(position, warehouse)
+            to_destination = self.distance(warehouse, package["destination"])
+            travelled += to_warehouse
+            travelled += to_destination
+
+            now += (to_warehouse + to_destination) / speed
+            earliest = self._windows[id(package)][0]
+            if now < earliest:
+                now = earliest
+            times.append(now)
+            position = package["destination"]
+
+            # Same 20% chance of 1-5 extra distance as simulate_deliveries
+            if rng is not None and rng.random() < DELAY_PROBABILITY:
+                extra = rng.uniform(*DELAY_RANGE)
+                travelled += extra
+                now += extra / speed
+
+        return times, travelled
+
+    def _evaluate(self, agent_id):
+        schedule = self.schedules[agent_id]
+        times, travelled = self._run(agent_id)
+
+        slack = [math.inf] * (len(schedule) + 1)
+        for i in range(len(schedule) - 1, -1, -1):
+            spare = self._windows[id(schedule[i])][1] - times[i]
+            slack[i] = min(slack[i + 1], spare if spare >= 0 else 0.0)
+
+        self._state[agent_id] = ([self._key(p) for p in schedule], times, slack)
+
+    def late_packages(self, agent_id):
+        _, times, _ = self._state[agent_id]
+        return [
+            package for package, at in zip(self.schedules[agent_id], times)
+            if at > self._windows[id(package)][1]
+        ]
+
+    # Delivery time of `package` if inserted into `agent_id`'s schedule, or
+    # None when it would be late or push a later package past its slack
+    def _insertion(self, agent_id, package):
+        keys, times, slack = self._state[agent_id]
+        schedule = self.schedules[agent_id]
+        speed = self.speeds[agent_id]
+        position = bisect_right(keys, self._key(package))
+
+        if position:
+            before, at = schedule[position - 1]["destination"], times[position - 1]
+        else:
+            before, at = self.agent_map[agent_id], self.start_time
+
+        warehouse = self.warehouse_map[package["warehouse_id"]]
+        earliest, latest = self._windows[id(package)]
+        delivered = max(
+            at + (self.distance(before, warehouse)
+                  + self.distance(warehouse, package["destination"])) / speed,
+            earliest
+        )
+        if delivered > latest:
+            return None
+
+        if position < len(schedule):
+            following = self.warehouse_map[schedule[position]["warehouse_id"]]
+            extra = (
+                delivered + self.distance(package["destination"], following) / speed
+                - at - self.distance(before, following) / speed
+            )
+            if extra > slack[position]:
+                return None
+
+        return delivered
+
+    # Hand late packages to other agents; returns how many were moved
+    def repair(self, rounds=REPAIR_ROUNDS, candidates=REPAIR_CANDIDATES):
+        moved = 0
+
+        for _ in range(rounds):
+            late = {agent_id: self.late_packages(agent_id) for agent_id in self.agent_ids}
+            targets = [agent_id for agent_id in self.agent_ids if not late[agent_id]]
+            if not targets or len(targets) == len(self.agent_ids):
+                break
+
+            # Candidates are the agents without late packages nearest to the
+            # warehouse, looked up once per warehouse
+            target_index = build_index(
+                [self.agent_map[agent_id] for agent_id in targets], "kdtree", self.coordinates
+            )
+            nearest = {}
+
+            # Each late package goes to the candidate that delivers it soonest
+            receipts = {}
+            for donor in self.agent_ids:
+                for package in late[donor]:
+                    wid = package["warehouse_id"]
+                    if wid not in nearest:
+                        nearest[wid] = [
+                            targets[k] for k in target_index.nearest_k(
+                                self.warehouse_map[wid], min(candidates, len(targets))
+                            )
+                        ]
+
+                    best, best_time = None, math.inf
+                    for target in nearest[wid]:
+                        delivered = self._insertion(target, package)
+                        if delivered is not None and delivered < best_time:
+                            best, best_time = target, delivered
+                    if best is not None:
+                        receipts.setdefault(best, []).append((package, donor))
+
+            given = {}
+            for target, batch in receipts.items():
+                for package, donor in self._receive(target, batch):
+                    given.setdefault(donor, set()).add(id(package))
+
+            if not given:
+                break
+            for donor, ids in given.items():
+                self.schedules[donor] = [
+                    p for p in self.schedules[donor] if id(p) not in ids
+                ]
+                self._evaluate(donor)
+                moved += len(ids)
+
+        return moved
+
+    # Merge a batch into the target's schedule, halving it until the target
+    # has no late package; returns the (package, donor) pairs kept
+    def _receive(self, target, batch):
+        original = self.schedules[target]
+        while batch:
+            incoming = sorted((package for package, _ in batch), key=self._key)
+            self.schedules[target] = list(heapq.merge(original, incoming, key=self._key))
+            self._evaluate(target)
+            if not self.late_packages(target):
+                return batch
+            batch = batch[:len(batch) // 2]
+
+        self.schedules[target] = original
+        self._evaluate(target)
+        return []
+
+    # Per-agent stats (simulate_deliveries' fields plus `late` / `max_lateness`)
+    # and the lateness summary. With `enable_delay` random delays are drawn
+    # after dropoffs, so they push later deliveries back too.
+    def report(self, enable_delay=False, rng=random):
+        stats = {}
+        lateness = []
+        for agent_id in self.agent_ids:
+            schedule = self.schedules[agent_id]
+            times, travelled = self._run(agent_id, rng if enable_delay else None)
+
+            late = 0
+            worst = 0.0
+            for package, at in zip(schedule, times):
+                latest = self._windows[id(package)][1]
+                if latest == math.inf:
+                    continue
+                value = max(0.0, at - latest)
+                lateness.append(value)
+                if value > 0:
+                    late += 1
+                    worst = max(worst, value)
+
+            delivered = len(schedule)
+            stats[agent_id] = {
+                "packages_delivered": delivered,
+                "total_distance": round(travelled, 2),
+                "efficiency": round(travelled / delivered, 2) if delivered else 0,
+                "late": late,
+                "max_lateness": round(worst, 2),
+            }
+
+        return stats, lateness_summary(lateness)
+
+
+# Schedule every agent earliest-deadline-first, repair late packages and
+# simulate the result. Returns (schedules, stats, lateness summary).
+def schedule_deliveries(assignments, data, rounds=REPAIR_ROUNDS, candidates=REPAIR_CANDIDATES,
+                        speed=DEFAULT_SPEED, start_time=0.0, enable_delay=False, distance=None):
+    scheduler = DeadlineScheduler(assignments, data, speed, start_time, distance)
+    moved = scheduler.repair(rounds, candidates) if rounds else 0
+    stats, lateness = scheduler.report(enable_delay)
+    lateness["moved_by_repair"] = moved
+    return scheduler.schedules, stats, lateness
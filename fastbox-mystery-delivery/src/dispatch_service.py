@@ -0,0 +1,332 @@
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from collections import deque
+from src.data_loader import load_data, normalize_locations, normalize_package
+from src.incremental import IncrementalAssignment
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Extra wait (seconds) to let a micro-window fill; events already queued are
+# always taken, so under load batches form without any added latency
+DEFAULT_WINDOW = 0.0005
+
+# Events applied per micro-window at most
+DEFAULT_MAX_BATCH = 1024
+
+# Longest accepted line; a check-in can re-route many packages in one reply
+LINE_LIMIT = 1 << 24
+
+# Packages the load generator keeps live before it reports the oldest delivered
+DEFAULT_OUTSTANDING = 5000
+
+
+# Real-time dispatch over a local TCP socket.
+#
+# Protocol: newline-delimited JSON in both directions. Client events:
+#   {"type": "package_created", "id": "P1", "warehouse_id": "W1", "destination": [x, y]}
+#   {"type": "agent_checkin", "id": "A9", "location": [x, y]}
+#   {"type": "agent_checkout", "id": "A9"}
+#   {"type": "package_delivered", "id": "P1"}
+# Any "event_id" field is echoed back. Every event gets exactly one reply:
+#   {"type": "assigned", "package_id": "P1", "agent_id": "A2"}
+#   {"type": "delivered", "package_id": "P1", "agent_id": "A2"}
+#   {"type": "checked_in" | "checked_out", "agent_id": "A9", "moves": [[package_id, from, to], ...]}
+#   {"type": "error", "error": "..."}
+# `moves` lists live packages re-routed by the roster change; `agent_id` of an
+# assignment is null while no agent is checked in. Delivered packages leave the
+# live state, so it stays as large as the open workload.
+#
+# Events from all connections go through one queue. The dispatcher drains it in
+# micro-windows, applies the batch to a live IncrementalAssignment in arrival
+# order and writes each connection's replies with one write + drain per window.
+class DispatchService:
+    def __init__(self, data, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+        data = dict(data)
+        data["warehouses"] = normalize_locations(data["warehouses"])
+        data["agents"] = normalize_locations(data.get("agents", []))
+        data["packages"] = [normalize_package(p) for p in data.get("packages", [])]
+
+        self.assignment = IncrementalAssignment(data)
+        self.window = window
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.events = 0
+        self.batches = 0
+        self._server = None
+        self._dispatcher = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self._server = await asyncio.start_server(
+            self._handle_client, host, port, limit=LINE_LIMIT
+        )
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        await self.start(host, port)
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._dispatcher.cancel()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.queue.put_nowait((writer, line))
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self):
+        while True:
+            batch = [await self.queue.get()]
+            if self.window:
+                await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            replies = {}
+            for writer, line in batch:
+                reply = json.dumps(self.apply(line)) + "\n"
+                replies.setdefault(writer, []).append(reply)
+            self.events += len(batch)
+            self.batches += 1
+
+            for writer, lines in replies.items():
+                if not writer.is_closing():
+                    writer.write("".join(lines).encode("utf-8"))
+            await asyncio.gather(
+                *(writer.drain() for writer in replies if not writer.is_closing()),
+                return_exceptions=True
+            )
+
+    # Apply one raw event line; returns the reply
+    def apply(self, line):
+        event = {}
+        try:
+            event = json.loads(line)
+            reply = self._apply(event)
+        # A bad event must never take the dispatcher down with it
+        except Exception as e:
+            reply = {"type": "error", "error": f"{type(e).__name__}: {e}"}
+
+        if isinstance(event, dict) and "event_id" in event:
+            reply["event_id"] = event["event_id"]
+        return reply
+
+    def _apply(self, event):
+        kind = event["type"]
+        if kind == "package_created":
+            package = normalize_package({
+                key: value for key, value in event.items() if key not in ("type", "event_id")
+            })
+            agent_id = self.assignment.add_package(package)
+            return {"type": "assigned", "package_id": package["id"], "agent_id": agent_id}
+
+        if kind == "package_delivered":
+            agent_id = self.assignment.remove_package(event["id"])
+            return {"type": "delivered", "package_id": event["id"], "agent_id": agent_id}
+
+        if kind == "agent_checkin":
+            delta = self.assignment.add_agent({"id": event["id"], "location": event["location"]})
+            return {"type": "checked_in", "agent_id": event["id"], "moves": _moves(delta)}
+
+        if kind == "agent_checkout":
+            delta = self.assignment.remove_agent(event["id"])
+            return {"type": "checked_out", "agent_id": event["id"], "moves": _moves(delta)}
+
+        raise ValueError(f"Unknown event type: {kind}")
+
+
+def _moves(delta):
+    return [[package["id"], old, new] for package, old, new in delta]
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))]
+
+
+# Local load generator: opens `connections` sockets and sends `rate` events per
+# second for `seconds`: about 1% agent check-ins / check-outs, the rest new
+# packages at random warehouses, with the oldest package reported delivered once
+# more than `outstanding` are live. Latency is measured per event from send to
+# reply. Returns throughput and latency percentiles in milliseconds.
+async def run_load(warehouse_ids, host=DEFAULT_HOST, port=DEFAULT_PORT, rate=5000,
+                   seconds=10.0, connections=4, roster_share=0.01,
+                   outstanding=DEFAULT_OUTSTANDING, size=1000, seed=42):
+    rng = random.Random(seed)
+    streams = [
+        await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+        for _ in range(connections)
+    ]
+    sent_at = {}
+    latencies = []
+    errors = 0
+
+    async def receive(reader):
+        nonlocal errors
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            received = time.perf_counter()
+            reply = json.loads(line)
+            if reply["type"] == "error":
+                errors += 1
+            latencies.append(received - sent_at.pop(reply["event_id"]))
+
+    receivers = [asyncio.create_task(receive(reader)) for reader, _ in streams]
+
+    checked_in = []
+    live = deque()
+    n_events = int(rate * seconds)
+    tick = 0.001
+    started = time.perf_counter()
+    for i in range(n_events):
+        # Pace to the target rate: sleep whenever ahead of schedule
+        ahead = started + i / rate - time.perf_counter()
+        if ahead > tick:
+            await asyncio.sleep(ahead)
+
+        point = [round(rng.uniform(0, size), 2), round(rng.uniform(0, size), 2)]
+        if rng.random() < roster_share:
+            if checked_in and rng.random() < 0.5:
+                event = {"type": "agent_checkout", "id": checked_in.pop(rng.randrange(len(checked_in)))}
+            else:
+                checked_in.append(f"L{i}")
+                event = {"type": "agent_checkin", "id": f"L{i}", "location": point}
+        elif len(live) > outstanding:
+            event = {"type": "package_delivered", "id": live.popleft()}
+        else:
+            live.append(f"LP{i}")
+            event = {
+                "type": "package_created",
+                "id": f"LP{i}",
+                "warehouse_id": rng.choice(warehouse_ids),
+                "destination": point,
+            }
+        event["event_id"] = i
+
+        # Events about one agent / package share a connection, so they keep their order
+        _, writer = streams[hash(event["id"]) % connections]
+        sent_at[i] = time.perf_counter()
+        writer.write((json.dumps(event) + "\n").encode("utf-8"))
+        if i % 64 == 0:
+            await asyncio.gather(*(w.drain() for _, w in streams))
+            await asyncio.sleep(0)
+
+    # Wait for the outstanding replies (bounded)
+    deadline = time.perf_counter() + 5.0
+    while sent_at and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    for _, writer in streams:
+        writer.close()
+    for task in receivers:
+        task.cancel()
+
+    latencies.sort()
+    return {
+        "events_sent": n_events,
+        "replies": len(latencies),
+        "errors": errors,
+        "lost": len(sent_at),
+        "seconds": round(elapsed, 3),
+        "events_per_second": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            f"p{q}": round(_percentile(latencies, q) * 1000, 3) if latencies else None
+            for q in (50, 95, 99)
+        } | {"max": round(latencies[-1] * 1000, 3) if latencies else None},
+    }
+
+
+async def _wait_for_port(host, port, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastBox real-time dispatch service")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="run the dispatch service")
+    load = commands.add_parser("load", help="send generated events to a running service")
+    bench = commands.add_parser("bench", help="start a service and load it")
+    for command in (serve, load, bench):
+        command.add_argument("--scenario", default="base_case.json",
+                             help="initial warehouses / agents (default: base_case.json)")
+        command.add_argument("--host", default=DEFAULT_HOST)
+        command.add_argument("--port", type=int, default=DEFAULT_PORT)
+    for command in (serve, bench):
+        command.add_argument("--window", type=float, default=DEFAULT_WINDOW * 1000,
+                             help=f"micro-window in ms (default: {DEFAULT_WINDOW * 1000})")
+    for command in (load, bench):
+        command.add_argument("--rate", type=int, default=5000, help="events per second")
+        command.add_argument("--seconds", type=float, default=10.0)
+        command.add_argument("--connections", type=int, default=4)
+        command.add_argument("--output", default=None, help="write the results as JSON")
+    args = parser.parse_args()
+
+    data = load_data(args.scenario)
+
+    if args.command == "serve":
+        service = DispatchService(data, window=args.window / 1000)
+        print(f"Dispatch service listening on {args.host}:{args.port}")
+        asyncio.run(service.serve_forever(args.host, args.port))
+        return
+
+    server = None
+    if args.command == "bench":
+        server = subprocess.Popen([
+            sys.executable, "-m", "src.dispatch_service", "serve",
+            "--scenario", args.scenario, "--host", args.host,
+            "--port", str(args.port), "--window", str(args.window)
+        ], stdout=subprocess.DEVNULL)
+
+    async def load_service():
+        await _wait_for_port(args.host, args.port)
+        return await run_load(
+            [wh["id"] for wh in normalize_locations(data["warehouses"])],
+            args.host, args.port,
+            rate=args.rate, seconds=args.seconds, connections=args.connections
+        )
+
+    try:
+        results = asyncio.run(load_service())
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,129 @@
 import math
 
+# NumPy is optional; only the vectorized engines need it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Raise a clear error when a vectorized feature is used without NumPy
+def require_numpy():
+    if np is None:
+        raise ImportError(
+            "NumPy is required for the vectorized engines (pip install numpy)"
+        )
+    return np
+
+
+# Mean Earth radius in km; geographic distances are reported in km
+EARTH_RADIUS_KM = 6371.0088
+
+
 # Calculate Euclidean distance between two 2D points
 def euclidean_distance(p1, p2):
     return math.sqrt((p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2)
+
+
+# Great-circle distance in km between two [latitude, longitude] points (degrees)
+def haversine_distance(p1, p2):
+    lat1, lat2 = math.radians(p1[0]), math.radians(p2[0])
+    dlat = lat2 - lat1
+    dlon = math.radians(p2[1] - p1[1])
+
+    h = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+# Equirectangular approximation in km between two [latitude, longitude] points.
+# Cheaper than haversine and accurate at city scale.
+def equirectangular_distance(p1, p2):
+    lat1, lat2 = math.radians(p1[0]), math.radians(p2[0])
+    dlon = (p2[1] - p1[1] + 180) % 360 - 180
+    x = math.radians(dlon) * math.cos((lat1 + lat2) / 2)
+    y = lat2 - lat1
+    return EARTH_RADIUS_KM * math.sqrt(x * x + y * y)
+
+
+# Metric for comparison-heavy search loops (routing, trip tours);
+# math.dist is the fast planar form of euclidean_distance
+def search_metric(distance):
+    return math.dist if distance is euclidean_distance else distance
+
+
+# Coordinate systems a scenario can declare with a top-level "coordinate_system" key.
+# "planar" (default) is the original flat 2D plane; the others take [lat, lon].
+COORDINATE_SYSTEMS = {
+    "planar": euclidean_distance,
+    "haversine": haversine_distance,
+    "equirectangular": equirectangular_distance,
+}
+
+
+# Coordinate system of a scenario (dict schema or compact Scenario)
+def coordinate_system(data):
+    settings = getattr(data, "extras", data)
+    name = settings.get("coordinate_system", "planar")
+    if name not in COORDINATE_SYSTEMS:
+        raise ValueError(f"Unknown coordinate system: {name}")
+    return name
+
+
+# Scalar distance function for a scenario's coordinate system
+def scenario_distance(data):
+    return COORDINATE_SYSTEMS[coordinate_system(data)]
+
+
+# Calculate distances between every row of `a` (N, 2) and every row of `b` (M, 2).
+# Returns an (N, M) matrix; planar uses the same arithmetic as euclidean_distance
+# so results match exactly.
+def distance_matrix(a, b, coordinate_system="planar"):
+    require_numpy()
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    return _batched(coordinate_system)(a[:, np.newaxis, :], b[np.newaxis, :, :])
+
+
+# Calculate row-wise distances between two (N, 2) arrays.
+# Planar uses the same arithmetic as euclidean_distance (not np.hypot) so totals match exactly.
+def pairwise_distances(a, b, coordinate_system="planar"):
+    require_numpy()
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    return _batched(coordinate_system)(a, b)
+
+
+def _planar(a, b):
+    dx = b[..., 0] - a[..., 0]
+    dy = b[..., 1] - a[..., 1]
+    return np.sqrt(dx * dx + dy * dy)
+
+
+def _haversine(a, b):
+    lat1, lat2 = np.radians(a[..., 0]), np.radians(b[..., 0])
+    dlat = lat2 - lat1
+    dlon = np.radians(b[..., 1] - a[..., 1])
+
+    h = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(h)))
+
+
+def _equirectangular(a, b):
+    lat1, lat2 = np.radians(a[..., 0]), np.radians(b[..., 0])
+    dlon = (b[..., 1] - a[..., 1] + 180) % 360 - 180
+    x = np.radians(dlon) * np.cos((lat1 + lat2) / 2)
+    y = lat2 - lat1
+    return EARTH_RADIUS_KM * np.sqrt(x * x + y * y)
+
+
+_BATCHED = {
+    "planar": _planar,
+    "haversine": _haversine,
+    "equirectangular": _equirectangular,
+}
+
+
+def _batched(coordinate_system):
+    if coordinate_system not in _BATCHED:
+        raise ValueError(f"Unknown coordinate system: {coordinate_system}")
+    return _BATCHED[coordinate_system]
@@ -0,0 +1,39 @@
+from functools import partial
+from src.assignment import assign_packages_to_agents
+from src.capacity import assign_packages_with_capacity
+from src.events import simulate_deliveries_events
+from src.sequential import assign_packages_sequential
+from src.simulation import simulate_deliveries
+from src.vectorized import assign_packages_vectorized, simulate_deliveries_columnar
+
+# Assignment engines selectable from main.py / test_runner.py
+ASSIGNMENT_ENGINES = {
+    "greedy": assign_packages_to_agents,
+    "numpy": assign_packages_vectorized,
+    "capacity": assign_packages_with_capacity,
+    "sequential": assign_packages_sequential,
+}
+
+
+# Simulation engines selectable from main.py / test_runner.py
+SIMULATION_ENGINES = {
+    "loop": simulate_deliveries,
+    "columnar": simulate_deliveries_columnar,
+    "events": simulate_deliveries_events,
+}
+
+
+# Look up an assignment engine by name; extra options are bound as keyword arguments
+def get_assignment_engine(name, **options):
+    if name not in ASSIGNMENT_ENGINES:
+        raise ValueError(f"Unknown assignment engine: {name}")
+    if options:
+        return partial(ASSIGNMENT_ENGINES[name], **options)
+    return ASSIGNMENT_ENGINES[name]
+
+
+# Look up a simulation engine by name
+def get_simulation_engine(name):
+    if name not in SIMULATION_ENGINES:
+        raise ValueError(f"Unknown simulation engine: {name}")
+    return SIMULATION_ENGINES[name]
@@ -0,0 +1,180 @@
+import heapq
+import random
+from src.distance import scenario_distance
+
+# Event kinds written to the event log
+PICKUP = "pickup"
+DROPOFF = "dropoff"
+DELAY = "delay"
+AVAILABLE = "available"
+
+# Distance units an agent covers per time unit unless it has its own "speed"
+DEFAULT_SPEED = 1.0
+
+
+# Speed of every agent: agent "speed" field, else `speed` (number or {agent_id: speed})
+def agent_speeds(agents, speed=DEFAULT_SPEED):
+    speeds = {}
+    for agent in agents:
+        if isinstance(speed, dict):
+            value = speed.get(agent["id"], DEFAULT_SPEED)
+        else:
+            value = speed
+        value = float(agent.get("speed", value))
+        if value <= 0:
+            raise ValueError(f"Agent {agent['id']} needs a positive speed, got {value}")
+        speeds[agent["id"]] = value
+    return speeds
+
+
+# Discrete-event simulation of the assignments.
+#
+# Each agent works through its packages in order: travel to the warehouse
+# (pickup), travel to the destination (dropoff), optionally a random delay,
+# then it is available for the next package. The heap holds at most one
+# pending event per agent, so it stays as small as the roster.
+#
+# Returns a timeline dict:
+#   "packages": {package_id: {"agent", "pickup_time", "delivery_time"}}
+#   "agents":   {agent_id: {"speed", "packages_delivered", "finish_time"}}
+#   "events":   [(time, kind, agent_id, package_id, distance), ...] in time order
+#               (only when record_events is True)
+def simulate_events(assignments, data, enable_delay=False, speed=DEFAULT_SPEED,
+                    start_time=0.0, seed=None, record_events=True):
+    rng = random if seed is None else random.Random(seed)
+    distance = scenario_distance(data)
+
+    warehouse_map = {
+        wh["id"]: wh["location"] for wh in data["warehouses"]
+    }
+    agent_map = {
+        agent["id"]: agent["location"] for agent in data["agents"]
+    }
+    speeds = agent_speeds(data["agents"], speed)
+
+    agent_ids = list(assignments)
+    queues = [assignments[agent_id] for agent_id in agent_ids]
+    next_package = [0] * len(agent_ids)
+    position = [agent_map[agent_id] for agent_id in agent_ids]
+
+    package_times = {}
+    agent_report = {}
+    events = [] if record_events else None
+
+    # (time, sequence, kind, agent position in agent_ids, leg distance)
+    heap = []
+    sequence = 0
+    push, pop = heapq.heappush, heapq.heappop
+
+    # Agent `a` is free at time `now`: start its next package or finish
+    def available(a, now):
+        nonlocal sequence
+        agent_id = agent_ids[a]
+        i = next_package[a]
+
+        if events is not None:
+            events.append((now, AVAILABLE, agent_id, None, 0.0))
+
+        if i == len(queues[a]):
+            agent_report[agent_id] = {
+                "speed": speeds[agent_id],
+                "packages_delivered": i,
+                "finish_time": now
+            }
+            return
+
+        package = queues[a][i]
+        travel = distance(position[a], warehouse_map[package["warehouse_id"]])
+        push(heap, (now + travel / speeds[agent_id], sequence, PICKUP, a, travel))
+        sequence += 1
+
+    for a in range(len(agent_ids)):
+        available(a, start_time)
+
+    while heap:
+        now, _, kind, a, leg = pop(heap)
+        agent_id = agent_ids[a]
+        package = queues[a][next_package[a]]
+
+        if events is not None:
+            events.append((now, kind, agent_id, package["id"], leg))
+
+        if kind == PICKUP:
+            warehouse_pos = warehouse_map[package["warehouse_id"]]
+            package_times[package["id"]] = {
+                "agent": agent_id,
+                "pickup_time": now,
+                "delivery_time": None
+            }
+            position[a] = warehouse_pos
+
+            travel = distance(warehouse_pos, package["destination"])
+            push(heap, (now + travel / speeds[agent_id], sequence, DROPOFF, a, travel))
+            sequence += 1
+
+        elif kind == DROPOFF:
+            package_times[package["id"]]["delivery_time"] = now
+            position[a] = package["destination"]
+
+            # Same 20% chance of 1-5 extra distance as simulate_deliveries
+            if enable_delay and rng.random() < 0.2:
+                extra = rng.uniform(1, 5)
+                push(heap, (now + extra / speeds[agent_id], sequence, DELAY, a, extra))
+                sequence += 1
+            else:
+                next_package[a] += 1
+                available(a, now)
+
+        else:  # DELAY over
+            next_package[a] += 1
+            available(a, now)
+
+    # Report agents in assignment order
+    return {
+        "packages": package_times,
+        "agents": {agent_id: agent_report[agent_id] for agent_id in agent_ids},
+        "events": events,
+    }
+
+
+# Rebuild simulate_deliveries' report from an event log.
+# Distances are summed per agent in event order, so without delays the
+# result is identical to the loop engine.
+def stats_from_events(events, agent_ids):
+    totals = {agent_id: 0.0 for agent_id in agent_ids}
+    delivered = {agent_id: 0 for agent_id in agent_ids}
+
+    for _, kind, agent_id, _, distance in events:
+        if kind == AVAILABLE:
+            continue
+        totals[agent_id] += distance
+        if kind == DROPOFF:
+            delivered[agent_id] += 1
+
+    report = {}
+    for agent_id in agent_ids:
+        total_distance = totals[agent_id]
+        count = delivered[agent_id]
+        efficiency = total_distance / count if count else 0
+
+        report[agent_id] = {
+            "packages_delivered": count,
+            "total_distance": round(total_distance, 2),
+            "efficiency": round(efficiency, 2)
+        }
+
+    return report
+
+
+# Agents still out (not done with their last package) at time `at`
+def agents_busy_at(timeline, at):
+    return [
+        agent_id for agent_id, info in timeline["agents"].items()
+        if at < info["finish_time"]
+    ]
+
+
+# Simulation engine with simulate_deliveries' signature, driven by the event log
+def simulate_deliveries_events(assignments, data, enable_delay=False):
+    timeline = simulate_events(assignments, data, enable_delay=enable_delay)
+    return stats_from_events(timeline["events"], list(assignments))
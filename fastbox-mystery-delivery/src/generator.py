@@ -0,0 +1,169 @@
+import json
+import random
+import argparse
+from itertools import accumulate
+from src.data_loader import NDJSON_EXTENSIONS
+
+# Spatial layouts the generator can produce
+DISTRIBUTIONS = ("uniform", "clustered", "hotspots")
+
+# Side of the square map, in distance units
+MAP_SIZE = 1000
+
+# Share of packages sent to a hotspot in the "hotspots" layout
+HOTSPOT_SHARE = 0.8
+
+
+# Point sampler for one layout.
+#   uniform   : everything uniform over the map
+#   clustered : warehouses, agents and destinations around a few city centres
+#   hotspots  : uniform sites, but most destinations in a few small hotspots
+class _Layout:
+    def __init__(self, rng, distribution, size, clusters):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution: {distribution}")
+        self.rng = rng
+        self.distribution = distribution
+        self.size = size
+
+        self.centres = [self.uniform() for _ in range(max(clusters, 1))]
+        self.spread = size * (0.05 if distribution == "clustered" else 0.01)
+
+    def uniform(self):
+        return [
+            round(self.rng.uniform(0, self.size), 2),
+            round(self.rng.uniform(0, self.size), 2)
+        ]
+
+    def around_centre(self):
+        cx, cy = self.rng.choice(self.centres)
+        return [
+            round(min(max(self.rng.gauss(cx, self.spread), 0), self.size), 2),
+            round(min(max(self.rng.gauss(cy, self.spread), 0), self.size), 2)
+        ]
+
+    def site(self):
+        if self.distribution == "clustered":
+            return self.around_centre()
+        return self.uniform()
+
+    def destination(self):
+        if self.distribution == "clustered":
+            return self.around_centre()
+        if self.distribution == "hotspots" and self.rng.random() < HOTSPOT_SHARE:
+            return self.around_centre()
+        return self.uniform()
+
+
+# Generator state shared by generate_scenario and write_scenario
+def _setup(n_warehouses, n_agents, distribution, seed, size, clusters):
+    rng = random.Random(seed)
+    layout = _Layout(rng, distribution, size, clusters)
+
+    warehouses = [
+        {"id": f"W{i}", "location": layout.site()} for i in range(n_warehouses)
+    ]
+    agents = [
+        {"id": f"A{i}", "location": layout.site()} for i in range(n_agents)
+    ]
+
+    # Hotspot days are skewed towards a few busy warehouses (Zipf-like weights)
+    weights = None
+    if distribution == "hotspots":
+        weights = list(accumulate(1 / (rank + 1) for rank in range(n_warehouses)))
+
+    return rng, layout, warehouses, agents, weights
+
+
+def _iter_packages(n_packages, rng, layout, warehouses, weights, prefix=""):
+    for i in range(n_packages):
+        if weights is None:
+            warehouse = warehouses[rng.randrange(len(warehouses))]
+        else:
+            warehouse = rng.choices(warehouses, cum_weights=weights)[0]
+
+        yield {
+            "id": f"{prefix}P{i}",
+            "warehouse_id": warehouse["id"],
+            "destination": layout.destination()
+        }
+
+
+# Build a seeded random scenario in the dict schema
+def generate_scenario(n_packages, n_warehouses=100, n_agents=50,
+                      distribution="uniform", seed=None, size=MAP_SIZE, clusters=10):
+    rng, layout, warehouses, agents, weights = _setup(
+        n_warehouses, n_agents, distribution, seed, size, clusters
+    )
+    return {
+        "warehouses": warehouses,
+        "agents": agents,
+        "packages": list(_iter_packages(n_packages, rng, layout, warehouses, weights)),
+    }
+
+
+# Seeded sequence of days on one fixed layout: returns the base scenario
+# (warehouses + agents) and an iterator of daily package lists, drawn lazily.
+# Package IDs are prefixed with the day ("D1-P0", ...) so they never repeat.
+def generate_days(n_days, packages_per_day, n_warehouses=100, n_agents=50,
+                  distribution="uniform", seed=None, size=MAP_SIZE, clusters=10):
+    rng, layout, warehouses, agents, weights = _setup(
+        n_warehouses, n_agents, distribution, seed, size, clusters
+    )
+
+    def days():
+        for day in range(1, n_days + 1):
+            yield list(_iter_packages(
+                packages_per_day, rng, layout, warehouses, weights, prefix=f"D{day}-"
+            ))
+
+    return {"warehouses": warehouses, "agents": agents}, days()
+
+
+# Write a seeded scenario straight to disk (JSON, or NDJSON for .ndjson / .jsonl).
+# Packages are written as they are drawn, so any size fits in memory.
+# The file holds exactly what generate_scenario returns for the same arguments.
+def write_scenario(path, n_packages, n_warehouses=100, n_agents=50,
+                   distribution="uniform", seed=None, size=MAP_SIZE, clusters=10):
+    rng, layout, warehouses, agents, weights = _setup(
+        n_warehouses, n_agents, distribution, seed, size, clusters
+    )
+    packages = _iter_packages(n_packages, rng, layout, warehouses, weights)
+
+    with open(path, "w") as f:
+        if path.endswith(NDJSON_EXTENSIONS):
+            f.write(json.dumps({"warehouses": warehouses, "agents": agents}) + "\n")
+            for package in packages:
+                f.write(json.dumps(package) + "\n")
+            return
+
+        f.write('{"warehouses": ' + json.dumps(warehouses))
+        f.write(', "agents": ' + json.dumps(agents))
+        f.write(', "packages": [')
+        for i, package in enumerate(packages):
+            f.write(("\n" if i == 0 else ",\n") + json.dumps(package))
+        f.write("\n]}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic FastBox scenario")
+    parser.add_argument("output", help="output file (.json, .ndjson or .jsonl)")
+    parser.add_argument("--packages", type=int, default=10_000)
+    parser.add_argument("--warehouses", type=int, default=100)
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    write_scenario(
+        args.output, args.packages,
+        n_warehouses=args.warehouses,
+        n_agents=args.agents,
+        distribution=args.distribution,
+        seed=args.seed
+    )
+    print(f"✅ Wrote {args.packages} packages to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
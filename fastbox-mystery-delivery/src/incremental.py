@@ -0,0 +1,260 @@
+import math
+import heapq
+from src.distance import coordinate_system, euclidean_distance
+from src.spatial_index import GridIndex
+
+
+# Grid cell for the agent index: about one agent per cell over the area the
+# scenario covers (agents, warehouses and destinations). A roster that starts
+# empty or with one agent is sized for one agent per warehouse.
+def _agent_cell_size(data):
+    points = [agent["location"] for agent in data["agents"]]
+    points += [wh["location"] for wh in data["warehouses"]]
+    points += [package["destination"] for package in data["packages"]]
+    if not points:
+        return 1.0
+
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    area = max(max(xs) - min(xs), 1.0) * max(max(ys) - min(ys), 1.0)
+    agents = len(data["agents"])
+    return math.sqrt(area / (agents if agents >= 2 else max(len(data["warehouses"]), 1)))
+
+
+# An agent location must be a finite [x, y] pair; checked before any state changes
+def _check_location(location):
+    if (
+        not isinstance(location, (list, tuple)) or len(location) != 2
+        or not all(
+            isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v)
+            for v in location
+        )
+    ):
+        raise ValueError(f"Invalid location: {location!r}")
+
+
+# Nearest-agent assignment that is kept up to date as agents join or leave.
+#
+# Agents get increasing keys in roster order and live in a GridIndex, so ties
+# still go to the earliest agent and the result always equals
+# assign_packages_to_agents() on the current roster (new agents appended).
+# A roster change only moves the packages of warehouses whose nearest agent
+# actually changes, and returns those moves as a delta. Warehouses live in a
+# GridIndex too: a new agent only checks the warehouses within the largest
+# current nearest-agent distance, since no farther warehouse can switch.
+class IncrementalAssignment:
+    def __init__(self, data):
+        # The grid index works on the flat plane only
+        if coordinate_system(data) != "planar":
+            raise ValueError("IncrementalAssignment needs planar coordinates")
+
+        self.warehouse_map = {
+            wh["id"]: wh["location"] for wh in data["warehouses"]
+        }
+        self._warehouse_ids = list(self.warehouse_map)
+        self._warehouse_keys = {wid: k for k, wid in enumerate(self._warehouse_ids)}
+        self.warehouse_index = GridIndex(self.warehouse_map.values())
+
+        # Packages grouped by warehouse, as {id(package): package} in input order
+        # (dicts keep order and drop a package in O(1)); input position keeps
+        # per-agent packages ordered
+        self.by_warehouse = {}
+        self.packages = {}
+        self._position = {}
+        for i, package in enumerate(data["packages"]):
+            self.by_warehouse.setdefault(package["warehouse_id"], {})[id(package)] = package
+            self.packages[package["id"]] = package
+            self._position[id(package)] = i
+        self._next_position = len(self._position)
+
+        self.agents = {}
+        self._keys = {}
+        self._next_key = 0
+        agents = data["agents"]
+        self.index = GridIndex([agent["location"] for agent in agents], _agent_cell_size(data))
+
+        # Nearest agent key / distance per warehouse, and warehouses served per agent
+        self.nearest = {wid: None for wid in self.by_warehouse}
+        self.nearest_distance = {wid: float("inf") for wid in self.by_warehouse}
+        self.served = {}
+
+        # Max-heap of (-nearest_distance, warehouse key); stale entries are
+        # dropped lazily when they reach the top
+        self._reach_heap = [(-math.inf, self._warehouse_keys[wid]) for wid in self.by_warehouse]
+
+        # Packages per agent ID, as {id(package): package} in input order
+        self._assigned = {}
+
+        if agents:
+            for key, agent in enumerate(agents):
+                self._register(key, agent)
+            self._next_key = len(agents)
+
+            for wid in self.by_warehouse:
+                self._serve(wid, self.index.nearest(self.warehouse_map[wid]))
+
+            for agent_id in self._assigned:
+                self._assigned[agent_id] = self._merge(
+                    *(self.by_warehouse[wid] for wid in self.served[self._keys[agent_id]])
+                )
+
+    def _register(self, key, agent):
+        if agent["id"] in self._keys:
+            raise ValueError(f"Agent {agent['id']} is already on the roster")
+        self.agents[key] = agent
+        self._keys[agent["id"]] = key
+        self.served[key] = set()
+        self._assigned[agent["id"]] = {}
+
+    def _serve(self, wid, key):
+        self.nearest[wid] = key
+        if key is None:
+            self.nearest_distance[wid] = float("inf")
+        else:
+            self.nearest_distance[wid] = euclidean_distance(
+                self.agents[key]["location"], self.warehouse_map[wid]
+            )
+            self.served[key].add(wid)
+        heapq.heappush(self._reach_heap, (-self.nearest_distance[wid], self._warehouse_keys[wid]))
+
+    # Largest nearest-agent distance over the warehouses with packages
+    def _reach(self):
+        heap = self._reach_heap
+        if len(heap) > 4 * len(self.nearest) + 64:
+            heap[:] = [
+                (-distance, self._warehouse_keys[wid])
+                for wid, distance in self.nearest_distance.items()
+            ]
+            heapq.heapify(heap)
+
+        while heap and -heap[0][0] != self.nearest_distance[self._warehouse_ids[heap[0][1]]]:
+            heapq.heappop(heap)
+        return -heap[0][0] if heap else 0.0
+
+    # Merge package groups back into input order
+    def _merge(self, *groups):
+        merged = heapq.merge(
+            *(group.values() for group in groups), key=lambda p: self._position[id(p)]
+        )
+        return {id(package): package for package in merged}
+
+    # Move one warehouse's packages to agent `key`; returns the moves
+    def _move(self, wid, key):
+        old = self.nearest[wid]
+        if old == key:
+            return []
+
+        packages = self.by_warehouse[wid]
+        old_id = None
+        if old is not None:
+            old_id = self.agents[old]["id"]
+            self.served[old].discard(wid)
+            assigned = self._assigned[old_id]
+            for moved in packages:
+                del assigned[moved]
+
+        new_id = None
+        self._serve(wid, key)
+        if key is not None:
+            new_id = self.agents[key]["id"]
+            self._assigned[new_id] = self._merge(self._assigned[new_id], packages)
+
+        return [(package, old_id, new_id) for package in packages.values()]
+
+    # Add a package at the end of the input (its warehouse must be known and
+    # its ID not live yet). Returns the ID of the agent it goes to, or None
+    # while the roster is empty.
+    def add_package(self, package):
+        wid = package["warehouse_id"]
+        if wid not in self.warehouse_map:
+            raise ValueError(f"Unknown warehouse: {wid}")
+        if package["id"] in self.packages:
+            raise ValueError(f"Package {package['id']} is already live")
+
+        self.packages[package["id"]] = package
+        self._position[id(package)] = self._next_position
+        self._next_position += 1
+
+        if wid not in self.by_warehouse:
+            self.by_warehouse[wid] = {}
+            self.nearest[wid] = None
+            self._serve(wid, self.index.nearest(self.warehouse_map[wid]))
+        self.by_warehouse[wid][id(package)] = package
+
+        key = self.nearest[wid]
+        if key is None:
+            return None
+        agent_id = self.agents[key]["id"]
+        self._assigned[agent_id][id(package)] = package
+        return agent_id
+
+    # Drop a package (e.g. once delivered) in O(1); returns the ID of the agent
+    # it was assigned to, or None
+    def remove_package(self, package_id):
+        if package_id not in self.packages:
+            raise ValueError(f"Unknown package: {package_id}")
+
+        package = self.packages.pop(package_id)
+        del self._position[id(package)]
+        del self.by_warehouse[package["warehouse_id"]][id(package)]
+
+        key = self.nearest[package["warehouse_id"]]
+        if key is None:
+            return None
+        agent_id = self.agents[key]["id"]
+        del self._assigned[agent_id][id(package)]
+        return agent_id
+
+    # Add an agent at the end of the roster.
+    # Returns the delta as a list of (package, from_agent_id, to_agent_id).
+    def add_agent(self, agent):
+        _check_location(agent["location"])
+        key = self._next_key
+        self._register(key, agent)
+        self._next_key += 1
+        self.index.add(key, agent["location"])
+
+        # Only a warehouse strictly closer to the new agent than to its current
+        # nearest agent can change (ties stay with the earlier agent)
+        delta = []
+        location = agent["location"]
+        for k in self.warehouse_index.within(location, self._reach()):
+            wid = self._warehouse_ids[k]
+            if wid not in self.nearest:
+                continue
+            distance = euclidean_distance(location, self.warehouse_map[wid])
+            if distance < self.nearest_distance[wid]:
+                delta.extend(self._move(wid, key))
+        return delta
+
+    # Remove an agent by ID; only the warehouses it served are re-evaluated.
+    # Returns the delta as a list of (package, from_agent_id, to_agent_id);
+    # packages are left unassigned (to_agent_id None) when no agent remains.
+    def remove_agent(self, agent_id):
+        if agent_id not in self._keys:
+            raise ValueError(f"Unknown agent: {agent_id}")
+
+        key = self._keys[agent_id]
+        self.index.remove(key)
+
+        delta = []
+        for wid in sorted(self.served[key], key=str):
+            delta.extend(self._move(wid, self.index.nearest(self.warehouse_map[wid])))
+
+        del self.agents[key]
+        del self._keys[agent_id]
+        del self.served[key]
+        del self._assigned[agent_id]
+        return delta
+
+    # {agent_id: [package, ...]} in input order, like assign_packages_to_agents()
+    @property
+    def assignments(self):
+        return {
+            agent_id: list(assigned.values()) for agent_id, assigned in self._assigned.items()
+        }
+
+    # Current roster, in joining order
+    @property
+    def roster(self):
+        return [self.agents[key] for key in sorted(self.agents)]
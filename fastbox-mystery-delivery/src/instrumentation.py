@@ -0,0 +1,215 @@
+import json
+import time
+import cProfile
+import tracemalloc
+
+# Max resident set size is Unix only; elsewhere it is reported as None
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Process high-water mark in bytes (ru_maxrss is KiB on Linux)
+def max_rss_bytes():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# Stand-in used while instrumentation is disabled: every call is a no-op
+class _NullStage:
+    items = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+# One timed run of a stage (see Instrumentation.stage)
+class _Stage:
+    def __init__(self, owner, name, items):
+        self.owner = owner
+        self.name = name
+        self.items = items
+        self.profile = None
+        self.top_level = False
+
+    def __enter__(self):
+        owner = self.owner
+        self.top_level = owner._depth == 0
+        owner._depth += 1
+
+        # Memory and profiles are taken for top-level stages only, so nested
+        # stages never reset or steal the outer measurement
+        if self.top_level and owner.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        if self.top_level and owner.profile:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        owner = self.owner
+
+        if self.profile is not None:
+            self.profile.disable()
+        peak = None
+        if self.top_level and owner.memory:
+            peak = tracemalloc.get_traced_memory()[1]
+
+        owner._depth -= 1
+        owner._record(self, wall, cpu, peak)
+        return False
+
+
+# Per-stage wall time, CPU time, peak memory, item counts and throughput.
+#
+#   instrumentation = Instrumentation(enabled=True)
+#   with instrumentation.stage("assign", items=len(packages)):
+#       ...
+#   instrumentation.count("packages", len(packages))
+#   instrumentation.write_json("output/trace.json")
+#
+# When disabled, stage() hands back a shared no-op object and count() returns
+# at once, so instrumented code pays almost nothing.
+# memory=True traces peak allocations with tracemalloc (slows the stages down);
+# profile=True keeps a cProfile dump of the slowest stage.
+class Instrumentation:
+    def __init__(self, enabled=False, memory=False, profile=False):
+        self.enabled = enabled or profile
+        self.memory = memory
+        self.profile = profile
+        self.stages = {}
+        self.counters = {}
+
+        self._depth = 0
+        self._slowest = None
+
+    def stage(self, name, items=None):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, items)
+
+    def count(self, name, value=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @staticmethod
+    def _empty_record():
+        return {
+            "calls": 0,
+            "seconds": 0.0,
+            "cpu_seconds": 0.0,
+            "peak_bytes": None,
+            "max_rss_bytes": None,
+            "items": None,
+        }
+
+    def _record(self, stage, wall, cpu, peak):
+        record = self.stages.setdefault(stage.name, self._empty_record())
+        record["calls"] += 1
+        record["seconds"] += wall
+        record["cpu_seconds"] += cpu
+        record["max_rss_bytes"] = max_rss_bytes()
+        if peak is not None:
+            record["peak_bytes"] = max(record["peak_bytes"] or 0, peak)
+        if stage.items is not None:
+            record["items"] = (record["items"] or 0) + stage.items
+
+        if stage.profile is not None and (
+            self._slowest is None or wall > self._slowest[1]
+        ):
+            self._slowest = (stage.name, wall, stage.profile)
+
+    # Merge stage records produced elsewhere (e.g. by worker processes)
+    def merge(self, stages):
+        for name, other in stages.items():
+            record = self.stages.setdefault(name, self._empty_record())
+            record["calls"] += other["calls"]
+            record["seconds"] += other["seconds"]
+            record["cpu_seconds"] += other["cpu_seconds"]
+            for key in ("peak_bytes", "max_rss_bytes"):
+                if other[key] is not None:
+                    record[key] = max(record[key] or 0, other[key])
+            if other["items"] is not None:
+                record["items"] = (record["items"] or 0) + other["items"]
+
+    # Name of the stage kept by --profile, or None
+    @property
+    def slowest_stage(self):
+        return self._slowest[0] if self._slowest else None
+
+    def to_dict(self):
+        stages = {}
+        for name, record in self.stages.items():
+            seconds = record["seconds"]
+            items = record["items"]
+            stages[name] = {
+                "calls": record["calls"],
+                "seconds": round(seconds, 6),
+                "cpu_seconds": round(record["cpu_seconds"], 6),
+                "peak_bytes": record["peak_bytes"],
+                "max_rss_bytes": record["max_rss_bytes"],
+                "items": items,
+                "items_per_second": (
+                    round(items / seconds, 1) if items is not None and seconds else None
+                ),
+            }
+        return {"stages": stages, "counters": dict(self.counters)}
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    # Prometheus text exposition format, one gauge family per measurement
+    def write_prometheus(self, path, prefix="fastbox"):
+        trace = self.to_dict()
+        metrics = [
+            ("stage_seconds", "seconds", "Wall time per pipeline stage"),
+            ("stage_cpu_seconds", "cpu_seconds", "CPU time per pipeline stage"),
+            ("stage_peak_bytes", "peak_bytes", "Peak traced memory per pipeline stage"),
+            ("stage_max_rss_bytes", "max_rss_bytes", "Process max RSS after the stage"),
+            ("stage_items", "items", "Items processed per pipeline stage"),
+            ("stage_items_per_second", "items_per_second", "Throughput per pipeline stage"),
+        ]
+
+        lines = []
+        for metric, key, help_text in metrics:
+            samples = [
+                (name, record[key]) for name, record in trace["stages"].items()
+                if record[key] is not None
+            ]
+            if not samples:
+                continue
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} gauge")
+            for name, value in samples:
+                lines.append(f'{prefix}_{metric}{{stage="{name}"}} {value}')
+
+        for name, value in trace["counters"].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    # Write the slowest stage's cProfile data (pstats format); returns its name
+    def dump_profile(self, path):
+        if self._slowest is None:
+            return None
+        name, _, profile = self._slowest
+        profile.dump_stats(path)
+        return name
@@ -0,0 +1,103 @@
+from src.distance import require_numpy
+from src.routing import route_distance
+from src.vectorized import (
+    DELAY_PROBABILITY,
+    DELAY_RANGE,
+    columnize_assignments,
+    delivery_legs,
+)
+
+# Percentiles reported for total_distance and efficiency
+PERCENTILES = (50, 95, 99)
+
+# Replications drawn per batch (bounds peak memory of the delay draws)
+BATCH_REPLICATIONS = 1000
+
+
+# Summed random delay per (replication, agent).
+# The number of delayed packages per agent is Binomial(n, p), and only the
+# delayed packages draw a uniform extra distance, so the result has the same
+# distribution as per-package draws while drawing ~p times fewer numbers.
+def draw_agent_delays(rng, counts, replications):
+    np = require_numpy()
+    low, high = DELAY_RANGE
+
+    delayed = rng.binomial(counts, DELAY_PROBABILITY, size=(replications, len(counts)))
+    extra = rng.uniform(low, high, int(delayed.sum()))
+
+    cells = np.repeat(np.arange(delayed.size), delayed.ravel())
+    sums = np.bincount(cells, weights=extra, minlength=delayed.size)
+    return sums.reshape(delayed.shape)
+
+
+# Run N seeded replications of simulate_deliveries(..., enable_delay=True) at once.
+# `distance` (e.g. a RoadDistance) prices the legs like simulate_deliveries does;
+# by default they are computed in bulk for the scenario's coordinate system.
+# Returns per-agent mean / percentiles of total_distance and efficiency,
+# plus how often each agent comes out as best agent.
+def simulate_monte_carlo(assignments, data, replications=1000, seed=None, distance=None):
+    np = require_numpy()
+    if replications < 1:
+        raise ValueError("replications must be at least 1")
+    rng = np.random.default_rng(seed)
+
+    columns = columnize_assignments(assignments, data)
+    counts = columns["counts"]
+    agent_ids = columns["agent_ids"]
+
+    # Travel distance without delays is the same in every replication
+    if distance is None:
+        to_warehouse, to_destination, segment = delivery_legs(columns)
+        base = np.bincount(
+            np.repeat(segment, 2),
+            weights=np.column_stack([to_warehouse, to_destination]).ravel(),
+            minlength=len(counts)
+        )
+    else:
+        warehouse_map = {wh["id"]: wh["location"] for wh in data["warehouses"]}
+        agent_map = {agent["id"]: agent["location"] for agent in data["agents"]}
+        base = np.array([
+            route_distance(
+                agent_map[agent_id],
+                [(warehouse_map[p["warehouse_id"]], p["destination"]) for p in assignments[agent_id]],
+                range(len(assignments[agent_id])),
+                distance
+            )
+            for agent_id in agent_ids
+        ], dtype=np.float64)
+
+    totals = np.empty((replications, len(counts)), dtype=np.float64)
+    for start in range(0, replications, BATCH_REPLICATIONS):
+        batch = min(BATCH_REPLICATIONS, replications - start)
+        totals[start:start + batch] = base + draw_agent_delays(rng, counts, batch)
+
+    # Efficiency per replication; agents without packages never win best agent
+    has_packages = counts > 0
+    efficiency = np.where(has_packages, totals / np.maximum(counts, 1), 0.0)
+    ranking = np.where(has_packages, efficiency, np.inf)
+    best = np.bincount(ranking.argmin(axis=1), minlength=len(counts))
+
+    total_pct = np.percentile(totals, PERCENTILES, axis=0)
+    efficiency_pct = np.percentile(efficiency, PERCENTILES, axis=0)
+
+    report = {}
+    for i, agent_id in enumerate(agent_ids):
+        report[agent_id] = {
+            "packages_delivered": int(counts[i]),
+            "total_distance": _summary(totals[:, i].mean(), total_pct[:, i]),
+            "efficiency": _summary(efficiency[:, i].mean(), efficiency_pct[:, i]),
+            "best_agent_frequency": round(float(best[i]) / replications, 4)
+        }
+
+    return {
+        "replications": replications,
+        "seed": seed,
+        "agents": report,
+    }
+
+
+def _summary(mean, percentiles):
+    summary = {"mean": round(float(mean), 2)}
+    for p, value in zip(PERCENTILES, percentiles):
+        summary[f"p{p}"] = round(float(value), 2)
+    return summary
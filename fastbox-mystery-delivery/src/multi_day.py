@@ -0,0 +1,259 @@
+import os
+import time
+import heapq
+import random
+import argparse
+from itertools import islice
+from collections import deque
+from src.data_loader import (
+    NDJSON_EXTENSIONS,
+    load_data,
+    normalize_locations,
+    normalize_package,
+    stream_data,
+)
+from src.assignment import assign_packages_to_agents
+from src.simulation import simulate_deliveries
+from src.generator import DISTRIBUTIONS, generate_days
+from src.report import generate_multi_day_report
+
+
+# Rolling multi-day simulation.
+#
+# Every day chains assign_packages_to_agents and simulate_deliveries over the
+# carried-over backlog plus that day's new packages. Agents start the day where
+# they finished the previous one, and each agent delivers at most its daily
+# `capacity` (an agent's own "capacity" field wins); the rest rolls over to the
+# next day, oldest first.
+#
+# State is kept incrementally: the backlog waits in one queue per warehouse,
+# and since the nearest agent only depends on the warehouse, each day assigns
+# one head package per warehouse and pops just the packages delivered. A day
+# costs O(warehouses + new + delivered packages), however large the backlog.
+#
+#   rolling = RollingSimulation(base, capacity=40)
+#   for packages in days:
+#       record = rolling.run_day(packages)
+#   rolling.totals()
+class RollingSimulation:
+    def __init__(self, data, capacity=None, enable_delay=False, distance=None, index="kdtree"):
+        self.extras = {
+            key: value for key, value in data.items()
+            if key not in ("warehouses", "agents", "packages")
+        }
+        self.warehouses = [dict(wh) for wh in normalize_locations(data["warehouses"])]
+        # Agent records are updated in place with each day's end position
+        self.agents = [dict(agent) for agent in normalize_locations(data["agents"])]
+        self.capacity = capacity
+        self.enable_delay = enable_delay
+        self.distance = distance
+        self.index = index
+
+        self.day = 0
+        # Backlog per warehouse ID: deque of (arrival sequence, arrival day, package)
+        self._queues = {}
+        self._pending = 0
+        self._sequence = 0
+        # Cumulative per agent: [packages_delivered, total_distance, days_active]
+        self._totals = {agent["id"]: [0, 0.0, 0] for agent in self.agents}
+
+    # Add warehouses that open later (a repeated ID moves the warehouse)
+    def add_warehouses(self, warehouses):
+        position = {wh["id"]: i for i, wh in enumerate(self.warehouses)}
+        for wh in normalize_locations(warehouses):
+            if wh["id"] in position:
+                self.warehouses[position[wh["id"]]] = dict(wh)
+            else:
+                position[wh["id"]] = len(self.warehouses)
+                self.warehouses.append(dict(wh))
+
+    @property
+    def positions(self):
+        return {agent["id"]: agent["location"] for agent in self.agents}
+
+    # Undelivered packages, oldest first
+    @property
+    def backlog(self):
+        return [package for _, _, package in heapq.merge(*self._queues.values())]
+
+    def _data(self, packages):
+        return dict(
+            self.extras, warehouses=self.warehouses, agents=self.agents, packages=packages
+        )
+
+    # Simulate one day; returns the day's record
+    def run_day(self, packages, label=None):
+        self.day += 1
+        day = self.day
+        carried = self._pending
+
+        for package in packages:
+            package = normalize_package(package)
+            queue = self._queues.get(package["warehouse_id"])
+            if queue is None:
+                queue = self._queues[package["warehouse_id"]] = deque()
+            queue.append((self._sequence, day, package))
+            self._sequence += 1
+            self._pending += 1
+        new = self._pending - carried
+
+        # Today's agent for every warehouse with waiting packages
+        heads = [queue[0][2] for queue in self._queues.values() if queue]
+        data = self._data(heads)
+        assignments = assign_packages_to_agents(data, self.index, self.distance)
+
+        # Each agent works through its warehouses' packages oldest first
+        delivered = {}
+        waits = []
+        for agent in self.agents:
+            queues = [self._queues[head["warehouse_id"]] for head in assignments[agent["id"]]]
+            taken = list(islice(heapq.merge(*queues), agent.get("capacity", self.capacity)))
+
+            route = []
+            for _, received, package in taken:
+                self._queues[package["warehouse_id"]].popleft()
+                waits.append(day - received)
+                route.append(package)
+            delivered[agent["id"]] = route
+        self._pending -= len(waits)
+
+        stats = simulate_deliveries(delivered, data, self.enable_delay, self.distance)
+
+        # Tomorrow starts where today's last delivery ended
+        for agent in self.agents:
+            route = delivered[agent["id"]]
+            if route:
+                agent["location"] = route[-1]["destination"]
+
+        total_distance = 0.0
+        for agent_id, agent_stats in stats.items():
+            totals = self._totals[agent_id]
+            totals[0] += agent_stats["packages_delivered"]
+            totals[1] += agent_stats["total_distance"]
+            totals[2] += 1 if agent_stats["packages_delivered"] else 0
+            total_distance += agent_stats["total_distance"]
+
+        return {
+            "day": day,
+            "label": label if label is not None else f"day {day}",
+            "new_packages": new,
+            "carried_over": carried,
+            "delivered": len(waits),
+            "backlog": self._pending,
+            "total_distance": round(total_distance, 2),
+            "mean_wait_days": round(sum(waits) / len(waits), 3) if waits else 0,
+            "max_wait_days": max(waits, default=0),
+            "agents": stats,
+        }
+
+    # Cumulative per-agent stats over all days simulated so far
+    def totals(self):
+        report = {}
+        for agent_id, (delivered, total_distance, days_active) in self._totals.items():
+            report[agent_id] = {
+                "packages_delivered": delivered,
+                "total_distance": round(total_distance, 2),
+                "efficiency": round(total_distance / delivered, 2) if delivered else 0,
+                "days_active": days_active,
+            }
+        return report
+
+    def __len__(self):
+        return self._pending
+
+    # Age in days of the oldest package still waiting (0 when the backlog is empty)
+    def oldest_backlog_days(self):
+        arrivals = [queue[0][1] for queue in self._queues.values() if queue]
+        return self.day - min(arrivals) if arrivals else 0
+
+
+# Packages (and any new warehouses) of one day: a JSON / NDJSON file path,
+# a scenario dict or a plain list of packages
+def load_day(rolling, source):
+    if isinstance(source, str):
+        source = stream_data(source) if source.endswith(NDJSON_EXTENSIONS) else load_data(source)
+    if isinstance(source, dict):
+        if source.get("warehouses"):
+            rolling.add_warehouses(source["warehouses"])
+        return source.get("packages", [])
+    return source
+
+
+# Run a whole sequence of days; returns per-day records, cumulative per-agent
+# stats and what is left in the backlog.
+# With `keep_agent_stats=False` the per-day records drop their per-agent stats.
+def simulate_days(data, days, capacity=None, enable_delay=False, seed=None,
+                  distance=None, keep_agent_stats=True):
+    if seed is not None:
+        random.seed(seed)
+    rolling = RollingSimulation(data, capacity, enable_delay, distance)
+
+    records = []
+    for source in days:
+        label = os.path.basename(source) if isinstance(source, str) else None
+        record = rolling.run_day(load_day(rolling, source), label)
+        if not keep_agent_stats:
+            del record["agents"]
+        records.append(record)
+
+    return {
+        "days": records,
+        "agents": rolling.totals(),
+        "backlog": {
+            "packages": len(rolling),
+            "oldest_days": rolling.oldest_backlog_days(),
+        },
+        "positions": rolling.positions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a synthetic run of FastBox days")
+    parser.add_argument("days", type=int, help="number of days (e.g. 365)")
+    parser.add_argument("--packages-per-day", type=int, default=2000)
+    parser.add_argument("--warehouses", type=int, default=100)
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="uniform")
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        default=None,
+        help="packages each agent can deliver per day (default: unlimited)"
+    )
+    parser.add_argument("--delay", action="store_true", help="enable random delays")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default="output")
+    args = parser.parse_args()
+
+    # Create it up front so a long run never fails at the very end
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    base, days = generate_days(
+        args.days, args.packages_per_day,
+        n_warehouses=args.warehouses,
+        n_agents=args.agents,
+        distribution=args.distribution,
+        seed=args.seed
+    )
+
+    started = time.perf_counter()
+    result = simulate_days(
+        base, days,
+        capacity=args.capacity,
+        enable_delay=args.delay,
+        seed=args.seed,
+        keep_agent_stats=False
+    )
+    seconds = time.perf_counter() - started
+
+    generate_multi_day_report(
+        result,
+        json_path=os.path.join(args.output_dir, "multi_day_report.json"),
+        csv_path=os.path.join(args.output_dir, "multi_day.csv")
+    )
+    print(f"✅ Generated and simulated {args.days} days in {seconds:.2f}s "
+          f"(backlog: {result['backlog']['packages']} packages)")
+
+
+if __name__ == "__main__":
+    main()
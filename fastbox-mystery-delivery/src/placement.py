@@ -0,0 +1,227 @@
+import json
+import argparse
+from src.data_loader import load_data, normalize_locations, normalize_package
+from src.distance import coordinate_system, distance_matrix, pairwise_distances, require_numpy
+from src.vectorized import nearest_agent_codes
+
+# Candidate positions per side of the grid laid over the warehouses
+DEFAULT_GRID = 20
+
+
+# What-if placement of extra agents (facility location over the greedy model).
+#
+# Only the "previous stop -> warehouse" legs of a route depend on the roster;
+# every warehouse -> destination leg is the same whoever delivers it. A new
+# agent at c takes over each warehouse strictly closer to c than to its current
+# agent (new agents join the end of the roster, so ties stay put). Its saving
+# is exact for the no-delay simulation: the affected agents' routes drop those
+# packages and the new agent delivers them in input order.
+#
+# Candidates are priced from the packages of the agents they affect only, with
+# vectorized legs, and one candidate x warehouse distance matrix is kept up to
+# date as agents are placed, so nothing re-runs assignment or the whole
+# simulation. Delays do not depend on the roster, so they are left out.
+#
+#   optimizer = PlacementOptimizer(data)
+#   optimizer.place(3)  # greedy: best saving first, one agent at a time
+class PlacementOptimizer:
+    def __init__(self, data):
+        np = require_numpy()
+        self.coordinates = coordinate_system(data)
+        self.agent_ids = [agent["id"] for agent in data["agents"]]
+
+        warehouse_code = {wh["id"]: i for i, wh in enumerate(data["warehouses"])}
+        self.warehouse_ids = list(warehouse_code)
+        self.warehouse_xy = np.array(
+            [wh["location"] for wh in data["warehouses"]], dtype=np.float64
+        ).reshape(-1, 2)
+        self.agent_xy = np.array(
+            [agent["location"] for agent in data["agents"]], dtype=np.float64
+        ).reshape(-1, 2)
+
+        packages = data["packages"]
+        self.codes = np.fromiter(
+            (warehouse_code[p["warehouse_id"]] for p in packages),
+            dtype=np.intp, count=len(packages)
+        )
+        self.destinations = np.array(
+            [p["destination"] for p in packages], dtype=np.float64
+        ).reshape(-1, 2)
+
+        # Package positions per warehouse, in input order
+        order = np.argsort(self.codes, kind="stable")
+        bounds = np.cumsum(np.bincount(self.codes, minlength=len(self.warehouse_ids)))
+        self.by_warehouse = np.split(order, bounds[:-1])
+
+        # Warehouse -> destination legs never change
+        self.fixed = float(pairwise_distances(
+            self.warehouse_xy[self.codes], self.destinations, self.coordinates
+        ).sum())
+
+        # Current owner / distance to it per warehouse (-1 / inf without agents)
+        n_warehouses = len(self.warehouse_ids)
+        if len(self.agent_xy):
+            self.owner = nearest_agent_codes(self.warehouse_xy, self.agent_xy, self.coordinates)
+            self.best = pairwise_distances(
+                self.warehouse_xy, self.agent_xy[self.owner], self.coordinates
+            )
+        else:
+            self.owner = np.full(n_warehouses, -1, dtype=np.intp)
+            self.best = np.full(n_warehouses, np.inf)
+
+        # Packages (input positions) and roster-dependent cost per agent
+        self.routes = {}
+        self.costs = {}
+        for agent in range(len(self.agent_ids)):
+            self._set_route(agent, self._packages_of(self.owner == agent))
+
+    def _packages_of(self, warehouses):
+        np = require_numpy()
+        parts = [self.by_warehouse[w] for w in np.flatnonzero(warehouses)]
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(parts))
+
+    # Sum of the "previous stop -> warehouse" legs of a route
+    def _route_cost(self, start, route):
+        if not len(route):
+            return 0.0
+        pickups = self.warehouse_xy[self.codes[route]]
+        first = pairwise_distances(start, pickups[0], self.coordinates)
+        return float(first + pairwise_distances(
+            self.destinations[route[:-1]], pickups[1:], self.coordinates
+        ).sum())
+
+    def _set_route(self, agent, route):
+        self.routes[agent] = route
+        self.costs[agent] = self._route_cost(self.agent_xy[agent], route)
+
+    # Total distance of the current roster without delays
+    @property
+    def total_distance(self):
+        return self.fixed + sum(self.costs.values())
+
+    # Candidate positions: a grid over the warehouses' bounding box plus every
+    # warehouse site (the 1-median of its own load)
+    def candidates(self, grid=DEFAULT_GRID):
+        np = require_numpy()
+        if not len(self.warehouse_xy):
+            return np.empty((0, 2))
+        low = self.warehouse_xy.min(axis=0)
+        high = self.warehouse_xy.max(axis=0)
+        xs = np.linspace(low[0], high[0], grid)
+        ys = np.linspace(low[1], high[1], grid)
+        cells = np.column_stack([np.repeat(xs, grid), np.tile(ys, grid)])
+        return np.unique(np.vstack([cells, self.warehouse_xy]), axis=0)
+
+    # Saving of one new agent at `location` taking over the `taken` warehouses
+    def saving(self, location, taken):
+        np = require_numpy()
+        if not taken.any():
+            return 0.0
+
+        before = 0.0
+        after = 0.0
+        for agent in np.unique(self.owner[taken]).tolist():
+            if agent < 0:
+                continue
+            route = self.routes[agent]
+            before += self.costs[agent]
+            after += self._route_cost(
+                self.agent_xy[agent], route[~taken[self.codes[route]]]
+            )
+        after += self._route_cost(location, self._packages_of(taken))
+        return before - after
+
+    # Place up to `k` agents greedily among `candidates` (default: candidates()).
+    # Stops early once no candidate saves any distance.
+    def place(self, k, candidates=None, grid=DEFAULT_GRID, id_prefix="N"):
+        np = require_numpy()
+        if candidates is None:
+            candidates = self.candidates(grid)
+        candidates = np.asarray(candidates, dtype=np.float64).reshape(-1, 2)
+        distances = distance_matrix(candidates, self.warehouse_xy, self.coordinates)
+
+        placements = []
+        for _ in range(k):
+            best_saving, best_candidate, best_taken = 0.0, None, None
+            for i, location in enumerate(candidates):
+                taken = distances[i] < self.best
+                saving = self.saving(location, taken)
+                if saving > best_saving:
+                    best_saving, best_candidate, best_taken = saving, i, taken
+
+            if best_candidate is None:
+                break
+            placements.append(
+                self._commit(candidates[best_candidate], distances[best_candidate],
+                             best_taken, best_saving, id_prefix)
+            )
+
+        return placements
+
+    def _commit(self, location, distances, taken, saving, id_prefix):
+        np = require_numpy()
+        agent = len(self.agent_ids)
+        number = 1
+        while f"{id_prefix}{number}" in self.agent_ids:
+            number += 1
+        agent_id = f"{id_prefix}{number}"
+
+        for other in np.unique(self.owner[taken]).tolist():
+            if other >= 0:
+                route = self.routes[other]
+                self._set_route(other, route[~taken[self.codes[route]]])
+
+        self.agent_ids.append(agent_id)
+        self.agent_xy = np.vstack([self.agent_xy, location])
+        self.owner = np.where(taken, agent, self.owner)
+        self.best = np.minimum(self.best, distances)
+        self._set_route(agent, self._packages_of(taken))
+
+        return {
+            "id": agent_id,
+            "location": [round(float(v), 6) for v in location],
+            "projected_saving": round(saving, 2),
+            "warehouses": [self.warehouse_ids[w] for w in np.flatnonzero(taken)],
+        }
+
+
+# Best placements for `k` new agents with their projected savings (no delays)
+def optimize_placement(data, k, grid=DEFAULT_GRID, candidates=None):
+    optimizer = PlacementOptimizer(data)
+    baseline = optimizer.total_distance
+    placements = optimizer.place(k, candidates, grid)
+    projected = optimizer.total_distance
+
+    return {
+        "baseline_distance": round(baseline, 2),
+        "projected_distance": round(projected, 2),
+        "projected_saving": round(baseline - projected, 2),
+        "placements": placements,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find where K new agents cut the most distance")
+    parser.add_argument("input", help="scenario file")
+    parser.add_argument("-k", type=int, default=1, help="number of new agents (default: 1)")
+    parser.add_argument("--grid", type=int, default=DEFAULT_GRID,
+                        help=f"candidate grid size per side (default: {DEFAULT_GRID})")
+    parser.add_argument("--output", default=None, help="write the placements as JSON")
+    args = parser.parse_args()
+
+    data = load_data(args.input)
+    data["warehouses"] = normalize_locations(data["warehouses"])
+    data["agents"] = normalize_locations(data["agents"])
+    data["packages"] = [normalize_package(p) for p in data["packages"]]
+
+    result = optimize_placement(data, args.k, args.grid)
+    print(json.dumps(result, indent=4))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
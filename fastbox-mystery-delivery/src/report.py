@@ -1,5 +1,30 @@
 import json
 import csv
+import io
+import gzip
+import heapq
+
+# Agents kept in the best / worst rankings of a streaming report
+TOP_K = 10
+
+# Optional CSV columns, by stats key: route optimization (src/routing.py) and
+# trips (src/trips.py) add distance_saved, trips also count the trips per agent,
+# and deadline scheduling (src/deadlines.py) adds late-package counts
+OPTIONAL_COLUMNS = {
+    "distance_saved": "Distance_saved",
+    "trips": "Trips",
+    "late": "Late",
+    "max_lateness": "Max_lateness",
+}
+
+
+# Optional columns present in any agent's stats, in OPTIONAL_COLUMNS order
+def optional_columns(stats):
+    return [
+        key for key in OPTIONAL_COLUMNS
+        if any(key in data for data in stats.values())
+    ]
+
 
 # Generates report in JSON and CSV formats
 def generate_report(stats, json_path, csv_path):
@@ -19,27 +44,237 @@ def generate_report(stats, json_path, csv_path):
     with open(json_path, "w") as f:
         json.dump(final_report, f, indent=4)
 
+    columns = optional_columns(stats)
+
     # Save CSV report
     with open(csv_path, "w", newline="") as f:
         writer = csv.writer(f)
 
         # Write header
-        writer.writerow([
+        header = [
             "Agent",
             "Packages_delivered",
             "Total_distance",
             "Efficiency",
             "Status"
-        ])
+        ]
+        header.extend(OPTIONAL_COLUMNS[key] for key in columns)
+        writer.writerow(header)
 
         # Write each agent's stats
         for agent, data in stats.items():
             status = "best_agent" if agent == best_agent else ""
 
-            writer.writerow([
+            row = [
                 agent,
                 data["packages_delivered"],
                 data["total_distance"],
                 data["efficiency"],
                 status
-            ])
+            ]
+            row.extend(data.get(key, 0) for key in columns)
+            writer.writerow(row)
+
+
+# Generates the Monte Carlo report (see src/monte_carlo.py) in JSON and CSV formats
+def generate_monte_carlo_report(summary, json_path, csv_path):
+    agents = summary["agents"]
+
+    # Most frequent best agent across all replications
+    most_often_best = max(
+        agents, key=lambda a: agents[a]["best_agent_frequency"]
+    )
+
+    final_report = dict(summary)
+    final_report["most_often_best_agent"] = most_often_best
+
+    # Save JSON report
+    with open(json_path, "w") as f:
+        json.dump(final_report, f, indent=4)
+
+    # Save CSV report
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+
+        stats = ["Mean", "P50", "P95", "P99"]
+        writer.writerow(
+            ["Agent", "Packages_delivered"]
+            + [f"Total_distance_{s}" for s in stats]
+            + [f"Efficiency_{s}" for s in stats]
+            + ["Best_agent_frequency"]
+        )
+
+        # Write each agent's distribution summary
+        for agent, data in agents.items():
+            writer.writerow(
+                [agent, data["packages_delivered"]]
+                + list(data["total_distance"].values())
+                + list(data["efficiency"].values())
+                + [data["best_agent_frequency"]]
+            )
+
+
+# Multi-day report: per-day totals in the CSV, plus cumulative per-agent
+# stats and the remaining backlog in the JSON
+def generate_multi_day_report(result, json_path, csv_path):
+    agents = result["agents"]
+
+    # Best agent over the whole period (lowest efficiency, must have delivered)
+    best_agent = min(
+        agents,
+        key=lambda a: agents[a]["efficiency"]
+        if agents[a]["packages_delivered"] > 0 else float("inf")
+    ) if agents else None
+
+    final_report = dict(result)
+    final_report["best_agent"] = best_agent
+    final_report["totals"] = {
+        "days": len(result["days"]),
+        "packages_delivered": sum(day["delivered"] for day in result["days"]),
+        "total_distance": round(sum(day["total_distance"] for day in result["days"]), 2),
+    }
+
+    # Save JSON report
+    with open(json_path, "w") as f:
+        json.dump(final_report, f, indent=4)
+
+    # Save CSV report, one row per day
+    columns = [
+        "day", "label", "new_packages", "carried_over", "delivered",
+        "backlog", "total_distance", "mean_wait_days", "max_wait_days"
+    ]
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([column.capitalize() for column in columns])
+        for day in result["days"]:
+            writer.writerow([day[column] for column in columns])
+
+
+# Open a report file for text writing; gzip when asked or when the path ends in .gz.
+# Rows are small, so gzip output is buffered instead of compressing every write.
+def _open_text(path, compress):
+    if compress or path.endswith(".gz"):
+        raw = gzip.GzipFile(path, "wb", compresslevel=6)
+        return io.TextIOWrapper(io.BufferedWriter(raw, 1 << 16), newline="")
+    return open(path, "w", newline="")
+
+
+# Streaming report writer.
+#
+# Each agent's stats are written to the JSON and CSV files as they arrive and
+# only the top-k best / worst agents (by efficiency) are kept in memory, so
+# memory stays flat however many agents there are. The JSON keeps the layout
+# of generate_report ({agent_id: stats, ..., "best_agent": id}) plus
+# "best_agents" / "worst_agents" rankings; the CSV has no Status column since
+# the best agent is only known at the end. `columns` are the OPTIONAL_COLUMNS
+# keys to add to the CSV (known up front, e.g. optional_columns(stats)).
+class StreamingReport:
+    def __init__(self, json_path, csv_path, top_k=TOP_K, compress=False, compact=False,
+                 columns=()):
+        self.top_k = top_k
+        self.compact = compact
+        self.columns = list(columns)
+        self.count = 0
+        self.first_agent = None
+        self._members = 0
+        self._encode = json.JSONEncoder(
+            separators=(",", ":") if compact else None
+        ).encode
+
+        # Min-heaps of negated keys hold the k smallest (efficiency, arrival)
+        # for best and the k smallest (-efficiency, arrival) for worst
+        self._best = []
+        self._worst = []
+
+        self._json = _open_text(json_path, compress)
+        self._csv_file = _open_text(csv_path, compress)
+        self._csv = csv.writer(self._csv_file)
+
+        self._json.write("{")
+        self._csv.writerow([
+            "Agent",
+            "Packages_delivered",
+            "Total_distance",
+            "Efficiency"
+        ] + [OPTIONAL_COLUMNS[key] for key in self.columns])
+
+    # One "key": value member of the top-level JSON object (keys are always
+    # strings in JSON, as json.dump does for integer agent IDs)
+    def _write_member(self, key, value):
+        name = json.dumps(str(key))
+        if self.compact:
+            record = name + ":" + self._encode(value)
+        else:
+            record = "\n    " + name + ": " + self._encode(value)
+        self._json.write(("," if self._members else "") + record)
+        self._members += 1
+
+    def add(self, agent_id, data):
+        self._write_member(agent_id, data)
+
+        self._csv.writerow([
+            agent_id,
+            data["packages_delivered"],
+            data["total_distance"],
+            data["efficiency"]
+        ] + [data.get(key, 0) for key in self.columns])
+
+        if self.count == 0:
+            self.first_agent = agent_id
+
+        # Agents without packages are never ranked, like generate_report
+        if data["packages_delivered"] > 0 and self.top_k > 0:
+            efficiency = data["efficiency"]
+            self._keep(self._best, (-efficiency, -self.count, agent_id))
+            self._keep(self._worst, (efficiency, -self.count, agent_id))
+
+        self.count += 1
+
+    def _keep(self, heap, entry):
+        if len(heap) < self.top_k:
+            heapq.heappush(heap, entry)
+        else:
+            heapq.heappushpop(heap, entry)
+
+    # Rankings, best first / worst first, as [{"agent", "efficiency"}]
+    def rankings(self):
+        best = sorted(self._best, reverse=True)
+        worst = sorted(self._worst, reverse=True)
+        return (
+            [{"agent": a, "efficiency": -e} for e, _, a in best],
+            [{"agent": a, "efficiency": e} for e, _, a in worst],
+        )
+
+    # Finish both files; returns the summary written at the end of the JSON
+    def close(self):
+        best, worst = self.rankings()
+        summary = {
+            # Same fallback as generate_report when nobody delivered anything
+            "best_agent": best[0]["agent"] if best else self.first_agent,
+            "best_agents": best,
+            "worst_agents": worst,
+        }
+
+        for key, value in summary.items():
+            self._write_member(key, value)
+
+        self._json.write("}\n" if self.compact else "\n}\n")
+        self._json.close()
+        self._csv_file.close()
+        return summary
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if not self._json.closed:
+            self.close()
+
+
+# Stream (agent_id, stats) pairs, e.g. from iter_agent_stats, into a report
+def generate_report_stream(agent_stats, json_path, csv_path, top_k=TOP_K,
+                           compress=False, compact=False, columns=()):
+    with StreamingReport(json_path, csv_path, top_k, compress, compact, columns) as report:
+        for agent_id, data in agent_stats:
+            report.add(agent_id, data)
+        return report.close()
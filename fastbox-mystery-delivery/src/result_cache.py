@@ -0,0 +1,254 @@
+import os
+import json
+import hashlib
+import tempfile
+from itertools import islice
+from src.data_loader import normalize_locations
+
+# Bump when the layout of a cached payload changes. Code changes need no bump:
+# cache_key() folds in a digest of the src/ package, so entries written by
+# other code are never read.
+CACHE_VERSION = 3
+
+DEFAULT_CACHE_DIR = os.path.join("output", "cache")
+DEFAULT_CACHE_BYTES = 256 * 2**20
+
+# After an eviction the cache is trimmed to this share of its budget,
+# so back-to-back writes do not rescan the directory every time
+_LOW_WATER = 0.9
+
+_ENTRY_SUFFIX = ".json"
+
+# Packages encoded per hash update
+_HASH_BATCH = 4096
+
+
+# SHA-256 of the scenario in normalized form: warehouse / agent layouts and the
+# legacy "warehouse" package key hash the same, and key order never matters.
+# Packages are encoded in batches: far fewer encoder calls than one per package,
+# without building one string for the whole scenario.
+def scenario_digest(data):
+    digest = hashlib.sha256()
+    encoder = json.JSONEncoder(sort_keys=True, separators=(",", ":"))
+
+    header = {
+        key: value for key, value in data.items()
+        if key not in ("warehouses", "agents", "packages")
+    }
+    header["warehouses"] = normalize_locations(data["warehouses"])
+    header["agents"] = normalize_locations(data["agents"])
+    digest.update(encoder.encode(header).encode("utf-8"))
+
+    packages = iter(data["packages"])
+    while True:
+        batch = list(islice(packages, _HASH_BATCH))
+        if not batch:
+            break
+        if any("warehouse" in package for package in batch):
+            batch = [_normalized_package(package) for package in batch]
+        digest.update(encoder.encode(batch).encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def _normalized_package(package):
+    if "warehouse" not in package:
+        return package
+    package = dict(package)
+    package["warehouse_id"] = package.pop("warehouse")
+    return package
+
+
+# SHA-256 of a file's bytes (e.g. a road graph a run depends on)
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+_CODE_DIGEST = None
+
+
+# SHA-256 over the source files of the src/ package (computed once per process)
+def code_digest():
+    global _CODE_DIGEST
+    if _CODE_DIGEST is None:
+        digest = hashlib.sha256()
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(package_dir)):
+            if name.endswith(".py"):
+                digest.update(name.encode("utf-8"))
+                digest.update(file_digest(os.path.join(package_dir, name)).encode("ascii"))
+        _CODE_DIGEST = digest.hexdigest()
+    return _CODE_DIGEST
+
+
+# Cache key for one run: the scenario digest, the code digest and every
+# parameter that can change the result (engine names, seed, delay flag, ...).
+# A changed input, parameter or engine gives a new key, so stale entries are
+# never read; they simply age out of the LRU.
+def cache_key(data, **params):
+    key = json.dumps(
+        {"version": CACHE_VERSION, "code": code_digest(),
+         "scenario": scenario_digest(data), "params": params},
+        sort_keys=True
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+# Per-agent results are stored as [roster position, value] pairs and rebuilt
+# with the scenario's own agent IDs: JSON object keys are always strings, so
+# an integer ID would otherwise come back as "1"
+def encode_agents(values, agents):
+    position = {agent["id"]: i for i, agent in enumerate(agents)}
+    return [[position[agent_id], value] for agent_id, value in values.items()]
+
+
+def decode_agents(encoded, agents):
+    return {agents[i]["id"]: value for i, value in encoded}
+
+
+# Assignments are stored as package positions and rebuilt from the scenario,
+# so an entry holds no copy of the package records
+def encode_assignments(assignments, packages, agents):
+    position = {id(package): i for i, package in enumerate(packages)}
+    return encode_agents({
+        agent: [position[id(package)] for package in assigned]
+        for agent, assigned in assignments.items()
+    }, agents)
+
+
+def decode_assignments(encoded, packages, agents):
+    return {
+        agent: [packages[i] for i in positions]
+        for agent, positions in decode_agents(encoded, agents).items()
+    }
+
+
+# On-disk result cache: one JSON file per key, evicted least recently used
+# first once the directory grows past `max_bytes`. A hit refreshes the entry's
+# mtime, which is the LRU clock. Writes are atomic (temp file + rename), so
+# several processes can share one cache directory.
+#
+#   cache = ResultCache("output/cache")
+#   payload = cache.get(key)
+#   if payload is None:
+#       payload = compute()
+#       cache.put(key, payload)
+class ResultCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Bytes on disk as last seen by this process (None = not scanned yet)
+        self._bytes = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _ENTRY_SUFFIX)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                payload = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            # Missing, evicted by another process meanwhile, or half-written
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return payload
+
+    def put(self, key, payload):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(payload, f, separators=(",", ":"))
+            size = os.path.getsize(tmp)
+            # A replaced entry's bytes leave the cache with it
+            try:
+                size -= os.path.getsize(self._path(key))
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            # Unserializable payload, full disk, interrupt: leave no temp file behind
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+        if self._bytes is None:
+            self._bytes = self.size()
+        else:
+            self._bytes += size
+        if self._bytes > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(_ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    # Total bytes of all entries
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def __len__(self):
+        return len(self._entries())
+
+    # Drop least recently used entries until the cache is under its low-water mark
+    def evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * _LOW_WATER
+
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+        self._bytes = total
+        return removed
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._bytes = 0
+
+
+# Caches opened by this process, keyed by directory
+_OPEN_CACHES = {}
+
+
+# Shared ResultCache per directory, so a worker process handling many scenario
+# files keeps one size estimate instead of rescanning the directory per file
+def open_cache(directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_BYTES):
+    cache = _OPEN_CACHES.get(directory)
+    if cache is None:
+        cache = _OPEN_CACHES[directory] = ResultCache(directory, max_bytes)
+    cache.max_bytes = max_bytes
+    return cache
@@ -0,0 +1,197 @@
+import json
+import heapq
+from array import array
+from collections import OrderedDict
+from src.distance import euclidean_distance
+from src.spatial_index import GridIndex
+
+
+# Road graph in compressed sparse row form.
+#
+# Graph file (JSON):
+#   {"nodes": [[x, y], ...],
+#    "edges": [[u, v, length], ...],   # u, v are node positions; length optional
+#    "directed": false}
+# An edge without a length gets the straight-line length between its nodes.
+class RoadNetwork:
+    def __init__(self, nodes, edges, directed=False):
+        self.nodes = [tuple(node) for node in nodes]
+        self.directed = directed
+
+        n = len(self.nodes)
+        sources, targets, lengths = array("i"), array("i"), array("d")
+        for edge in edges:
+            u, v = edge[0], edge[1]
+            length = edge[2] if len(edge) > 2 else euclidean_distance(
+                self.nodes[u], self.nodes[v]
+            )
+            sources.append(u)
+            targets.append(v)
+            lengths.append(length)
+
+        if directed:
+            self.forward = self._csr(n, sources, targets, lengths)
+            self.backward = self._csr(n, targets, sources, lengths)
+        else:
+            self.forward = self._csr(
+                n, sources + targets, targets + sources, lengths + lengths
+            )
+            self.backward = self.forward
+
+        # Nearest node lookup for snapping coordinates onto the graph
+        self.index = GridIndex(self.nodes)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            graph = json.load(f)
+        return cls(graph["nodes"], graph["edges"], graph.get("directed", False))
+
+    # (offsets, targets, lengths): edges of node u are offsets[u]:offsets[u + 1]
+    @staticmethod
+    def _csr(n, sources, targets, lengths):
+        offsets = [0] * (n + 1)
+        for u in sources:
+            offsets[u + 1] += 1
+        for u in range(n):
+            offsets[u + 1] += offsets[u]
+
+        slot = offsets[:-1]
+        csr_targets = array("i", bytes(4 * len(sources)))
+        csr_lengths = array("d", bytes(8 * len(sources)))
+        for u, v, length in zip(sources, targets, lengths):
+            e = slot[u]
+            csr_targets[e] = v
+            csr_lengths[e] = length
+            slot[u] = e + 1
+
+        return offsets, csr_targets, csr_lengths
+
+    def __len__(self):
+        return len(self.nodes)
+
+    # Nearest node to a coordinate
+    def snap(self, point):
+        return self.index.nearest(point)
+
+    # Shortest path lengths from `source` to every node (or to `source` with reverse=True)
+    def shortest_paths(self, source, reverse=False):
+        offsets, targets, lengths = self.backward if reverse else self.forward
+        dist = [float("inf")] * len(self.nodes)
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        pop, push = heapq.heappop, heapq.heappush
+
+        while heap:
+            d, u = pop(heap)
+            if d > dist[u]:
+                continue
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                nd = d + lengths[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    push(heap, (nd, v))
+
+        return array("d", dist)
+
+
+# On-demand shortest-path tables kept besides the precomputed ones; a table
+# is one float per node, so 32 tables of a 1M-node graph take 256 MB
+DEFAULT_MAX_TABLES = 32
+
+# Snapped coordinates remembered besides the precomputed points
+DEFAULT_MAX_SNAPPED = 1 << 20
+
+
+# Road distance provider, a drop-in for euclidean_distance(p1, p2).
+#
+# Both points are snapped to their nearest node; the distance is the walk to
+# the node, the shortest path between the nodes, and the walk from the node.
+# precompute() builds the tables to and from the warehouses up front and keeps
+# them, so every warehouse-anchored lookup (agent -> warehouse, warehouse ->
+# destination, destination -> next warehouse) is O(1). Any other pair runs a
+# shortest-path search whose table joins an LRU of `max_tables`, and snapped
+# coordinates are bounded the same way, so memory stays flat however many
+# distinct points a run asks about.
+class RoadDistance:
+    def __init__(self, network, max_tables=DEFAULT_MAX_TABLES, max_snapped=DEFAULT_MAX_SNAPPED):
+        self.network = network
+        self.max_tables = max_tables
+        self.max_snapped = max_snapped
+        # Precomputed points / tables, never evicted
+        self._pinned_snaps = {}
+        self._pinned = {}
+        # On-demand entries, least recently used first
+        self._snapped = OrderedDict()
+        # (node, reverse) -> distance table
+        self._tables = OrderedDict()
+
+    def _snap(self, point):
+        key = (point[0], point[1])
+        snapped = self._pinned_snaps.get(key)
+        if snapped is not None:
+            return snapped
+
+        snapped = self._snapped.get(key)
+        if snapped is not None:
+            self._snapped.move_to_end(key)
+            return snapped
+
+        node = self.network.snap(point)
+        snapped = (node, euclidean_distance(point, self.network.nodes[node]))
+        self._snapped[key] = snapped
+        if len(self._snapped) > self.max_snapped:
+            self._snapped.popitem(last=False)
+        return snapped
+
+    # Table key: undirected graphs share one table per node for both directions
+    def _key(self, node, reverse):
+        return (node, reverse and self.network.directed)
+
+    def _cached(self, key):
+        table = self._pinned.get(key)
+        if table is None:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+        return table
+
+    def _table(self, node, reverse):
+        key = self._key(node, reverse)
+        table = self._cached(key)
+        if table is None:
+            table = self.network.shortest_paths(node, reverse)
+            self._tables[key] = table
+            if len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
+        return table
+
+    # Build and keep the tables to and from every point (e.g. all warehouses)
+    def precompute(self, points):
+        for point in points:
+            key = (point[0], point[1])
+            self._pinned_snaps[key] = self._snap(point)
+            self._snapped.pop(key, None)
+
+            node = self._pinned_snaps[key][0]
+            for reverse in (False, True):
+                table_key = self._key(node, reverse)
+                if table_key in self._pinned:
+                    continue
+                table = self._tables.pop(table_key, None)
+                if table is None:
+                    table = self.network.shortest_paths(node, reverse)
+                self._pinned[table_key] = table
+
+    def __call__(self, p1, p2):
+        n1, walk1 = self._snap(p1)
+        n2, walk2 = self._snap(p2)
+        if n1 == n2:
+            return euclidean_distance(p1, p2)
+
+        # Prefer a cached table at either end before running a new search
+        table = self._cached(self._key(n2, True))
+        if table is not None:
+            return walk1 + table[n1] + walk2
+        return walk1 + self._table(n1, False)[n2] + walk2
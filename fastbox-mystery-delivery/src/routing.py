@@ -0,0 +1,197 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.distance import euclidean_distance, scenario_distance, search_metric
+
+# Seconds of improvement search allowed per agent by default
+DEFAULT_TIME_BUDGET = 1.0
+
+# Longest segment moved in one Or-opt move
+OR_OPT_SEGMENT = 3
+
+
+# Distance of a route in simulate_deliveries' model:
+# current -> warehouse -> destination for each job in turn
+def route_distance(start, jobs, order, distance=euclidean_distance):
+    total = 0.0
+    position = start
+    for i in order:
+        pickup, dropoff = jobs[i]
+        total += distance(position, pickup)
+        total += distance(pickup, dropoff)
+        position = dropoff
+    return total
+
+
+# Nearest-neighbour construction.
+# Always go to the nearest warehouse that still has packages; within a
+# warehouse, deliver the closest destinations first so the agent comes back
+# quickly and the farthest one is left for last.
+def nearest_neighbour_order(start, jobs, distance=euclidean_distance):
+    metric = search_metric(distance)
+    by_pickup = {}
+    for i, (pickup, dropoff) in enumerate(jobs):
+        by_pickup.setdefault(tuple(pickup), []).append(i)
+
+    for pickup, queue in by_pickup.items():
+        queue.sort(key=lambda i: metric(pickup, jobs[i][1]), reverse=True)
+
+    order = []
+    position = start
+    while by_pickup:
+        pickup = min(by_pickup, key=lambda p: metric(position, p))
+        queue = by_pickup[pickup]
+        i = queue.pop()
+        if not queue:
+            del by_pickup[pickup]
+
+        order.append(i)
+        position = jobs[i][1]
+
+    return order
+
+
+# Improve an order with Or-opt (move a short segment elsewhere) and 2-opt
+# (reverse a segment) until no move helps or the time budget runs out.
+# Job j enters at its pickup and leaves at its dropoff, so the cost of
+# going from job a to job b is dist(dropoff_a, pickup_b).
+def improve_order(start, jobs, order, time_budget, distance=euclidean_distance):
+    metric = search_metric(distance)
+    deadline = time.perf_counter() + time_budget
+    order = list(order)
+    n = len(order)
+
+    def link(a, b):
+        # a == -1 is the agent's start position; b == -1 is "end of route"
+        if b == -1:
+            return 0.0
+        origin = start if a == -1 else jobs[a][1]
+        return metric(origin, jobs[b][0])
+
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+
+        # Or-opt: move order[i:i+length] between order[p] and order[p+1]
+        for length in range(1, OR_OPT_SEGMENT + 1):
+            i = 0
+            while i + length <= n:
+                if time.perf_counter() >= deadline:
+                    return order
+
+                first, last = order[i], order[i + length - 1]
+                prev = order[i - 1] if i > 0 else -1
+                nxt = order[i + length] if i + length < n else -1
+                removed = link(prev, first) + link(last, nxt) - link(prev, nxt)
+
+                best_delta, best_p = -1e-9, None
+                for p in range(-1, n):
+                    if i - 1 <= p < i + length:
+                        continue
+                    a = order[p] if p >= 0 else -1
+                    b = order[p + 1] if p + 1 < n else -1
+                    delta = link(a, first) + link(last, b) - link(a, b) - removed
+                    if delta < best_delta:
+                        best_delta, best_p = delta, p
+
+                if best_p is not None:
+                    segment = order[i:i + length]
+                    rest = order[:i] + order[i + length:]
+                    at = best_p + 1 if best_p < i else best_p + 1 - length
+                    order = rest[:at] + segment + rest[at:]
+                    improved = True
+                else:
+                    i += 1
+
+        # 2-opt: reverse order[i..k]; prefix sums make each delta O(1)
+        forward = [0.0]
+        backward = [0.0]
+        for t in range(n - 1):
+            forward.append(forward[-1] + link(order[t], order[t + 1]))
+            backward.append(backward[-1] + link(order[t + 1], order[t]))
+
+        for i in range(n - 1):
+            if time.perf_counter() >= deadline:
+                return order
+
+            prev = order[i - 1] if i > 0 else -1
+            for k in range(i + 1, n):
+                nxt = order[k + 1] if k + 1 < n else -1
+                delta = (
+                    link(prev, order[k]) + link(order[i], nxt)
+                    + (backward[k] - backward[i])
+                    - link(prev, order[i]) - link(order[k], nxt)
+                    - (forward[k] - forward[i])
+                )
+                if delta < -1e-9:
+                    order[i:k + 1] = reversed(order[i:k + 1])
+                    improved = True
+                    break
+            else:
+                continue
+            break
+
+    return order
+
+
+# Plan one agent's route; returns (order, distance_before, distance_after)
+def plan_route(start, jobs, time_budget=DEFAULT_TIME_BUDGET, distance=euclidean_distance):
+    original = list(range(len(jobs)))
+    before = route_distance(start, jobs, original, distance)
+
+    order = improve_order(
+        start, jobs, nearest_neighbour_order(start, jobs, distance), time_budget, distance
+    )
+    after = route_distance(start, jobs, order, distance)
+
+    # Never hand back a route worse than the input order
+    if after >= before:
+        return original, before, before
+    return order, before, after
+
+
+def _plan_route_task(args):
+    return plan_route(*args)
+
+
+# Reorder every agent's packages to shorten its route.
+# Agents are planned over `workers` processes (0 / None = one per CPU).
+# Returns (optimized assignments, {agent_id: distance saved}).
+def optimize_routes(assignments, data, time_budget=DEFAULT_TIME_BUDGET, workers=1):
+    distance = scenario_distance(data)
+    warehouse_map = {
+        wh["id"]: wh["location"] for wh in data["warehouses"]
+    }
+    agent_map = {
+        agent["id"]: agent["location"] for agent in data["agents"]
+    }
+
+    agent_ids = list(assignments)
+    tasks = [
+        (
+            agent_map[agent_id],
+            [
+                (warehouse_map[p["warehouse_id"]], p["destination"])
+                for p in assignments[agent_id]
+            ],
+            time_budget,
+            distance
+        )
+        for agent_id in agent_ids
+    ]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        plans = list(map(_plan_route_task, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            plans = list(pool.map(_plan_route_task, tasks))
+
+    optimized = {}
+    savings = {}
+    for agent_id, (order, before, after) in zip(agent_ids, plans):
+        packages = assignments[agent_id]
+        optimized[agent_id] = [packages[i] for i in order]
+        savings[agent_id] = before - after
+
+    return optimized, savings
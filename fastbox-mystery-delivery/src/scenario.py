@@ -0,0 +1,276 @@
+from array import array
+from src.data_loader import normalize_locations, normalize_package
+
+# Keys stored in the typed arrays; anything else on a record is kept in `extras`
+_LOCATION_KEYS = ("id", "location")
+_PACKAGE_KEYS = ("id", "warehouse_id", "destination")
+
+
+# Read-only view of one warehouse / agent (dict-style access for existing code)
+class LocationView:
+    __slots__ = ("_ids", "_xy", "_extras", "_i")
+
+    def __init__(self, ids, xy, extras, i):
+        self._ids = ids
+        self._xy = xy
+        self._extras = extras
+        self._i = i
+
+    @property
+    def id(self):
+        return self._ids[self._i]
+
+    @property
+    def location(self):
+        return [self._xy[2 * self._i], self._xy[2 * self._i + 1]]
+
+    def __getitem__(self, key):
+        if key == "id":
+            return self.id
+        if key == "location":
+            return self.location
+        return self._extras.get(self._i, {})[key]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+# Read-only view of one package (dict-style access for existing code)
+class PackageView:
+    __slots__ = ("_scenario", "_i")
+
+    def __init__(self, scenario, i):
+        self._scenario = scenario
+        self._i = i
+
+    @property
+    def id(self):
+        return self._scenario.package_ids[self._i]
+
+    @property
+    def warehouse_id(self):
+        return self._scenario.warehouse_ids[self._scenario.package_warehouse[self._i]]
+
+    @property
+    def destination(self):
+        xy = self._scenario.package_xy
+        return [xy[2 * self._i], xy[2 * self._i + 1]]
+
+    def __getitem__(self, key):
+        if key == "id":
+            return self.id
+        if key == "warehouse_id":
+            return self.warehouse_id
+        if key == "destination":
+            return self.destination
+        return self._scenario.package_extras.get(self._i, {})[key]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+# Flat positions of one coordinate buffer whose whole-number value was given as
+# a float. While all whole numbers share one type only that type is kept; the
+# first mismatch switches to a bitmap (1 bit per coordinate, unset bytes read as
+# the earlier type). Positions holding fractions are never looked up.
+class WholeFloats:
+    __slots__ = ("uniform", "bits")
+
+    def __init__(self):
+        self.uniform = None
+        self.bits = None
+
+    def note(self, start, point):
+        for k, value in enumerate(point):
+            if not isinstance(value, float):
+                self._set(start + k, False)
+            elif value.is_integer():
+                self._set(start + k, True)
+
+    def _set(self, j, whole_float):
+        if self.bits is None:
+            if self.uniform is None:
+                self.uniform = whole_float
+            if whole_float == self.uniform:
+                return
+            self.bits = bytearray()
+
+        byte = j >> 3
+        if byte >= len(self.bits):
+            fill = b"\xff" if self.uniform else b"\x00"
+            self.bits.extend(fill * (byte + 1 - len(self.bits)))
+        if whole_float:
+            self.bits[byte] |= 1 << (j & 7)
+        else:
+            self.bits[byte] &= ~(1 << (j & 7))
+
+    def __contains__(self, j):
+        if self.bits is None or j >> 3 >= len(self.bits):
+            return bool(self.uniform)
+        return bool(self.bits[j >> 3] >> (j & 7) & 1)
+
+
+# Compact scenario: IDs interned to integer codes, coordinates in typed arrays.
+# Coordinates are stored flat as x0, y0, x1, y1, ...
+class Scenario:
+    __slots__ = (
+        "warehouse_ids", "warehouse_xy", "warehouse_extras", "warehouse_code",
+        "agent_ids", "agent_xy", "agent_extras",
+        "package_ids", "package_warehouse", "package_xy", "package_extras",
+        "whole_floats", "extras",
+    )
+
+    def __init__(self):
+        self.warehouse_ids = []
+        self.warehouse_xy = array("d")
+        self.warehouse_extras = {}
+        self.warehouse_code = {}
+
+        self.agent_ids = []
+        self.agent_xy = array("d")
+        self.agent_extras = {}
+
+        self.package_ids = []
+        self.package_warehouse = array("i")
+        self.package_xy = array("d")
+        # Only packages with extra fields get an entry (sparse)
+        self.package_extras = {}
+
+        # Whole-number coordinates per buffer that were given as floats (5.0):
+        # the arrays hold doubles, and to_dict() returns every other whole
+        # number as an int, so both kinds round-trip with their type
+        self.whole_floats = {
+            "warehouse": WholeFloats(), "agent": WholeFloats(), "package": WholeFloats()
+        }
+
+        # Top-level keys other than warehouses / agents / packages
+        self.extras = {}
+
+    # Build from the dict schema (either warehouse/agent layout, either package key).
+    # `data["packages"]` may be any iterable, including a streamed PackageStream.
+    @classmethod
+    def from_dict(cls, data):
+        scenario = cls()
+
+        for key, value in data.items():
+            if key not in ("warehouses", "agents", "packages"):
+                scenario.extras[key] = value
+
+        for wh in normalize_locations(data["warehouses"]):
+            scenario.add_warehouse(wh)
+
+        for agent in normalize_locations(data["agents"]):
+            scenario.add_agent(agent)
+
+        for package in data["packages"]:
+            scenario.add_package(normalize_package(package))
+
+        return scenario
+
+    def add_warehouse(self, wh):
+        # A repeated ID overrides the earlier location, like the dict lookups do
+        code = self.warehouse_code.get(wh["id"])
+        if code is None:
+            code = len(self.warehouse_ids)
+            self.warehouse_code[wh["id"]] = code
+            self.warehouse_ids.append(wh["id"])
+            self.warehouse_xy.extend(wh["location"])
+        else:
+            self.warehouse_xy[2 * code:2 * code + 2] = array("d", wh["location"])
+        self.whole_floats["warehouse"].note(2 * code, wh["location"])
+
+        extra = _extra_fields(wh, _LOCATION_KEYS)
+        if extra:
+            self.warehouse_extras[code] = extra
+
+    def add_agent(self, agent):
+        i = len(self.agent_ids)
+        self.agent_ids.append(agent["id"])
+        self.agent_xy.extend(agent["location"])
+        self.whole_floats["agent"].note(2 * i, agent["location"])
+
+        extra = _extra_fields(agent, _LOCATION_KEYS)
+        if extra:
+            self.agent_extras[i] = extra
+
+    def add_package(self, package):
+        i = len(self.package_ids)
+        self.package_ids.append(package["id"])
+        self.package_warehouse.append(self.warehouse_code[package["warehouse_id"]])
+        self.package_xy.extend(package["destination"])
+        self.whole_floats["package"].note(2 * i, package["destination"])
+
+        extra = _extra_fields(package, _PACKAGE_KEYS)
+        if extra:
+            self.package_extras[i] = extra
+
+    @property
+    def warehouses(self):
+        return [
+            LocationView(self.warehouse_ids, self.warehouse_xy, self.warehouse_extras, i)
+            for i in range(len(self.warehouse_ids))
+        ]
+
+    @property
+    def agents(self):
+        return [
+            LocationView(self.agent_ids, self.agent_xy, self.agent_extras, i)
+            for i in range(len(self.agent_ids))
+        ]
+
+    # Packages are exposed lazily; nothing is materialized up front
+    def packages(self):
+        for i in range(len(self.package_ids)):
+            yield PackageView(self, i)
+
+    def __len__(self):
+        return len(self.package_ids)
+
+    # Convert back to the dict schema (list layout, "warehouse_id" packages)
+    def to_dict(self):
+        data = dict(self.extras)
+        data["warehouses"] = [
+            _record({"id": wid, "location": self._point("warehouse", self.warehouse_xy, i)},
+                    self.warehouse_extras.get(i))
+            for i, wid in enumerate(self.warehouse_ids)
+        ]
+        data["agents"] = [
+            _record({"id": aid, "location": self._point("agent", self.agent_xy, i)},
+                    self.agent_extras.get(i))
+            for i, aid in enumerate(self.agent_ids)
+        ]
+        data["packages"] = [
+            _record({
+                "id": pid,
+                "warehouse_id": self.warehouse_ids[self.package_warehouse[i]],
+                "destination": self._point("package", self.package_xy, i)
+            }, self.package_extras.get(i))
+            for i, pid in enumerate(self.package_ids)
+        ]
+        return data
+
+    # Coordinates with their input type: whole numbers come back as ints
+    # unless they were given as floats
+    def _point(self, kind, xy, i):
+        whole_floats = self.whole_floats[kind]
+        return [_number(xy[j], j in whole_floats) for j in (2 * i, 2 * i + 1)]
+
+
+def _extra_fields(record, known):
+    return {k: v for k, v in record.items() if k not in known}
+
+
+def _record(base, extra):
+    if extra:
+        base.update(extra)
+    return base
+
+
+def _number(value, whole_float=False):
+    return int(value) if value.is_integer() and not whole_float else value
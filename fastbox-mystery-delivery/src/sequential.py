@@ -0,0 +1,125 @@
+import json
+import math
+import argparse
+from src.data_loader import load_data, normalize_locations, normalize_package
+from src.distance import coordinate_system, scenario_distance
+from src.spatial_index import GridIndex, LinearIndex
+from src.assignment import assign_packages_to_agents
+from src.simulation import simulate_deliveries
+
+# Orders packages can be dispatched in
+DISPATCH_ORDERS = ("arrival", "priority")
+
+
+# Packages in dispatch order: input order, or ascending `priority` (1 before 2;
+# packages without one go last, ties keep input order)
+def dispatch_order(packages, order="arrival"):
+    if order == "arrival":
+        return packages
+    if order == "priority":
+        return sorted(packages, key=lambda p: p.get("priority", math.inf))
+    raise ValueError(f"Unknown dispatch order: {order}")
+
+
+# Grid cell for moving agents: about one agent per cell over the whole area
+# they can reach (their starts, the warehouses and every destination)
+def _cell_size(agent_points, warehouse_points, packages):
+    points = list(agent_points) + list(warehouse_points)
+    xs = [p[0] for p in points] + [p["destination"][0] for p in packages]
+    ys = [p[1] for p in points] + [p["destination"][1] for p in packages]
+    area = max(max(xs) - min(xs), 1.0) * max(max(ys) - min(ys), 1.0)
+    return math.sqrt(area / len(agent_points))
+
+
+# Sequential greedy dispatch against moving agents.
+#
+# Packages are dispatched one at a time (see dispatch_order). Each goes to the
+# agent whose projected position -- where its last assigned delivery ends --
+# is nearest to the package's warehouse, and that agent moves on to the
+# package's destination. The warehouse -> destination leg is the same for
+# every agent, so this is the agent that adds the least distance. Agents live
+# in a GridIndex that is updated after every decision, so each decision only
+# searches the cells around the warehouse (ties go to the earliest agent).
+# Geographic coordinates and custom distances (e.g. RoadDistance) fall back to
+# a linear scan.
+#
+# Returns {agent_id: [package, ...]} in delivery order, like the other engines.
+def assign_packages_sequential(data, order="arrival", distance=None):
+    agents = data["agents"]
+    warehouse_map = {
+        wh["id"]: wh["location"] for wh in data["warehouses"]
+    }
+
+    agent_ids = [agent["id"] for agent in agents]
+    assignments = {agent_id: [] for agent_id in agent_ids}
+    packages = dispatch_order(data["packages"], order)
+    if not agents or not packages:
+        return assignments
+
+    agent_points = [agent["location"] for agent in agents]
+    if distance is None and coordinate_system(data) == "planar":
+        index = GridIndex(
+            agent_points, _cell_size(agent_points, warehouse_map.values(), packages)
+        )
+    else:
+        index = LinearIndex(agent_points, distance or scenario_distance(data))
+
+    for package in packages:
+        agent = index.nearest(warehouse_map[package["warehouse_id"]])
+        assignments[agent_ids[agent]].append(package)
+        index.move(agent, package["destination"])
+
+    return assignments
+
+
+# Compare sequential assignments with the static nearest-agent baseline.
+# Both are simulated without delays; returns totals and per-agent figures.
+def compare_dispatch(assignments, data, distance=None):
+    baseline = assign_packages_to_agents(data, distance=distance)
+    static_stats = simulate_deliveries(baseline, data, distance=distance)
+    sequential_stats = simulate_deliveries(assignments, data, distance=distance)
+
+    static_total = sum(s["total_distance"] for s in static_stats.values())
+    sequential_total = sum(s["total_distance"] for s in sequential_stats.values())
+
+    return {
+        "static_distance": round(static_total, 2),
+        "sequential_distance": round(sequential_total, 2),
+        "distance_saved": round(static_total - sequential_total, 2),
+        "agents": {
+            agent_id: {
+                "static_packages": static_stats[agent_id]["packages_delivered"],
+                "static_distance": static_stats[agent_id]["total_distance"],
+                "sequential_packages": sequential_stats[agent_id]["packages_delivered"],
+                "sequential_distance": sequential_stats[agent_id]["total_distance"],
+            }
+            for agent_id in static_stats
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sequential dispatch against moving agents vs static assignment"
+    )
+    parser.add_argument("input", help="scenario file")
+    parser.add_argument("--order", choices=DISPATCH_ORDERS, default="arrival")
+    parser.add_argument("--output", default=None, help="write the comparison as JSON")
+    args = parser.parse_args()
+
+    data = load_data(args.input)
+    data["warehouses"] = normalize_locations(data["warehouses"])
+    data["agents"] = normalize_locations(data["agents"])
+    data["packages"] = [normalize_package(p) for p in data["packages"]]
+
+    comparison = compare_dispatch(assign_packages_sequential(data, args.order), data)
+    print(f"Static: {comparison['static_distance']}  "
+          f"Sequential ({args.order}): {comparison['sequential_distance']}  "
+          f"Saved: {comparison['distance_saved']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(comparison, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import os
+import math
+import random
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from src.distance import coordinate_system, euclidean_distance, np
+from src.spatial_index import KDTreeIndex
+from src.binary_scenario import load_binary
+
+# Halo width around a tile, in typical agent spacings (sqrt(area / agents))
+HALO_SPACINGS = 2.0
+
+# State of one worker process, set once by _init_worker
+_WORKER = {}
+
+
+# Split points into `n_tiles` tiles by recursive k-d cuts, balancing `weights`.
+# Returns [(bounds, members)]: bounds are [x0, y0, x1, y1] (outer edges are
+# infinite, so the tiles cover the whole plane) and members are point positions.
+def kd_tiles(points, weights, n_tiles):
+    inf = float("inf")
+    tiles = []
+
+    def split(members, bounds, n):
+        if n <= 1 or len(members) <= 1:
+            tiles.append((bounds, members))
+            return
+
+        # Cut across the axis with the widest spread
+        xs = [points[i][0] for i in members]
+        ys = [points[i][1] for i in members]
+        axis = 0 if max(xs) - min(xs) >= max(ys) - min(ys) else 1
+        members = sorted(members, key=lambda i: points[i][axis])
+
+        # First cut position where the left side holds its share of the weight
+        n_left = n // 2
+        target = sum(weights[i] for i in members) * n_left / n
+        k, acc = 1, weights[members[0]]
+        while k < len(members) - 1 and acc + weights[members[k]] <= target:
+            acc += weights[members[k]]
+            k += 1
+
+        cut = (points[members[k - 1]][axis] + points[members[k]][axis]) / 2
+        left, right = list(bounds), list(bounds)
+        left[axis + 2] = cut
+        right[axis] = cut
+        split(members[:k], left, n_left)
+        split(members[k:], right, n - n_left)
+
+    split(list(range(len(points))), [-inf, -inf, inf, inf], n_tiles)
+    return tiles
+
+
+# Agent positions within `halo` of a tile's bounds (in roster order)
+def halo_agents(agent_points, bounds, halo):
+    x0, y0, x1, y1 = bounds
+    return [
+        i for i, (x, y) in enumerate(agent_points)
+        if x0 - halo <= x <= x1 + halo and y0 - halo <= y <= y1 + halo
+    ]
+
+
+# Halo width from the agents' density
+def default_halo(agent_points):
+    if len(agent_points) < 2:
+        return float("inf")
+    xs = [p[0] for p in agent_points]
+    ys = [p[1] for p in agent_points]
+    area = max(max(xs) - min(xs), 1.0) * max(max(ys) - min(ys), 1.0)
+    return HALO_SPACINGS * math.sqrt(area / len(agent_points))
+
+
+def _points(xy):
+    return [(xy[2 * i], xy[2 * i + 1]) for i in range(len(xy) // 2)]
+
+
+# Worker setup: warehouses / agents come from the parent (small); packages are
+# memory-mapped from a binary scenario when there is one (pages shared by all
+# workers), otherwise the parent's typed arrays are shipped once per worker.
+def _init_worker(warehouse_xy, agent_xy, packages):
+    if isinstance(packages, str):
+        scenario = load_binary(packages)
+        packages = (scenario.package_warehouse, scenario.package_xy)
+
+    _WORKER["warehouse_xy"] = warehouse_xy
+    _WORKER["agent_points"] = _points(agent_xy)
+    _WORKER["package_warehouse"], _WORKER["package_xy"] = packages
+    _WORKER["all_agents"] = None
+
+
+# Phase 1: nearest agent for one tile's warehouses, searching the tile's own
+# and halo agents. Any agent outside the halo is more than `halo` away, so a
+# candidate within `halo` is exact (ties included); otherwise the warehouse
+# falls back to a search over every agent.
+def _assign_tile(task):
+    bounds, warehouse_codes, halo = task
+    agent_points = _WORKER["agent_points"]
+    warehouse_xy = _WORKER["warehouse_xy"]
+
+    candidates = halo_agents(agent_points, bounds, halo)
+    index = KDTreeIndex([agent_points[i] for i in candidates]) if candidates else None
+
+    nearest = []
+    fallbacks = 0
+    for code in warehouse_codes:
+        point = (warehouse_xy[2 * code], warehouse_xy[2 * code + 1])
+        agent = None
+        if index is not None:
+            i = index.nearest(point)
+            if euclidean_distance(index.points[i], point) <= halo:
+                agent = candidates[i]
+
+        if agent is None:
+            if _WORKER["all_agents"] is None:
+                _WORKER["all_agents"] = KDTreeIndex(agent_points)
+            agent = _WORKER["all_agents"].nearest(point)
+            fallbacks += 1
+        nearest.append((code, agent))
+
+    return nearest, fallbacks
+
+
+# Positions of the packages whose warehouse is flagged in `selected`
+def _select_packages(package_warehouse, selected):
+    if np is not None:
+        codes = np.frombuffer(package_warehouse, dtype=np.int32)
+        mask = np.frombuffer(bytes(selected), dtype=np.uint8)[codes]
+        return np.flatnonzero(mask).tolist()
+    return [i for i, code in enumerate(package_warehouse) if selected[code]]
+
+
+# Phase 2: simulate one shard of agents over all of their packages, in input
+# order, with the same arithmetic as simulate_scenario
+def _simulate_shard(task):
+    number, shard, agent_of_warehouse, enable_delay, seed = task
+    warehouse_xy = _WORKER["warehouse_xy"]
+    package_warehouse = _WORKER["package_warehouse"]
+    package_xy = _WORKER["package_xy"]
+    agent_points = _WORKER["agent_points"]
+
+    members = set(shard)
+    selected = bytearray(
+        1 if agent in members else 0 for agent in agent_of_warehouse
+    )
+
+    # Each shard draws its delays from its own seeded stream
+    rng = random.Random(None if seed is None else seed + number)
+    positions = {agent: agent_points[agent] for agent in shard}
+    totals = dict.fromkeys(shard, 0.0)
+    delivered = dict.fromkeys(shard, 0)
+
+    for i in _select_packages(package_warehouse, selected):
+        code = package_warehouse[i]
+        agent = agent_of_warehouse[code]
+        warehouse_pos = (warehouse_xy[2 * code], warehouse_xy[2 * code + 1])
+        destination_pos = (package_xy[2 * i], package_xy[2 * i + 1])
+
+        totals[agent] += euclidean_distance(positions[agent], warehouse_pos)
+        totals[agent] += euclidean_distance(warehouse_pos, destination_pos)
+
+        # Random delivery delay
+        if enable_delay and rng.random() < 0.2:  # 20% chance
+            totals[agent] += rng.uniform(1, 5)
+
+        positions[agent] = destination_pos
+        delivered[agent] += 1
+
+    return {agent: (totals[agent], delivered[agent]) for agent in shard}
+
+
+def _warehouse_loads(package_warehouse, n_warehouses):
+    if np is not None:
+        codes = np.frombuffer(package_warehouse, dtype=np.int32)
+        return np.bincount(codes, minlength=n_warehouses).tolist()
+    loads = [0] * n_warehouses
+    for code in package_warehouse:
+        loads[code] += 1
+    return loads
+
+
+# Assign and simulate a compact Scenario in spatial shards across processes.
+#
+# Phase 1 cuts the plane into k-d tiles of warehouses; each worker finds the
+# nearest agent for its tile's warehouses from the tile's own agents plus a
+# halo of agents just across its border (exact, see _assign_tile).
+# Phase 2 cuts the agents into k-d tiles balanced by package load; each worker
+# picks out the packages of its agents and simulates them, so every agent's
+# route stays inside one process. Per-shard stats are merged in roster order.
+#
+# Without delays the result equals simulate_scenario(scenario, assign_scenario(scenario)).
+# With delays each shard draws from its own seeded stream, so results depend on
+# `shards`. Pass `binary_path` for scenarios opened with load_binary: workers
+# then map the package files themselves instead of receiving copies.
+def simulate_sharded(scenario, shards=None, workers=None, enable_delay=False,
+                     seed=None, binary_path=None, halo=None):
+    if coordinate_system(scenario) != "planar":
+        raise ValueError("Sharded simulation needs planar coordinates")
+
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers
+    n_warehouses = len(scenario.warehouse_ids)
+    n_agents = len(scenario.agent_ids)
+
+    warehouse_xy = array("d", scenario.warehouse_xy)
+    agent_xy = array("d", scenario.agent_xy)
+    agent_points = _points(agent_xy)
+    if halo is None:
+        halo = default_halo(agent_points)
+
+    packages = binary_path or (scenario.package_warehouse, scenario.package_xy)
+    loads = _warehouse_loads(scenario.package_warehouse, n_warehouses)
+    init_args = (warehouse_xy, agent_xy, packages)
+
+    if workers == 1:
+        _init_worker(*init_args)
+        run = map
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=init_args
+        )
+        run = pool.map
+
+    try:
+        # Phase 1: warehouses -> nearest agent, per warehouse tile
+        agent_of_warehouse = array("i", [0] * n_warehouses)
+        if n_agents:
+            tiles = kd_tiles(_points(warehouse_xy), [load + 1 for load in loads], shards)
+            for nearest, _ in run(_assign_tile, [
+                (bounds, members, halo) for bounds, members in tiles
+            ]):
+                for code, agent in nearest:
+                    agent_of_warehouse[code] = agent
+
+        # Phase 2: simulate per agent tile, balanced by package load
+        agent_loads = [0] * n_agents
+        for code, load in enumerate(loads):
+            if n_agents:
+                agent_loads[agent_of_warehouse[code]] += load
+        agent_tiles = kd_tiles(agent_points, [load + 1 for load in agent_loads], shards)
+
+        results = {}
+        for shard_result in run(_simulate_shard, [
+            (number, members, agent_of_warehouse, enable_delay, seed)
+            for number, (_, members) in enumerate(agent_tiles) if members
+        ]):
+            results.update(shard_result)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    report = {}
+    for agent, agent_id in enumerate(scenario.agent_ids):
+        total_distance, count = results[agent]
+        efficiency = total_distance / count if count else 0
+
+        report[agent_id] = {
+            "packages_delivered": count,
+            "total_distance": round(total_distance, 2),
+            "efficiency": round(efficiency, 2)
+        }
+
+    return report
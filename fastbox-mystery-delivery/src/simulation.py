@@ -1,11 +1,22 @@
 import random
-from src.distance import euclidean_distance
+from src.distance import scenario_distance
+from src.assignment import iter_assignments
 
 
-# Simulate deliveries based on assignments and data
-def simulate_deliveries(assignments, data, enable_delay=False):
+# Simulate deliveries based on assignments and data.
+# `distance` defaults to the scenario's coordinate system (straight lines unless
+# it declares lat/lon); pass a RoadDistance for road lengths.
+def simulate_deliveries(assignments, data, enable_delay=False, distance=None):
+    return dict(iter_agent_stats(assignments, data, enable_delay, distance))
+
+
+# Yield (agent_id, stats) one agent at a time, as simulate_deliveries reports them.
+# Lets a streaming report write each agent as soon as it is simulated.
+def iter_agent_stats(assignments, data, enable_delay=False, distance=None):
     warehouses = data["warehouses"]
     agents = data["agents"]
+    if distance is None:
+        distance = scenario_distance(data)
 
     # Create a map of warehouse IDs to their locations
     warehouse_map = {
@@ -17,8 +28,6 @@ def simulate_deliveries(assignments, data, enable_delay=False):
         agent["id"]: agent["location"] for agent in agents
     }
 
-    report = {}
-
     # Simulate each agent's deliveries
     for agent_id, packages in assignments.items():
         current_position = agent_map[agent_id]
@@ -31,8 +40,8 @@ def simulate_deliveries(assignments, data, enable_delay=False):
             destination_pos = package["destination"]
 
             # Normal travel distance
-            total_distance += euclidean_distance(current_position, warehouse_pos)
-            total_distance += euclidean_distance(warehouse_pos, destination_pos)
+            total_distance += distance(current_position, warehouse_pos)
+            total_distance += distance(warehouse_pos, destination_pos)
 
             # Update current position to destination
             # Random delivery delay
@@ -47,6 +56,46 @@ def simulate_deliveries(assignments, data, enable_delay=False):
         efficiency = total_distance / delivered if delivered else 0
         
         # Record agent's stats
+        yield agent_id, {
+            "packages_delivered": delivered,
+            "total_distance": round(total_distance, 2),
+            "efficiency": round(efficiency, 2)
+        }
+
+
+# Assign and simulate in a single pass over the packages.
+# Only per-agent running totals are kept, so a streamed PackageStream
+# is processed with bounded memory. Report matches simulate_deliveries.
+def simulate_stream(data, enable_delay=False, index="kdtree"):
+    distance = scenario_distance(data)
+    warehouse_map = {
+        wh["id"]: wh["location"] for wh in data["warehouses"]
+    }
+
+    # Running state per agent: [current_position, total_distance, delivered]
+    state = {
+        agent["id"]: [agent["location"], 0.0, 0] for agent in data["agents"]
+    }
+
+    for agent_id, package in iter_assignments(data, index):
+        agent_state = state[agent_id]
+        warehouse_pos = warehouse_map[package["warehouse_id"]]
+        destination_pos = package["destination"]
+
+        agent_state[1] += distance(agent_state[0], warehouse_pos)
+        agent_state[1] += distance(warehouse_pos, destination_pos)
+
+        # Random delivery delay
+        if enable_delay and random.random() < 0.2:  # 20% chance
+            agent_state[1] += random.uniform(1, 5)
+
+        agent_state[0] = destination_pos
+        agent_state[2] += 1
+
+    report = {}
+    for agent_id, (_, total_distance, delivered) in state.items():
+        efficiency = total_distance / delivered if delivered else 0
+
         report[agent_id] = {
             "packages_delivered": delivered,
             "total_distance": round(total_distance, 2),
@@ -54,3 +103,43 @@ def simulate_deliveries(assignments, data, enable_delay=False):
         }
 
     return report
+
+
+# Simulate a compact Scenario given the agent code of every package.
+# Packages are walked in input order, which is each agent's delivery order.
+def simulate_scenario(scenario, agent_codes, enable_delay=False):
+    distance = scenario_distance(scenario)
+    warehouse_xy = scenario.warehouse_xy
+    package_xy = scenario.package_xy
+    agent_xy = scenario.agent_xy
+    n_agents = len(scenario.agent_ids)
+
+    positions = [(agent_xy[2 * i], agent_xy[2 * i + 1]) for i in range(n_agents)]
+    totals = [0.0] * n_agents
+    delivered = [0] * n_agents
+
+    for i, (agent, code) in enumerate(zip(agent_codes, scenario.package_warehouse)):
+        warehouse_pos = (warehouse_xy[2 * code], warehouse_xy[2 * code + 1])
+        destination_pos = (package_xy[2 * i], package_xy[2 * i + 1])
+
+        totals[agent] += distance(positions[agent], warehouse_pos)
+        totals[agent] += distance(warehouse_pos, destination_pos)
+
+        # Random delivery delay
+        if enable_delay and random.random() < 0.2:  # 20% chance
+            totals[agent] += random.uniform(1, 5)
+
+        positions[agent] = destination_pos
+        delivered[agent] += 1
+
+    report = {}
+    for agent_id, total_distance, count in zip(scenario.agent_ids, totals, delivered):
+        efficiency = total_distance / count if count else 0
+
+        report[agent_id] = {
+            "packages_delivered": count,
+            "total_distance": round(total_distance, 2),
+            "efficiency": round(efficiency, 2)
+        }
+
+    return report
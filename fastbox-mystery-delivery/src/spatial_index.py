@@ -0,0 +1,340 @@
+import heapq
+import math
+from src.distance import COORDINATE_SYSTEMS, euclidean_distance, haversine_distance
+
+# Chord-nearest candidates re-ranked with the exact distance by GeoIndex
+GEO_CANDIDATES = 8
+
+
+# Pick the exact distance used to compare candidates.
+# 2D points use euclidean_distance so ties break exactly like the old loop.
+def _distance_for(dims):
+    return euclidean_distance if dims == 2 else math.dist
+
+
+# Brute-force index (same behaviour as scanning every agent).
+# Accepts any distance function, e.g. a RoadDistance provider.
+class LinearIndex:
+    def __init__(self, points, distance=None):
+        self.points = [tuple(p) for p in points]
+        self._distance = distance or _distance_for(len(self.points[0]) if self.points else 2)
+
+    # Return the position of the nearest point (first one wins on ties)
+    def nearest(self, point):
+        nearest = None
+        min_distance = float("inf")
+
+        for i, p in enumerate(self.points):
+            distance = self._distance(p, point)
+            if distance < min_distance:
+                min_distance = distance
+                nearest = i
+
+        return nearest
+
+    # Return the positions of the k nearest points, closest first
+    # (equal distances ordered by position)
+    def nearest_k(self, point, k):
+        return heapq.nsmallest(
+            k, range(len(self.points)),
+            key=lambda i: (self._distance(self.points[i], point), i)
+        )
+
+    # Move point i to a new position
+    def move(self, i, point):
+        self.points[i] = tuple(point)
+
+
+# Static KD-tree, built once over all points
+class KDTreeIndex:
+    def __init__(self, points):
+        self.points = [tuple(p) for p in points]
+        self.dims = len(self.points[0]) if self.points else 2
+        self._distance = _distance_for(self.dims)
+
+        # Flat node storage: point position, split axis, left child, right child
+        self._point = []
+        self._axis = []
+        self._left = []
+        self._right = []
+        self._root = self._build(list(range(len(self.points))), 0)
+
+    def _build(self, indices, depth):
+        if not indices:
+            return -1
+
+        axis = depth % self.dims
+        indices.sort(key=lambda i: self.points[i][axis])
+        mid = len(indices) // 2
+
+        node = len(self._point)
+        self._point.append(indices[mid])
+        self._axis.append(axis)
+        self._left.append(-1)
+        self._right.append(-1)
+
+        self._left[node] = self._build(indices[:mid], depth + 1)
+        self._right[node] = self._build(indices[mid + 1:], depth + 1)
+        return node
+
+    # Return the position of the nearest point.
+    # Equal distances resolve to the lowest position, matching a strict `<` scan.
+    def nearest(self, point):
+        best = None
+        best_distance = float("inf")
+        stack = [self._root] if self._root != -1 else []
+
+        while stack:
+            node = stack.pop()
+            i = self._point[node]
+            distance = self._distance(self.points[i], point)
+
+            if distance < best_distance or (distance == best_distance and i < best):
+                best_distance = distance
+                best = i
+
+            axis = self._axis[node]
+            diff = point[axis] - self.points[i][axis]
+            near, far = (
+                (self._left[node], self._right[node]) if diff < 0
+                else (self._right[node], self._left[node])
+            )
+
+            # Far side can only hold a closer (or tied) point if the
+            # splitting plane is within the current best distance
+            if far != -1 and abs(diff) <= best_distance:
+                stack.append(far)
+            if near != -1:
+                stack.append(near)
+
+        return best
+
+    # Return the positions of the k nearest points, closest first
+    # (equal distances ordered by position)
+    def nearest_k(self, point, k):
+        # Max-heap of the best k as (-distance, -position)
+        heap = []
+        stack = [self._root] if self._root != -1 and k > 0 else []
+
+        while stack:
+            node = stack.pop()
+            i = self._point[node]
+            distance = self._distance(self.points[i], point)
+
+            if len(heap) < k:
+                heapq.heappush(heap, (-distance, -i))
+            elif (-distance, -i) > heap[0]:
+                heapq.heapreplace(heap, (-distance, -i))
+
+            axis = self._axis[node]
+            diff = point[axis] - self.points[i][axis]
+            near, far = (
+                (self._left[node], self._right[node]) if diff < 0
+                else (self._right[node], self._left[node])
+            )
+
+            worst = -heap[0][0] if len(heap) == k else float("inf")
+            if far != -1 and abs(diff) <= worst:
+                stack.append(far)
+            if near != -1:
+                stack.append(near)
+
+        return [-i for _, i in sorted(heap, reverse=True)]
+
+
+# Uniform grid of buckets; supports adding and removing points
+class GridIndex:
+    def __init__(self, points, cell_size=None):
+        self.points = {}
+        self.cells = {}
+        # Bounds of occupied cells (may over-estimate after removals)
+        self.bounds = None
+
+        points = [tuple(p) for p in points]
+        if cell_size is None:
+            cell_size = self._default_cell_size(points)
+        self.cell_size = cell_size
+
+        # Bulk load: bucket every point, then take the bounds once
+        for i, p in enumerate(points):
+            self.points[i] = p
+            self.cells.setdefault(self._cell(p), []).append(i)
+
+        if self.cells:
+            xs = [cell[0] for cell in self.cells]
+            ys = [cell[1] for cell in self.cells]
+            self.bounds = [min(xs), min(ys), max(xs), max(ys)]
+
+    # Aim for roughly one point per cell
+    @staticmethod
+    def _default_cell_size(points):
+        if len(points) < 2:
+            return 1.0
+
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        area = max(max(xs) - min(xs), 1.0) * max(max(ys) - min(ys), 1.0)
+        return math.sqrt(area / len(points))
+
+    def _cell(self, point):
+        return (
+            math.floor(point[0] / self.cell_size),
+            math.floor(point[1] / self.cell_size)
+        )
+
+    def add(self, i, point):
+        point = tuple(point)
+        cell = self._cell(point)
+        self.points[i] = point
+        self.cells.setdefault(cell, []).append(i)
+
+        if self.bounds is None:
+            self.bounds = [cell[0], cell[1], cell[0], cell[1]]
+        else:
+            self.bounds[0] = min(self.bounds[0], cell[0])
+            self.bounds[1] = min(self.bounds[1], cell[1])
+            self.bounds[2] = max(self.bounds[2], cell[0])
+            self.bounds[3] = max(self.bounds[3], cell[1])
+
+    def remove(self, i):
+        point = self.points.pop(i)
+        cell = self._cell(point)
+        self.cells[cell].remove(i)
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    # Move point i (keeps its key, so ties still favour the lowest key)
+    def move(self, i, point):
+        self.remove(i)
+        self.add(i, point)
+
+    def __len__(self):
+        return len(self.points)
+
+    # Return the key of the nearest point (lowest key wins on ties)
+    def nearest(self, point):
+        if not self.points:
+            return None
+
+        cx, cy = self._cell(point)
+        best = None
+        best_distance = float("inf")
+        ring = 0
+
+        # Grow square rings of cells until nothing outside can be closer
+        max_ring = self._max_ring(cx, cy)
+        while ring <= max_ring:
+            for cell in self._ring_cells(cx, cy, ring):
+                for i in self.cells.get(cell, ()):
+                    distance = euclidean_distance(self.points[i], point)
+                    if distance < best_distance or (
+                        distance == best_distance and i < best
+                    ):
+                        best_distance = distance
+                        best = i
+
+            # Any point outside the rings searched so far is at least this far away
+            if best is not None and ring * self.cell_size > best_distance:
+                break
+            ring += 1
+
+        return best
+
+    # Keys of every point strictly closer than `radius` to `point`, in key order
+    def within(self, point, radius):
+        if not self.points:
+            return []
+
+        cx, cy = self._cell(point)
+        found = []
+        for ring in range(self._max_ring(cx, cy) + 1):
+            for cell in self._ring_cells(cx, cy, ring):
+                for i in self.cells.get(cell, ()):
+                    if euclidean_distance(self.points[i], point) < radius:
+                        found.append(i)
+
+            # Any point outside the rings searched so far is at least this far away
+            if ring * self.cell_size >= radius:
+                break
+
+        return sorted(found)
+
+    # Number of rings needed to cover every occupied cell
+    def _max_ring(self, cx, cy):
+        min_x, min_y, max_x, max_y = self.bounds
+        return max(cx - min_x, max_x - cx, cy - min_y, max_y - cy, 0)
+
+    @staticmethod
+    def _ring_cells(cx, cy, ring):
+        if ring == 0:
+            yield (cx, cy)
+            return
+
+        for x in range(cx - ring, cx + ring + 1):
+            yield (x, cy - ring)
+            yield (x, cy + ring)
+        for y in range(cy - ring + 1, cy + ring):
+            yield (cx - ring, y)
+            yield (cx + ring, y)
+
+
+# [latitude, longitude] in degrees -> point on the unit sphere
+def _unit_vector(point):
+    lat, lon = math.radians(point[0]), math.radians(point[1])
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+# Nearest-neighbour index for [latitude, longitude] points.
+# On the unit sphere the straight-line (chord) distance grows with the
+# great-circle distance, so a 3D KD-tree finds the closest candidates; these
+# are re-ranked with the exact `distance` (lowest position wins on ties).
+# Exact for haversine only: a metric that does not grow with the chord (e.g.
+# equirectangular) can rank a point outside the candidates first.
+class GeoIndex:
+    def __init__(self, points, distance=haversine_distance, candidates=GEO_CANDIDATES):
+        self.points = [tuple(p) for p in points]
+        self._distance = distance
+        self.candidates = candidates
+        self._tree = KDTreeIndex([_unit_vector(p) for p in self.points])
+
+    def _ranked(self, point, k):
+        ranked = sorted(
+            (self._distance(self.points[i], point), i)
+            for i in self._tree.nearest_k(_unit_vector(point), k + self.candidates)
+        )
+        return [i for _, i in ranked[:k]]
+
+    def nearest(self, point):
+        ranked = self._ranked(point, 1)
+        return ranked[0] if ranked else None
+
+    def nearest_k(self, point, k):
+        return self._ranked(point, k)
+
+
+INDEX_TYPES = {
+    "linear": LinearIndex,
+    "kdtree": KDTreeIndex,
+    "grid": GridIndex,
+}
+
+
+# Coordinate systems whose distance grows with the chord, so GeoIndex is exact
+GEO_INDEXED = ("haversine",)
+
+
+# Build a nearest-neighbour index by name (or from an index class).
+# Haversine gets a GeoIndex; other geographic coordinate systems (and "linear")
+# get an exact linear scan, so every engine picks the same agents.
+def build_index(points, kind="kdtree", coordinate_system="planar"):
+    if coordinate_system != "planar":
+        distance = COORDINATE_SYSTEMS[coordinate_system]
+        if kind == "linear" or coordinate_system not in GEO_INDEXED:
+            return LinearIndex(points, distance)
+        return GeoIndex(points, distance)
+
+    if isinstance(kind, str):
+        if kind not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {kind}")
+        kind = INDEX_TYPES[kind]
+    return kind(points)
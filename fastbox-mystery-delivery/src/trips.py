@@ -0,0 +1,144 @@
+import math
+import random
+from src.distance import euclidean_distance, scenario_distance, search_metric
+
+# Packages an agent's vehicle carries per trip by default
+DEFAULT_TRIP_CAPACITY = 20
+
+
+# Split one warehouse's packages into trips of at most `capacity` packages.
+# Destinations are swept by angle around the warehouse, so each trip covers
+# one narrow wedge and its stops lie close together (O(n log n)).
+def sweep_trips(pickup, packages, capacity):
+    px, py = pickup
+    ordered = sorted(
+        packages,
+        key=lambda p: math.atan2(p["destination"][1] - py, p["destination"][0] - px)
+    )
+    return [ordered[i:i + capacity] for i in range(0, len(ordered), capacity)]
+
+
+# Delivery order of one trip: nearest remaining destination first, starting at
+# the warehouse (O(capacity²), so bounded by the vehicle size)
+def tour_order(pickup, trip, metric=math.dist):
+    remaining = list(trip)
+    position = pickup
+    tour = []
+    while remaining:
+        best = min(
+            range(len(remaining)),
+            key=lambda k: metric(position, remaining[k]["destination"])
+        )
+        package = remaining[best]
+        remaining[best] = remaining[-1]
+        remaining.pop()
+
+        tour.append(package)
+        position = package["destination"]
+    return tour
+
+
+# Plan one agent's trips: [(warehouse_id, [packages in delivery order])].
+# The agent always heads to the nearest warehouse that still has packages and
+# runs all of that warehouse's trips, coming back to it between trips.
+def plan_agent_trips(start, packages, warehouse_map, capacity=DEFAULT_TRIP_CAPACITY,
+                     distance=euclidean_distance):
+    if capacity < 1:
+        raise ValueError(f"Trip capacity must be at least 1, got {capacity}")
+    metric = search_metric(distance)
+
+    by_warehouse = {}
+    for package in packages:
+        by_warehouse.setdefault(package["warehouse_id"], []).append(package)
+
+    trips = []
+    position = start
+    while by_warehouse:
+        wid = min(by_warehouse, key=lambda w: metric(position, warehouse_map[w]))
+        pickup = warehouse_map[wid]
+        for trip in sweep_trips(pickup, by_warehouse.pop(wid), capacity):
+            tour = tour_order(pickup, trip, metric)
+            trips.append((wid, tour))
+            position = tour[-1]["destination"]
+
+    return trips
+
+
+# Plan every agent's trips: {agent_id: [(warehouse_id, [packages])]}
+def plan_trips(assignments, data, capacity=DEFAULT_TRIP_CAPACITY, distance=None):
+    if distance is None:
+        distance = scenario_distance(data)
+    warehouse_map = {
+        wh["id"]: wh["location"] for wh in data["warehouses"]
+    }
+    agent_map = {
+        agent["id"]: agent["location"] for agent in data["agents"]
+    }
+
+    return {
+        agent_id: plan_agent_trips(
+            agent_map[agent_id], packages, warehouse_map, capacity, distance
+        )
+        for agent_id, packages in assignments.items()
+    }
+
+
+# Simulate deliveries as capacity-bounded trips: each trip is one drive to the
+# warehouse, then a tour of its destinations. Same stats as simulate_deliveries
+# plus `trips` and `distance_saved` (the one-round-trip-per-package distance of
+# the input order minus the trip distance, both without delays). Delays are
+# drawn per package like the loop simulation.
+def simulate_trips(assignments, data, capacity=DEFAULT_TRIP_CAPACITY,
+                   enable_delay=False, distance=None):
+    if distance is None:
+        distance = scenario_distance(data)
+    warehouse_map = {
+        wh["id"]: wh["location"] for wh in data["warehouses"]
+    }
+    agent_map = {
+        agent["id"]: agent["location"] for agent in data["agents"]
+    }
+
+    stats = {}
+    for agent_id, packages in assignments.items():
+        start = agent_map[agent_id]
+
+        # One-by-one model over the input order (as simulate_deliveries)
+        baseline = 0.0
+        position = start
+        for package in packages:
+            warehouse_pos = warehouse_map[package["warehouse_id"]]
+            baseline += distance(position, warehouse_pos)
+            baseline += distance(warehouse_pos, package["destination"])
+            position = package["destination"]
+
+        trips = plan_agent_trips(start, packages, warehouse_map, capacity, distance)
+
+        travelled = 0.0
+        delay = 0.0
+        position = start
+        for wid, tour in trips:
+            position_at = warehouse_map[wid]
+            travelled += distance(position, position_at)
+            for package in tour:
+                travelled += distance(position_at, package["destination"])
+                position_at = package["destination"]
+
+                # Random delivery delay
+                if enable_delay and random.random() < 0.2:  # 20% chance
+                    delay += random.uniform(1, 5)
+            position = position_at
+
+        delivered = len(packages)
+        total_distance = travelled + delay
+        efficiency = total_distance / delivered if delivered else 0
+
+        stats[agent_id] = {
+            "packages_delivered": delivered,
+            "total_distance": round(total_distance, 2),
+            "efficiency": round(efficiency, 2),
+            "trips": len(trips),
+            "distance_saved": round(baseline - travelled, 2)
+        }
+
+    return stats
@@ -0,0 +1,176 @@
+from src.distance import (
+    coordinate_system,
+    distance_matrix,
+    pairwise_distances,
+    require_numpy,
+)
+
+# Chance of a random delivery delay and its extra distance range (same as simulation.py)
+DELAY_PROBABILITY = 0.2
+DELAY_RANGE = (1, 5)
+
+# Rows of the warehouse x agent matrix computed per chunk (bounds peak memory)
+CHUNK_ROWS = 1024
+
+
+# Return the position of the nearest agent for every warehouse.
+# argmin keeps the first minimum, same as the strict `<` rule of the greedy engine.
+def nearest_agent_codes(warehouse_xy, agent_xy, coordinates="planar"):
+    np = require_numpy()
+    warehouse_xy = np.asarray(warehouse_xy, dtype=np.float64).reshape(-1, 2)
+    agent_xy = np.asarray(agent_xy, dtype=np.float64).reshape(-1, 2)
+
+    nearest = np.empty(len(warehouse_xy), dtype=np.intp)
+    for start in range(0, len(warehouse_xy), CHUNK_ROWS):
+        chunk = warehouse_xy[start:start + CHUNK_ROWS]
+        nearest[start:start + len(chunk)] = distance_matrix(chunk, agent_xy, coordinates).argmin(axis=1)
+
+    return nearest
+
+
+# Assign packages to agents with one vectorized distance matrix.
+# Produces the same {agent_id: [package, ...]} output as assign_packages_to_agents.
+def assign_packages_vectorized(data):
+    np = require_numpy()
+    warehouses = data["warehouses"]
+    agents = data["agents"]
+    packages = data["packages"]
+
+    # Intern warehouse IDs to integer codes
+    warehouse_code = {wh["id"]: i for i, wh in enumerate(warehouses)}
+    warehouse_xy = [wh["location"] for wh in warehouses]
+
+    agent_ids = [agent["id"] for agent in agents]
+    agent_xy = [agent["location"] for agent in agents]
+
+    assignments = {agent_id: [] for agent_id in agent_ids}
+    if not packages:
+        return assignments
+
+    nearest = nearest_agent_codes(warehouse_xy, agent_xy, coordinate_system(data))
+
+    # Map every package to its agent by fancy-indexing on warehouse codes
+    package_codes = np.fromiter(
+        (warehouse_code[p["warehouse_id"]] for p in packages),
+        dtype=np.intp,
+        count=len(packages)
+    )
+    package_agents = nearest[package_codes].tolist()
+
+    for package, agent in zip(packages, package_agents):
+        assignments[agent_ids[agent]].append(package)
+
+    return assignments
+
+
+# Lay out assignments as contiguous per-agent columns.
+# Packages of each agent are stored back to back, in delivery order.
+def columnize_assignments(assignments, data):
+    np = require_numpy()
+
+    warehouse_code = {}
+    warehouse_xy = []
+    for wh in data["warehouses"]:
+        if wh["id"] not in warehouse_code:
+            warehouse_code[wh["id"]] = len(warehouse_xy)
+            warehouse_xy.append(wh["location"])
+        else:
+            warehouse_xy[warehouse_code[wh["id"]]] = wh["location"]
+
+    agent_map = {
+        agent["id"]: agent["location"] for agent in data["agents"]
+    }
+
+    agent_ids = list(assignments)
+    counts = [len(assignments[agent_id]) for agent_id in agent_ids]
+
+    # One pass over the packages, collecting flat Python lists
+    codes = []
+    coordinates = []
+    for agent_id in agent_ids:
+        for package in assignments[agent_id]:
+            codes.append(warehouse_code[package["warehouse_id"]])
+            coordinates.extend(package["destination"])
+
+    codes = np.array(codes, dtype=np.intp)
+    destinations = np.array(coordinates, dtype=np.float64).reshape(-1, 2)
+
+    return {
+        "agent_ids": agent_ids,
+        "agent_xy": np.array(
+            [agent_map[agent_id] for agent_id in agent_ids], dtype=np.float64
+        ).reshape(-1, 2),
+        "counts": np.array(counts, dtype=np.intp),
+        "warehouse_xy": np.array(warehouse_xy, dtype=np.float64).reshape(-1, 2),
+        "warehouse_codes": codes,
+        "destinations": destinations,
+        "coordinate_system": coordinate_system(data),
+    }
+
+
+# Distance legs of every package: previous stop -> warehouse and warehouse -> destination.
+# Returns (to_warehouse, to_destination, segment) where segment is the agent position per package.
+def delivery_legs(columns):
+    np = require_numpy()
+    counts = columns["counts"]
+    destinations = columns["destinations"]
+    segment = np.repeat(np.arange(len(counts)), counts)
+
+    pickups = columns["warehouse_xy"][columns["warehouse_codes"]]
+
+    # Each package starts from the previous destination, or the agent's start for the first one
+    previous = np.empty_like(destinations)
+    previous[1:] = destinations[:-1]
+    starts = np.cumsum(counts) - counts
+    has_packages = counts > 0
+    previous[starts[has_packages]] = columns["agent_xy"][has_packages]
+
+    coordinates = columns.get("coordinate_system", "planar")
+    return (
+        pairwise_distances(previous, pickups, coordinates),
+        pairwise_distances(pickups, destinations, coordinates),
+        segment,
+    )
+
+
+# Random delay distance per package (0 when no delay happens)
+def draw_delays(rng, size):
+    np = require_numpy()
+    delayed = rng.random(size) < DELAY_PROBABILITY
+    return np.where(delayed, rng.uniform(*DELAY_RANGE, size), 0.0)
+
+
+# Vectorized simulate_deliveries over columnar package arrays.
+# Produces the same report as simulate_deliveries; delays come from a NumPy Generator.
+def simulate_deliveries_columnar(assignments, data, enable_delay=False, seed=None):
+    np = require_numpy()
+    columns = columnize_assignments(assignments, data)
+    counts = columns["counts"]
+
+    to_warehouse, to_destination, segment = delivery_legs(columns)
+
+    # Interleave legs in travel order so the segmented sum adds them
+    # in the same sequence as the per-package loop
+    legs = [to_warehouse, to_destination]
+    if enable_delay:
+        legs.append(draw_delays(np.random.default_rng(seed), len(segment)))
+
+    totals = np.bincount(
+        np.repeat(segment, len(legs)),
+        weights=np.column_stack(legs).ravel(),
+        minlength=len(counts)
+    ).astype(np.float64)
+
+    report = {}
+    for agent_id, delivered, total_distance in zip(
+        columns["agent_ids"], counts.tolist(), totals.tolist()
+    ):
+        efficiency = total_distance / delivered if delivered else 0
+
+        report[agent_id] = {
+            "packages_delivered": delivered,
+            "total_distance": round(total_distance, 2),
+            "efficiency": round(efficiency, 2)
+        }
+
+    return report
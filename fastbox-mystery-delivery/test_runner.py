@@ -1,77 +1,99 @@
 import os
 import csv
-from src.data_loader import load_data
-from src.assignment import assign_packages_to_agents
-from src.simulation import simulate_deliveries
+import json
+import time
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from src.data_loader import load_data, normalize_locations, normalize_package
+from src.engines import (
+    ASSIGNMENT_ENGINES,
+    SIMULATION_ENGINES,
+    get_assignment_engine,
+    get_simulation_engine,
+)
+from src.instrumentation import Instrumentation
+from src.result_cache import (
+    DEFAULT_CACHE_BYTES,
+    DEFAULT_CACHE_DIR,
+    cache_key,
+    decode_agents,
+    encode_agents,
+    encode_assignments,
+    open_cache,
+)
 
 # Normalize data structure for test cases
 def normalize_data(data):
-    # Normalize warehouses
-    if isinstance(data.get("warehouses"), dict):
-        data["warehouses"] = [
-            {"id": k, "location": v}
-            for k, v in data["warehouses"].items()
-        ]
-
-    # Normalize agents
-    if isinstance(data.get("agents"), dict):
-        data["agents"] = [
-            {"id": k, "location": v}
-            for k, v in data["agents"].items()
-        ]
+    # Normalize warehouses and agents ({id: location} -> list of records)
+    data["warehouses"] = normalize_locations(data.get("warehouses"))
+    data["agents"] = normalize_locations(data.get("agents"))
 
     # Normalize packages (warehouse -> warehouse_id)
-    if data.get("packages"):
-        sample = data["packages"][0]
-        if "warehouse" in sample:
-            for pkg in data["packages"]:
-                pkg["warehouse_id"] = pkg.pop("warehouse")
+    for pkg in data.get("packages") or []:
+        normalize_package(pkg)
 
     return data
 
-# Run all test cases in the Test_cases directory
-def run_all_test_cases():
-    test_dir = "Test_cases"
-    report_dir = os.path.join("output", "test_case_report")
-
-    os.makedirs(report_dir, exist_ok=True)
-
-    print("\nRunning FastBox Test Cases\n")
-
-    # Iterate through all test case files
-    for file in sorted(os.listdir(test_dir)):
-        if not file.endswith(".json"):
-            continue
+# Run a single test case file and write its CSV report.
+# Returns a summary record; runs inside worker processes, so it must not print.
+# With `trace`, the record also carries per-stage timings under "stages".
+# With `cache_dir`, unchanged scenarios reuse the stored assignment + stats.
+def run_test_case(path, report_dir, engine="greedy", sim_engine="loop", trace=False,
+                  cache_dir=None, cache_bytes=DEFAULT_CACHE_BYTES):
+    file = os.path.basename(path)
+    csv_name = file.replace(".json", "_report.csv")
+    csv_path = os.path.join(report_dir, csv_name)
+    started = time.perf_counter()
+    instrumentation = Instrumentation(enabled=trace)
 
-        print(file)
+    try:
+        assign_packages = get_assignment_engine(engine)
+        simulate_deliveries = get_simulation_engine(sim_engine)
 
-        data = load_data(os.path.join(test_dir, file))
-        data = normalize_data(data)
+        with instrumentation.stage("load") as stage:
+            data = load_data(path)
+            data = normalize_data(data)
+            stage.items = len(data["packages"])
 
-        assignments = assign_packages_to_agents(data)
-        stats = simulate_deliveries(assignments, data)
+        cached = None
+        if cache_dir:
+            with instrumentation.stage("cache", items=len(data["packages"])):
+                cache = open_cache(cache_dir, cache_bytes)
+                key = cache_key(data, engine=engine, sim_engine=sim_engine, enable_delay=False)
+                cached = cache.get(key)
 
+        if cached is not None:
+            stats = decode_agents(cached["stats"], data["agents"])
+        else:
+            with instrumentation.stage("assign", items=len(data["packages"])):
+                assignments = assign_packages(data)
+            with instrumentation.stage("simulate", items=len(data["packages"])):
+                stats = simulate_deliveries(assignments, data)
+            if cache_dir:
+                cache.put(key, {
+                    "assignments": encode_assignments(
+                        assignments, data["packages"], data["agents"]
+                    ),
+                    "stats": encode_agents(stats, data["agents"]),
+                })
         # Validate results
         total_packages = len(data["packages"])
         delivered = sum(
             agent["packages_delivered"] for agent in stats.values()
         )
 
-        print(f"   Packages Expected : {total_packages}")
-        print(f"   Packages Delivered: {delivered}")
-
         # Find best agent (lowest efficiency, must have delivered packages)
         best_agent = min(
             stats,
             key=lambda a: stats[a]["efficiency"]
-            if stats[a]["packages_delivered"] > 0 else float("inf")
+            if stats[a]["packages_delivered"] > 0 else float("inf"),
+            default=None
         )
 
-        csv_name = file.replace(".json", "_report.csv")
-        csv_path = os.path.join(report_dir, csv_name)
-        
         # Save CSV report
-        with open(csv_path, "w", newline="") as f:
+        with instrumentation.stage("report", items=len(stats)), \
+                open(csv_path, "w", newline="") as f:
             writer = csv.writer(f)
             writer.writerow([
                 "agent",
@@ -92,12 +114,183 @@ def run_all_test_cases():
                     status
                 ])
 
-        # Final pass/fail check
-        if total_packages == delivered:
-            print(f"   PASS → {csv_name}\n")
-        else:
-            print(f"   FAIL → {csv_name}\n")
+    except Exception as e:
+        return {
+            "file": file,
+            "status": "ERROR",
+            "error": f"{type(e).__name__}: {e}",
+            "seconds": round(time.perf_counter() - started, 6),
+        }
+
+    result = {
+        "file": file,
+        "status": "PASS" if total_packages == delivered else "FAIL",
+        "packages_expected": total_packages,
+        "packages_delivered": delivered,
+        "agents": len(stats),
+        "best_agent": best_agent,
+        "csv": csv_name,
+        "seconds": round(time.perf_counter() - started, 6),
+    }
+    if cache_dir:
+        result["cached"] = cached is not None
+    if trace:
+        result["stages"] = instrumentation.to_dict()["stages"]
+    return result
+
+
+# Print one result in the runner's console format
+def print_result(result):
+    print(result["file"])
+
+    if result["status"] == "ERROR":
+        print(f"   ERROR → {result['error']}\n")
+        return
+
+    print(f"   Packages Expected : {result['packages_expected']}")
+    print(f"   Packages Delivered: {result['packages_delivered']}")
+    print(f"   {result['status']} → {result['csv']}\n")
+
+
+# Run all test cases in the Test_cases directory.
+# Files are fanned out over `workers` processes (None = one per CPU); results (and the summary)
+# always come back in sorted file order, whatever the completion order.
+# With `trace`, stage timings of all files are summed into trace.json / metrics.prom.
+# With `cache_dir`, files whose scenario and engines are unchanged skip assign + simulate.
+def run_all_test_cases(engine="greedy", sim_engine="loop", workers=1,
+                       test_dir="Test_cases", summary_path=None, trace=False,
+                       cache_dir=None, cache_bytes=DEFAULT_CACHE_BYTES):
+    report_dir = os.path.join("output", "test_case_report")
+    if summary_path is None:
+        summary_path = os.path.join(report_dir, "summary.json")
+
+    os.makedirs(report_dir, exist_ok=True)
+
+    print("\nRunning FastBox Test Cases\n")
+
+    files = [
+        os.path.join(test_dir, file)
+        for file in sorted(os.listdir(test_dir))
+        if file.endswith(".json")
+    ]
+    run_one = partial(
+        run_test_case, report_dir=report_dir, engine=engine,
+        sim_engine=sim_engine, trace=trace,
+        cache_dir=cache_dir, cache_bytes=cache_bytes
+    )
+    started = time.perf_counter()
+
+    workers = workers or os.cpu_count() or 1
+
+    results = []
+    if workers == 1:
+        for path in files:
+            results.append(run_one(path))
+            print_result(results[-1])
+    else:
+        # Large chunks keep inter-process overhead low for thousands of small files
+        chunksize = max(1, len(files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(run_one, files, chunksize=chunksize):
+                results.append(result)
+                print_result(result)
+
+    counts = {"PASS": 0, "FAIL": 0, "ERROR": 0}
+    for result in results:
+        counts[result["status"]] += 1
+
+    summary = {
+        "engine": engine,
+        "sim_engine": sim_engine,
+        "workers": workers,
+        "total": len(results),
+        "passed": counts["PASS"],
+        "failed": counts["FAIL"],
+        "errors": counts["ERROR"],
+        "seconds": round(time.perf_counter() - started, 6),
+        "results": results,
+    }
+    if cache_dir:
+        hits = sum(1 for result in results if result.get("cached"))
+        summary["cache"] = {"hits": hits, "misses": len(results) - hits}
+
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=4)
+
+    if trace:
+        instrumentation = Instrumentation(enabled=True)
+        for result in results:
+            instrumentation.merge(result.get("stages", {}))
+            instrumentation.count(result["status"].lower())
+            if "cached" in result:
+                instrumentation.count("cache_hits" if result["cached"] else "cache_misses")
+        instrumentation.write_json(os.path.join(report_dir, "trace.json"))
+        instrumentation.write_prometheus(os.path.join(report_dir, "metrics.prom"))
+
+    if cache_dir:
+        print(f"Cache: {summary['cache']['hits']} hits, {summary['cache']['misses']} misses")
+    print(f"{counts['PASS']}/{len(results)} passed → {summary_path}")
+    return summary
 
 
 if __name__ == "__main__":
-    run_all_test_cases()
+    parser = argparse.ArgumentParser(description="Run all FastBox test cases")
+    parser.add_argument(
+        "--engine",
+        choices=sorted(ASSIGNMENT_ENGINES),
+        default="greedy",
+        help="assignment engine (default: greedy)"
+    )
+    parser.add_argument(
+        "--sim-engine",
+        choices=sorted(SIMULATION_ENGINES),
+        default="loop",
+        help="simulation engine (default: loop)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="worker processes (default: 1, 0 = one per CPU)"
+    )
+    parser.add_argument(
+        "--test-dir",
+        default="Test_cases",
+        help="directory of scenario files (default: Test_cases)"
+    )
+    parser.add_argument(
+        "--summary",
+        default=None,
+        help="summary JSON path (default: output/test_case_report/summary.json)"
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="record per-stage timings (trace.json / metrics.prom in the report dir)"
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        default=None,
+        metavar="DIR",
+        help=f"reuse results of unchanged scenarios (default dir: {DEFAULT_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_BYTES // 2**20,
+        help=f"cache budget in MiB (default: {DEFAULT_CACHE_BYTES // 2**20})"
+    )
+    args = parser.parse_args()
+
+    run_all_test_cases(
+        engine=args.engine,
+        sim_engine=args.sim_engine,
+        workers=args.workers or None,
+        test_dir=args.test_dir,
+        summary_path=args.summary,
+        trace=args.trace,
+        cache_dir=args.cache,
+        cache_bytes=args.cache_size * 2**20
+    )
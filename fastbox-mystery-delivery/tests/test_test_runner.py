@@ -0,0 +1,63 @@
+import os
+import sys
+import csv
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from test_runner import run_test_case
+
+
+# run_test_case on scenarios that must not abort the whole run
+class RunTestCaseTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    # Write a scenario file and run it, reports next to it
+    def run_scenario(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(content if isinstance(content, str) else json.dumps(content))
+        return run_test_case(path, self.tmp.name)
+
+    def test_empty_scenario_passes_with_header_only_report(self):
+        result = self.run_scenario(
+            "empty.json", {"warehouses": {}, "agents": {}, "packages": []}
+        )
+
+        self.assertEqual(result["status"], "PASS")
+        self.assertEqual(result["packages_expected"], 0)
+        self.assertEqual(result["packages_delivered"], 0)
+        self.assertEqual(result["agents"], 0)
+        self.assertIsNone(result["best_agent"])
+
+        with open(os.path.join(self.tmp.name, result["csv"]), newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(
+            rows,
+            [["agent", "packages_delivered", "total_distance", "efficiency", "status"]]
+        )
+
+    def test_unknown_warehouse_is_reported_as_error(self):
+        result = self.run_scenario("bad_warehouse.json", {
+            "warehouses": {"W1": [0, 0]},
+            "agents": {"A1": [1, 1]},
+            "packages": [{"id": "P1", "warehouse": "W9", "destination": [2, 2]}],
+        })
+
+        self.assertEqual(result["status"], "ERROR")
+        self.assertEqual(result["file"], "bad_warehouse.json")
+        self.assertTrue(result["error"].startswith("KeyError"))
+
+    def test_malformed_json_is_reported_as_error(self):
+        result = self.run_scenario("broken.json", '{"warehouses": ')
+
+        self.assertEqual(result["status"], "ERROR")
+        self.assertTrue(result["error"].startswith("JSONDecodeError"))
+
+
+if __name__ == "__main__":
+    unittest.main()